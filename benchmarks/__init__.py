@@ -0,0 +1,4 @@
+"""
+[airspeed velocity](https://asv.readthedocs.io/) benchmark suite. See the
+"Benchmarks" section of the README.
+"""
@@ -0,0 +1,185 @@
+"""
+Encoding and decoding benchmarks: `to_json`, `from_json`, `save_json` and
+`load_json` on the main kinds of payload
+"""
+
+from typing import Any
+
+import turbo_broccoli as tb
+
+try:
+    from turbo_broccoli.compression import HAS_LZ4, HAS_ZSTD
+except ImportError:  # Commits without artifact compression
+    HAS_LZ4 = HAS_ZSTD = False
+
+from .common import (
+    TORCH_MODULES,
+    _RoundTrip,
+    dataframe,
+    deep_dict,
+    few_large_arrays,
+    many_small_arrays,
+    records,
+    sklearn_estimator,
+    torch_module,
+    wide_dict,
+)
+
+PANDAS_FORMATS = [
+    "csv",
+    "excel",
+    "feather",
+    "html",
+    "json",
+    "latex",
+    "orc",
+    "parquet",
+    "pickle",
+    "sql",
+    "stata",
+    "xml",
+]
+"""All the values of `turbo_broccoli.Context.pandas_format`"""
+
+
+class Primitives(_RoundTrip):
+    """Vanilla JSON values, which only go through the traversal"""
+
+    params = ["wide", "deep", "records"]
+    param_names = ["shape"]
+
+    def obj(self, shape: str) -> Any:
+        return {"wide": wide_dict, "deep": deep_dict, "records": records}[
+            shape
+        ]()
+
+
+class NumpyArrays(_RoundTrip):
+    """Many small (inline) arrays, or a few large (artifact) ones"""
+
+    params = ["many_small", "few_large"]
+    param_names = ["shape"]
+
+    def obj(self, shape: str) -> Any:
+        return {
+            "many_small": many_small_arrays,
+            "few_large": few_large_arrays,
+        }[shape]()
+
+
+class Pandas(_RoundTrip):
+    """
+    A 100k rows DataFrame in each pandas format. Formats that can't round
+    trip in the current environment are skipped.
+    """
+
+    params = PANDAS_FORMATS
+    param_names = ["pandas_format"]
+
+    def obj(self, pandas_format: str) -> Any:
+        return dataframe()
+
+    def context_kwargs(self, pandas_format: str) -> dict:
+        return {"pandas_format": pandas_format}
+
+    def setup(self, pandas_format: str) -> None:
+        ctx = tb.Context(
+            min_artifact_size=0, **self.context_kwargs(pandas_format)
+        )
+        try:
+            tb.from_json(tb.to_json(dataframe(10), ctx), ctx)
+        except Exception as e:  # pylint: disable=broad-except
+            raise NotImplementedError(
+                f"pandas_format={pandas_format} is unavailable"
+            ) from e
+        super().setup(pandas_format)
+
+
+class Sklearn(_RoundTrip):
+    """
+    Fitted scikit-learn estimators. Skipped if the installed scikit-learn
+    version is not supported.
+    """
+
+    params = ["kmeans", "logistic_regression", "random_forest"]
+    param_names = ["estimator"]
+
+    def obj(self, estimator: str) -> Any:
+        return sklearn_estimator(estimator)
+
+    def setup(self, estimator: str) -> None:
+        x = self.obj(estimator)
+        try:
+            tb.from_json(tb.to_json(x))
+        except Exception as e:  # pylint: disable=broad-except
+            raise NotImplementedError(
+                f"{type(x).__name__} can't round trip in this environment"
+            ) from e
+        super().setup(estimator)
+
+
+class Torch(_RoundTrip):
+    """Pytorch modules with few large or many small parameters"""
+
+    params = ["mlp", "cnn"]
+    param_names = ["module"]
+
+    def obj(self, module: str) -> Any:
+        return torch_module(module)
+
+    def context_kwargs(self, module: str) -> dict:
+        return {"pytorch_module_types": list(TORCH_MODULES.values())}
+
+
+class Embedded(_RoundTrip):
+    """
+    Records split into embedded documents, either explicitly or with
+    `min_embedding_size`
+    """
+
+    params = ["explicit", "min_embedding_size"]
+    param_names = ["embedding"]
+
+    def obj(self, embedding: str) -> Any:
+        chunks = [records()[i : i + 1000] for i in range(0, 10_000, 1000)]
+        if embedding == "explicit":
+            return tb.EmbeddedDict(
+                {f"c{i}": tb.EmbeddedList(c) for i, c in enumerate(chunks)}
+            )
+        return {f"c{i}": c for i, c in enumerate(chunks)}
+
+    def context_kwargs(self, embedding: str) -> dict:
+        if embedding == "min_embedding_size":
+            return {"min_embedding_size": 10_000}
+        return {}
+
+
+class Compressed(_RoundTrip):
+    """
+    Compressed JSON document (`.json.gz`), and compressed artifacts with the
+    main artifact codecs. Codecs that are not installed are skipped.
+    """
+
+    params = [
+        [None, "zlib", "zstd", "shuffle+zstd", "lz4"],
+        [False, True],
+    ]
+    param_names = ["artifact_codec", "compress"]
+
+    def obj(self, artifact_codec: str | None, compress: bool) -> Any:
+        return {"arrays": few_large_arrays()[:1], "records": records()}
+
+    def context_kwargs(
+        self, artifact_codec: str | None, compress: bool
+    ) -> dict:
+        return {"artifact_codec": artifact_codec, "compress": compress}
+
+    def setup(self, artifact_codec: str | None, compress: bool) -> None:
+        codec = (artifact_codec or "").split("+")[-1]
+        if (codec == "lz4" and not HAS_LZ4) or (
+            codec == "zstd" and not HAS_ZSTD
+        ):
+            raise NotImplementedError(
+                f"artifact_codec={artifact_codec} is unavailable"
+            )
+        super().setup(artifact_codec, compress)
@@ -0,0 +1,285 @@
+"""
+Peak memory and allocation benchmarks: how much memory `to_json`,
+`from_json`, `save_json` and `load_json` need on top of the payload itself,
+for large numpy, pandas and pytorch payloads.
+
+For each operation, the following are tracked:
+
+* `peak_rss`: increase of the resident set size of the process during the
+  operation, in bytes. This accounts for every allocation, including those of
+  numpy, pandas and pytorch that Python doesn't see. Requires Linux, as it
+  resets the peak RSS through `/proc/self/clear_refs`;
+* `peak_traced`: peak memory allocated during the operation according to
+  `tracemalloc`, in bytes. numpy reports its buffers to `tracemalloc`, but
+  pytorch doesn't;
+* `allocations`: number of memory blocks allocated by the operation that are
+  still alive after it, according to `tracemalloc`;
+* `amplification`: `peak_rss` divided by the size of the payload. For
+  example, an encoding path that makes one full copy of the payload has an
+  amplification of at least 1. Decoding paths have an amplification of at
+  least 1, since they allocate the decoded payload.
+
+Amplification factors can be checked against `BUDGETS` without asv by running
+
+```sh
+python -m benchmarks.bench_memory
+```
+"""
+
+import ctypes
+import gc
+import sys
+import tracemalloc
+from functools import partial
+from itertools import product
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Any, Callable
+
+import numpy as np
+
+import turbo_broccoli as tb
+
+from .common import require_context_kwargs, rng
+
+PAYLOAD_SIZES = {"inline": 256 * 1024, "artifact": 32 * 1024 * 1024}
+"""
+Approximate size of the payloads, in bytes. Inline payloads are smaller since
+inlining is only meant for small objects, and is slow for DataFrames.
+"""
+
+
+BUDGETS: dict[
+    tuple[str | None, str | None, bool | None, str | None], float
+] = {
+    # Artifact compression doesn't apply to DataFrames
+    ("pandas", "artifact", None, "to_json"): 1.0,
+    ("pandas", "artifact", None, "save_json"): 1.0,
+    ("pandas", "artifact", None, "from_json"): 2.0,
+    ("pandas", "artifact", None, "load_json"): 2.0,
+    ("pandas", "inline", None, None): 100.0,
+    # Uncompressed numpy arrays and pytorch tensors are written directly from
+    # their buffer, and read directly into the decoded object's buffer
+    (None, "artifact", False, "to_json"): 0.1,
+    (None, "artifact", False, "save_json"): 0.1,
+    (None, "artifact", False, "from_json"): 1.1,
+    (None, "artifact", False, "load_json"): 1.1,
+    (None, "artifact", True, "to_json"): 2.5,
+    (None, "artifact", True, "save_json"): 2.5,
+    (None, "artifact", True, "from_json"): 3.5,
+    (None, "artifact", True, "load_json"): 3.5,
+    # Base64 and JSON encoding, plus some headroom as small payloads are noisy
+    (None, "inline", None, None): 10.0,
+}
+"""
+Maximum amplification factor of each path. Keys are `(payload, storage,
+compressed, operation)`, where `None` matches anything, and the first matching
+key applies. Lower a budget after eliminating a copy, so that it doesn't come
+back unnoticed.
+"""
+
+
+def _budget(*params: Any) -> float:
+    """Amplification budget of a `Memory` benchmark"""
+    for key, budget in BUDGETS.items():
+        if all(k is None or k == p for k, p in zip(key, params)):
+            return budget
+    return float("inf")
+
+
+def _payload(kind: str, size: int) -> Any:
+    """Payload of about `size` bytes"""
+    n = size // 4
+    # Rounded values, so that compression actually does something
+    x = rng().random(n, dtype=np.float32).round(2)
+    if kind == "numpy":
+        return x
+    if kind == "pandas":
+        import pandas as pd
+
+        return pd.DataFrame(x.reshape(-1, 4), columns=list("abcd"))
+    import torch
+
+    return torch.from_numpy(x)
+
+
+def _payload_size(x: Any) -> int:
+    """Size of the payload, in bytes"""
+    if isinstance(x, np.ndarray):
+        return x.nbytes
+    if hasattr(x, "memory_usage"):  # DataFrame
+        return int(x.memory_usage(deep=True).sum())
+    return x.element_size() * x.nelement()  # Tensor
+
+
+def _status(key: str) -> int:
+    """Reads a memory entry (e.g. `VmRSS`) of `/proc/self/status`, in bytes"""
+    with open("/proc/self/status", "r", encoding="utf-8") as fp:
+        for line in fp:
+            if line.startswith(key + ":"):
+                return int(line.split()[1]) * 1024
+    raise KeyError(key)
+
+
+def _peak_rss(f: Callable[[], Any]) -> int:
+    """
+    Increase of the process' resident set size while `f` runs, in bytes
+    """
+    gc.collect()
+    try:  # Give memory freed by previous runs back to the OS (glibc only)
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (AttributeError, OSError):
+        pass
+    with open("/proc/self/clear_refs", "w", encoding="utf-8") as fp:
+        fp.write("5")  # Resets VmHWM to the current RSS
+    before = _status("VmRSS")
+    _ = f()  # Keep the result alive until the peak is read
+    return _status("VmHWM") - before
+
+
+def _traced(f: Callable[[], Any]) -> tuple[int, int]:
+    """
+    Peak memory allocated while `f` runs, and number of blocks allocated by
+    `f` that are still alive after it, according to `tracemalloc`
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        _ = f()  # Keep the result alive for the second snapshot
+        peak = tracemalloc.get_traced_memory()[1]
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    diff = after.compare_to(before, "filename")
+    return peak, sum(max(s.count_diff, 0) for s in diff)
+
+
+class Memory:
+    """
+    Memory usage of each operation on each payload, stored inline (base64 in
+    the JSON document) or in an artifact, with or without compression.
+    Compression means `compress=True` (for `save_json`) and
+    `artifact_codec="zlib"` (for artifacts). DataFrame artifacts are written
+    in parquet.
+    """
+
+    params = [
+        ["numpy", "pandas", "torch"],
+        ["inline", "artifact"],
+        [False, True],
+        ["to_json", "from_json", "save_json", "load_json"],
+    ]
+    param_names = ["payload", "storage", "compressed", "operation"]
+    timeout = 600.0
+
+    _tmp: TemporaryDirectory
+    _f: Callable[[], Any]
+    size: int
+
+    def setup(
+        self, payload: str, storage: str, compressed: bool, operation: str
+    ) -> None:
+        """
+        Builds the payload and, for decoding operations, serializes it
+        beforehand. Then, runs the operation once so that one-time costs
+        (e.g. lazy imports) are not measured
+        """
+        if not Path("/proc/self/clear_refs").exists():
+            raise NotImplementedError("Peak RSS can only be reset on Linux")
+        string_op = operation in ("to_json", "from_json")
+        if compressed and storage == "inline" and string_op:
+            raise NotImplementedError(
+                "Inline payloads in strings are never compressed"
+            )
+        try:
+            x = _payload(payload, PAYLOAD_SIZES[storage])
+        except ImportError as e:
+            raise NotImplementedError(f"{payload} is not installed") from e
+        self.size = _payload_size(x)
+        kwargs: dict[str, Any] = {
+            "min_artifact_size": 0,
+            "pandas_format": "parquet",
+        }
+        if storage == "inline":
+            kwargs.update(
+                min_artifact_size=2 * self.size,
+                large_artifact_size=2 * self.size,
+            )
+        if compressed:
+            kwargs.update(artifact_codec="zlib", artifact_codec_level=1)
+        require_context_kwargs(**kwargs)
+        self._tmp = TemporaryDirectory(prefix="tb-bench-")
+        root = Path(self._tmp.name)
+        ctx = tb.Context(artifact_path=root / "str", **kwargs)
+        path = root / "file" / ("doc.json.gz" if compressed else "doc.json")
+        path.parent.mkdir()
+        if operation == "to_json":
+            self._f = partial(tb.to_json, x, ctx)
+        elif operation == "from_json":
+            self._f = partial(tb.from_json, tb.to_json(x, ctx), ctx)
+        elif operation == "save_json":
+            self._f = partial(tb.save_json, x, path, **kwargs)
+        else:
+            tb.save_json(x, path, **kwargs)
+            self._f = partial(tb.load_json, path, **kwargs)
+        self._f()  # Warm up, e.g. import the custom modules that are needed
+
+    def teardown(self, *params: Any) -> None:
+        """Removes all artifacts"""
+        self._tmp.cleanup()
+
+    def track_peak_rss(self, *params: Any) -> int:
+        """Increase of the resident set size during the operation"""
+        return _peak_rss(self._f)
+
+    track_peak_rss.unit = "bytes"  # type: ignore[attr-defined]
+
+    def track_peak_traced(self, *params: Any) -> int:
+        """Peak memory allocated during the operation, as traced"""
+        return _traced(self._f)[0]
+
+    track_peak_traced.unit = "bytes"  # type: ignore[attr-defined]
+
+    def track_allocations(self, *params: Any) -> int:
+        """Number of allocated blocks still alive after the operation"""
+        return _traced(self._f)[1]
+
+    track_allocations.unit = "blocks"  # type: ignore[attr-defined]
+
+    def track_amplification(self, *params: Any) -> float:
+        """Peak RSS increase divided by the payload size"""
+        return _peak_rss(self._f) / self.size
+
+    track_amplification.unit = "ratio"  # type: ignore[attr-defined]
+
+
+def main() -> int:
+    """
+    Runs all `Memory` benchmarks without asv, prints their amplification
+    factor, and returns 1 if any of them exceeds its budget (see `BUDGETS`),
+    0 otherwise
+    """
+    over = 0
+    for params in product(*Memory.params):
+        benchmark = Memory()
+        try:
+            benchmark.setup(*params)
+        except NotImplementedError:
+            continue
+        try:
+            a, budget = benchmark.track_amplification(), _budget(*params)
+        finally:
+            benchmark.teardown()
+        over += a > budget
+        print(
+            " ".join(f"{str(p):<9}" for p in params),
+            f"{a:7.2f} / {budget:.2f}",
+            "OVER BUDGET" if a > budget else "",
+            flush=True,
+        )
+    return int(over > 0)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,242 @@
+"""Workloads and base benchmark class shared by the benchmark modules"""
+
+from functools import lru_cache
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Any
+
+import numpy as np
+
+import turbo_broccoli as tb
+
+SEED = 0
+"""All workloads are generated from this seed, so that they are identical
+across commits"""
+
+
+def rng() -> np.random.Generator:
+    """Seeded random generator"""
+    return np.random.default_rng(SEED)
+
+
+@lru_cache
+def wide_dict(n: int = 100_000) -> dict:
+    """Flat dict of `n` primitive values of various types"""
+    r = rng()
+    return {
+        f"k{i}": [int(i), float(r.random()), f"s{i}", i % 2 == 0, None][i % 5]
+        for i in range(n)
+    }
+
+
+@lru_cache
+def deep_dict(depth: int = 100, width: int = 10) -> dict:
+    """Dict nested `depth` levels deep, with `width` primitives per level"""
+    dct: dict = {}
+    for d in range(depth):
+        dct = {"child": dct, **{f"k{i}": d * width + i for i in range(width)}}
+    return dct
+
+
+@lru_cache
+def records(n: int = 10_000) -> list[dict]:
+    """List of `n` small, identically shaped dicts"""
+    r = rng()
+    return [
+        {"id": i, "name": f"item{i}", "value": float(r.random()), "ok": True}
+        for i in range(n)
+    ]
+
+
+@lru_cache
+def many_small_arrays(n: int = 2_000, size: int = 16) -> list[np.ndarray]:
+    """`n` small float64 arrays, all serialized inline"""
+    r = rng()
+    return [r.random(size) for _ in range(n)]
+
+
+@lru_cache
+def few_large_arrays(n: int = 4, size: int = 4_000_000) -> list[np.ndarray]:
+    """`n` large float32 arrays (16MB each), all written to artifacts"""
+    r = rng()
+    return [r.random(size, dtype=np.float32) for _ in range(n)]
+
+
+@lru_cache
+def dataframe(n: int = 100_000) -> Any:
+    """DataFrame with numeric, string and categorical columns"""
+    import pandas as pd
+
+    r = rng()
+    return pd.DataFrame(
+        {
+            "a": r.integers(0, 1000, n),
+            "b": r.random(n),
+            "c": [f"s{i % 1000}" for i in range(n)],
+            "d": pd.Categorical(r.choice(["a", "b", "c"], n)),
+        }
+    )
+
+
+def sklearn_estimator(name: str) -> Any:
+    """Fitted scikit-learn estimator"""
+    from sklearn.cluster import KMeans
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.linear_model import LogisticRegression
+
+    r = rng()
+    x, y = r.random((1_000, 20)), r.integers(0, 2, 1_000)
+    estimators = {
+        "kmeans": KMeans(n_clusters=8, n_init=1, random_state=SEED),
+        "logistic_regression": LogisticRegression(),
+        "random_forest": RandomForestClassifier(
+            n_estimators=20, random_state=SEED
+        ),
+    }
+    return estimators[name].fit(x, y)
+
+
+def torch_module(name: str) -> Any:
+    """Pytorch module with deterministic weights"""
+    import torch
+
+    torch.manual_seed(SEED)
+    return TORCH_MODULES[name]()
+
+
+try:
+    from torch import nn
+
+    class MLP(nn.Module):
+        """Small multi-layer perceptron (~1M parameters)"""
+
+        def __init__(self) -> None:
+            super().__init__()
+            self.model = nn.Sequential(
+                nn.Linear(784, 1024),
+                nn.ReLU(),
+                nn.Linear(1024, 256),
+                nn.ReLU(),
+                nn.Linear(256, 10),
+            )
+
+        def forward(self, x):  # pylint: disable=missing-function-docstring
+            return self.model(x)
+
+    class CNN(nn.Module):
+        """Small convolutional network with many (small) parameters"""
+
+        def __init__(self) -> None:
+            super().__init__()
+            self.model = nn.Sequential(
+                *[
+                    nn.Sequential(nn.Conv2d(32, 32, 3), nn.BatchNorm2d(32))
+                    for _ in range(20)
+                ]
+            )
+
+        def forward(self, x):  # pylint: disable=missing-function-docstring
+            return self.model(x)
+
+    TORCH_MODULES: dict[str, type] = {"mlp": MLP, "cnn": CNN}
+    """Benchmarked pytorch module types, by name"""
+
+except ImportError:
+    TORCH_MODULES = {}
+
+
+def require_context_kwargs(**kwargs: Any) -> None:
+    """
+    Raises a `NotImplementedError`, which makes asv skip the benchmark, if
+    `turbo_broccoli.Context` doesn't accept these arguments, e.g. when
+    benchmarking a commit that predates them
+    """
+    try:
+        tb.Context(**kwargs)
+    except TypeError as e:
+        raise NotImplementedError(
+            f"Context doesn't support {', '.join(sorted(kwargs))}"
+        ) from e
+
+
+def size(path: Path) -> int:
+    """Total size of the files in a directory, recursively"""
+    return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+
+
+class _RoundTrip:
+    """
+    Base class of the encode/decode benchmarks. Subclasses set `params` (and
+    `param_names`) and implement `obj` and, if needed, `context_kwargs`.
+
+    Each benchmark method serializes or deserializes `obj(*params)` once.
+    Since the workloads are deterministic, the `track_*` sizes can be divided
+    by the `time_*` timings to get throughputs.
+    """
+
+    number = 1
+    repeat = (3, 10, 60.0)
+    timeout = 600.0
+
+    _tmp: TemporaryDirectory
+    ctx: tb.Context
+    doc: str
+    file: Path
+    x: Any
+
+    def obj(self, *params: Any) -> Any:
+        """Object to (de)serialize"""
+        raise NotImplementedError
+
+    def context_kwargs(self, *params: Any) -> dict:
+        """Additional arguments to `turbo_broccoli.Context`"""
+        return {}
+
+    def setup(self, *params: Any) -> None:
+        """
+        Builds the workload, and pre-serializes it so that the decoding
+        benchmarks only measure decoding
+        """
+        kwargs = self.context_kwargs(*params)
+        require_context_kwargs(**kwargs)
+        self.x = self.obj(*params)
+        self._tmp = TemporaryDirectory(prefix="tb-bench-")
+        root = Path(self._tmp.name)
+        self.ctx = tb.Context(artifact_path=root / "str", **kwargs)
+        name = "doc.json.gz" if kwargs.get("compress") else "doc.json"
+        self.file = root / "file" / name
+        self.file.parent.mkdir()
+        self.doc = tb.to_json(self.x, self.ctx)
+        tb.save_json(self.x, self.file, **kwargs)
+
+    def teardown(self, *params: Any) -> None:
+        """Removes all artifacts"""
+        self._tmp.cleanup()
+
+    def time_to_json(self, *params: Any) -> None:
+        """Encoding to a string"""
+        tb.to_json(self.x, self.ctx)
+
+    def time_from_json(self, *params: Any) -> None:
+        """Decoding from a string"""
+        tb.from_json(self.doc, self.ctx)
+
+    def time_save_json(self, *params: Any) -> None:
+        """Encoding to a file"""
+        tb.save_json(self.x, self.file, **self.context_kwargs(*params))
+
+    def time_load_json(self, *params: Any) -> None:
+        """Decoding from a file"""
+        tb.load_json(self.file, **self.context_kwargs(*params))
+
+    def track_document_size(self, *params: Any) -> int:
+        """Size of the JSON document, in bytes"""
+        return len(self.doc.encode("utf-8"))
+
+    track_document_size.unit = "bytes"  # type: ignore[attr-defined]
+
+    def track_file_size(self, *params: Any) -> int:
+        """Size of the JSON file and of all its artifacts, in bytes"""
+        return size(self.file.parent)
+
+    track_file_size.unit = "bytes"  # type: ignore[attr-defined]
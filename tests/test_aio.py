@@ -0,0 +1,167 @@
+"""Asynchronous API test suite"""
+
+import asyncio
+import json
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pytest
+from numpy.testing import assert_array_equal
+
+from turbo_broccoli import (
+    Context,
+    EmbeddedDict,
+    GuardedBlockHandler,
+    Parallel,
+    aload_json,
+    asave_json,
+    delayed,
+    load_json,
+    provenance,
+    save_json,
+)
+from turbo_broccoli.exceptions import DeserializationError
+from turbo_broccoli.storage import (
+    LocalStorage,
+    MemoryStorage,
+    RecordingStorage,
+)
+
+TEST_PATH = Path("out") / "test"
+
+
+class _SlowStorage(LocalStorage):
+    """Blocks writes until `event` is set"""
+
+    event: threading.Event
+
+    def __init__(self) -> None:
+        self.event = threading.Event()
+
+    def write(self, path: Path, data: bytes) -> None:
+        self.event.wait(10)
+        super().write(path, data)
+
+
+def test_aio_save_load():
+    path = TEST_PATH / "test_aio_save_load.json"
+    x = {
+        "a": [np.random.rand(100, 100) for _ in range(20)],
+        "b": EmbeddedDict({"c": np.random.rand(100, 100)}),
+    }
+    asyncio.run(asave_json(x, path, max_workers=4))
+    y = asyncio.run(aload_json(path, max_workers=4))
+    for u, v in zip(x["a"], y["a"]):
+        assert_array_equal(u, v)
+    assert_array_equal(x["b"]["c"], y["b"]["c"])
+    assert_array_equal(x["b"]["c"], load_json(path)["b"]["c"])
+
+
+def test_aio_memory_storage():
+    ctx = Context(
+        file_path=TEST_PATH / "test_aio_memory_storage.json",
+        artifact_path="/tb",
+        storage=MemoryStorage(),
+    )
+    x = [np.random.rand(100, 100) for _ in range(10)]
+    asyncio.run(asave_json(x, ctx=ctx))
+    assert len(ctx.storage.data) == 10  # type: ignore
+    for u, v in zip(x, asyncio.run(aload_json(ctx=ctx))):
+        assert_array_equal(u, v)
+
+
+def test_aio_cancel():
+    path = TEST_PATH / "test_aio_cancel.json"
+    path.write_text(json.dumps({"a": 1}))
+    storage = _SlowStorage()
+    x = [np.random.rand(100, 100) for _ in range(20)]
+
+    async def _main():
+        task = asyncio.create_task(
+            asave_json(x, path, storage=storage, max_workers=1)
+        )
+        await asyncio.sleep(0.1)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        storage.event.set()
+
+    asyncio.run(_main())
+    assert load_json(path) == {"a": 1}
+
+
+def test_aio_guard():
+    path = TEST_PATH / "test_aio_guard.json"
+    path.unlink(missing_ok=True)
+
+    async def _main():
+        h = GuardedBlockHandler(path)
+        async for _ in h:
+            h.result = 42
+        async for _ in h:  # Block should be skipped
+            assert False
+        assert h.result == 42
+        path.unlink()
+        async for i, x in h.aguard(["a", "b"], result_type="list"):
+            h.result.append([i, x])
+        async for i, x in h.aguard(["a", "b", "c"], result_type="list"):
+            assert x == "c"
+            h.result.append([i, x])
+        return h.result
+
+    expected = [[0, "a"], [1, "b"], [2, "c"]]
+    assert asyncio.run(_main()) == expected
+    assert load_json(path) == expected
+
+
+def test_aio_parallel():
+    path = TEST_PATH / "test_aio_parallel.json"
+    path.unlink(missing_ok=True)
+    f = lambda x: x + x
+    lst = [str(i) for i in range(10)]
+    executor = Parallel(path, n_jobs=1, only_one_arg=True)
+    jobs = [delayed(f)(x) for x in lst[:5]]
+    results = asyncio.run(executor.acall(jobs))
+    jobs = [delayed(f)(x) for x in lst]
+    results = asyncio.run(executor.acall(jobs))
+    assert results == {x: f(x) for x in lst}
+    assert results == load_json(path)
+
+
+@dataclass
+class _Point:
+    x: int
+    y: np.ndarray
+
+
+def test_aio_load_options():
+    path = TEST_PATH / "test_aio_load_options.json"
+    asyncio.run(asave_json([_Point(1, np.zeros(10000))], path))
+    y = asyncio.run(aload_json(path, schema=list[_Point]))
+    assert isinstance(y[0], _Point) and y[0].x == 1
+    with pytest.raises(DeserializationError):
+        asyncio.run(aload_json(path, schema=list[int]))
+    a = asyncio.run(
+        aload_json(path, document_cache="view", schema=list[_Point])
+    )
+    assert (
+        asyncio.run(
+            aload_json(path, document_cache="view", schema=list[_Point])
+        )
+        is a
+    )
+
+
+def test_aio_reuse_artifacts():
+    src = TEST_PATH / "test_aio_reuse_artifacts" / "src.json"
+    dst = TEST_PATH / "test_aio_reuse_artifacts" / "dst.json"
+    kw = {"artifact_path": src.parent}
+    save_json({"a": np.random.rand(100, 100)}, src, **kw)
+    ctx = Context(src, reuse_artifacts=True, **kw)
+    assert isinstance(ctx.storage, RecordingStorage)
+    y = asyncio.run(aload_json(ctx=ctx))
+    assert provenance.REGISTRY.get(id(y["a"])) is not None
+    asyncio.run(asave_json(y, dst, **kw))
+    assert json.loads(dst.read_text()) == json.loads(src.read_text())
@@ -0,0 +1,70 @@
+"""append_json test suite"""
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+from numpy.testing import assert_array_equal
+
+from turbo_broccoli import (
+    append_json,
+    compact_json,
+    load_json,
+    save_json,
+    update_json,
+)
+
+
+def _journal(path: Path) -> Path:
+    return path.with_name(path.name + ".log")
+
+
+def test_append_json_dict():
+    path = Path("out/test/test_append_json_dict.json")
+    save_json({"a": 1, "b": 2}, path)
+    append_json(path, "b", 3)
+    append_json(path, "c", np.arange(10))
+    append_json(path, "b", 4)
+    assert _journal(path).is_file()
+    y = load_json(path)
+    assert y["a"] == 1 and y["b"] == 4
+    assert_array_equal(y["c"], np.arange(10))
+    compact_json(path)
+    assert not _journal(path).exists()
+    assert load_json(path)["b"] == 4
+
+
+def test_append_json_list():
+    path = Path("out/test/test_append_json_list.json")
+    path.unlink(missing_ok=True)
+    _journal(path).unlink(missing_ok=True)
+    for i in range(5):
+        append_json(path, None, i)
+    assert not path.exists()
+    assert load_json(path) == [0, 1, 2, 3, 4]
+    with pytest.raises(ValueError):
+        append_json(path, "a", 5)
+        load_json(path)
+
+
+def test_append_json_truncated_record():
+    path = Path("out/test/test_append_json_truncated_record.json")
+    save_json({}, path)
+    append_json(path, "a", 1)
+    with _journal(path).open("a", encoding="utf-8") as fp:
+        fp.write('{"key": "b", "val')
+    assert load_json(path) == {"a": 1}
+
+
+def test_append_json_compaction():
+    path = Path("out/test/test_append_json_compaction.json")
+    save_json({}, path)
+    for i in range(10):
+        append_json(path, str(i), i, max_journal_size=50)
+        journal = _journal(path)
+        assert not journal.exists() or journal.stat().st_size <= 50
+    assert load_json(path) == {str(i): i for i in range(10)}
+    append_json(path, "x", 0)
+    update_json(path, "$.y", 1)  # Also compacts
+    assert not _journal(path).exists()
+    assert load_json(path)["x"] == 0
@@ -0,0 +1,62 @@
+"""Large artifact I/O test suite"""
+
+import json
+
+import numpy as np
+import pytest
+import torch
+from numpy.testing import assert_array_equal
+from safetensors.numpy import load as st_load
+
+from turbo_broccoli import Context, artifact_io, from_json, to_json
+from turbo_broccoli.exceptions import DeserializationError
+from turbo_broccoli.storage import MemoryStorage
+
+
+@pytest.mark.parametrize(
+    "dtype", ["bool", "float16", "float32", "float64", "int8", "uint64"]
+)
+def test_artifact_io_numpy(dtype: str):
+    x = (np.random.rand(100, 100) * 100).astype(dtype)
+    ctx = Context(large_artifact_size=0)
+    doc = json.loads(to_json(x, ctx))
+    assert doc["__version__"] == 6
+    path = ctx.id_to_artifact_path(doc["id"])
+    assert_array_equal(x, st_load(path.read_bytes())["data"])
+    y = from_json(json.dumps(doc), ctx)
+    assert y.dtype == x.dtype and y.flags.writeable
+    assert_array_equal(x, y)
+
+
+def test_artifact_io_numpy_chunks(monkeypatch):
+    monkeypatch.setattr(artifact_io, "CHUNK_SIZE", 1000)
+    x = np.random.rand(100, 100).T  # Not C-contiguous
+    ctx = Context(large_artifact_size=0)
+    assert_array_equal(x, from_json(to_json(x, ctx), ctx))
+
+
+def test_artifact_io_numpy_small():
+    x = np.random.rand(100, 100)
+    ctx = Context(large_artifact_size=x.nbytes + 1)
+    doc = json.loads(to_json(x, ctx))
+    assert doc["__version__"] == 5
+    assert_array_equal(x, from_json(json.dumps(doc), ctx))
+
+
+@pytest.mark.parametrize("dtype", [torch.bfloat16, torch.float32, torch.bool])
+def test_artifact_io_pytorch(dtype: torch.dtype):
+    x = torch.rand(100, 100).to(dtype)
+    ctx = Context(large_artifact_size=0, storage=MemoryStorage())
+    doc = json.loads(to_json(x, ctx))
+    assert doc["__version__"] == 4
+    assert torch.equal(x, from_json(json.dumps(doc), ctx))
+
+
+def test_artifact_io_truncated():
+    storage = MemoryStorage()
+    ctx = Context(large_artifact_size=0, storage=storage)
+    doc = to_json(np.random.rand(100, 100), ctx)
+    for k, v in storage.data.items():
+        storage.data[k] = v[:-8]
+    with pytest.raises(DeserializationError):
+        from_json(doc, ctx)
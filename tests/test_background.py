@@ -0,0 +1,59 @@
+"""Background writer test suite"""
+
+import threading
+from pathlib import Path
+
+import numpy as np
+import pytest
+import torch
+from numpy.testing import assert_array_equal
+
+from turbo_broccoli import BackgroundWriter, load_json
+
+
+def test_background_writer():
+    path = Path("out/test/test_background_writer.json")
+    x = {"a": np.zeros((100, 100)), "b": torch.zeros(10), "c": [1, (2, 3)]}
+    with BackgroundWriter(path) as writer:
+        writer.submit(x)
+        x["a"][0, 0], x["b"][0] = 1, 1  # Does not affect the snapshot
+        x["c"].append(4)
+    y = load_json(path)
+    assert_array_equal(y["a"], np.zeros((100, 100)))
+    assert torch.equal(y["b"], torch.zeros(10))
+    assert y["c"] == [1, (2, 3)]
+    assert writer.written == 1
+
+
+def test_background_writer_coalescing(monkeypatch):
+    path = Path("out/test/test_background_writer_coalescing.json")
+    started, release = threading.Event(), threading.Event()
+    writer = BackgroundWriter(path)
+    write = writer.context.storage.write
+
+    def _slow_write(*args, **kwargs):
+        started.set()
+        release.wait()
+        write(*args, **kwargs)
+
+    monkeypatch.setattr(writer.context.storage, "write", _slow_write)
+    writer.submit({"i": 0, "x": np.random.rand(100, 100)})
+    started.wait()  # Snapshot 0 is being written
+    for i in range(1, 5):
+        writer.submit({"i": i, "x": np.random.rand(100, 100)})
+    release.set()
+    writer.close()
+    assert (writer.written, writer.dropped) == (2, 3)
+    assert load_json(path)["i"] == 4
+
+
+def test_background_writer_error():
+    path = Path("out/test/test_background_writer_error.json")
+    with BackgroundWriter(path) as writer:
+        writer.submit({"x": lambda: 0})
+        with pytest.raises(TypeError):
+            writer.flush()
+        writer.submit({"x": 1})
+    assert load_json(path) == {"x": 1}
+    with pytest.raises(ValueError):
+        writer.submit({"x": 2})
@@ -0,0 +1,76 @@
+"""ChunkedList test suite"""
+
+import json
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pytest
+from numpy.testing import assert_array_equal
+
+from turbo_broccoli import ChunkedList, Context, load_json, save_json
+from turbo_broccoli.storage import MemoryStorage, RecordingStorage
+
+
+def test_chunked_list():
+    x = ChunkedList(range(25), chunk_size=10)
+    assert len(x) == 25 and x[3] == 3 and x[-1] == 24
+    assert x[5:15] == list(range(5, 15))
+    assert x[::7] == [0, 7, 14, 21]
+    assert x == list(range(25))
+    with pytest.raises(IndexError):
+        _ = x[25]
+
+
+def test_chunked_list_lazy():
+    storage = RecordingStorage(MemoryStorage())
+    kw = {"artifact_path": "/tb", "storage": storage}
+    path = Path("out/test/test_chunked_list_lazy.json")
+    x = {"a": ChunkedList([np.full(3, i) for i in range(100)], chunk_size=10)}
+    save_json(x, path, **kw)
+    assert len(json.loads(path.read_text())["a"]["chunks"]) == 10
+    y = load_json(path, **kw)["a"]
+    assert isinstance(y, ChunkedList) and len(y) == 100
+    assert not storage.reads
+    assert_array_equal(y[42], np.full(3, 42))
+    assert y[55:57][1][0] == 56
+    assert len(storage.reads) == 2
+    for i, v in enumerate(y):
+        assert_array_equal(v, np.full(3, i))
+
+
+def test_chunked_list_append():
+    storage = MemoryStorage()
+    ctx = Context(
+        "out/test/test_chunked_list_append.json",
+        artifact_path="/tb",
+        storage=storage,
+    )
+    x = ChunkedList(range(25), chunk_size=10)
+    save_json(x, ctx=ctx)
+    n = len(storage.data)
+    x.append(25)  # Only the last chunk is rewritten
+    save_json(x, ctx=ctx)
+    assert len(storage.data) == n + 1
+    y = load_json(ctx=ctx)
+    y[0] = -1
+    y.extend(range(26, 40))
+    save_json(y, ctx=ctx)
+    assert load_json(ctx=ctx) == [-1, *range(1, 40)]
+
+
+def test_chunked_list_save_elsewhere():
+    src = Path("out/test/test_chunked_list_save_elsewhere/src")
+    dst = Path("out/test/test_chunked_list_save_elsewhere/dst")
+    shutil.rmtree(src.parent, ignore_errors=True)
+    # Elements large enough to be written to their own artefacts
+    x = ChunkedList([np.full(2000, i) for i in range(25)], chunk_size=10)
+    save_json(x, src / "doc.json", artifact_path=src)
+    y = load_json(src / "doc.json", artifact_path=src)
+    y[0] = np.full(2000, -1)
+    save_json(y, dst / "doc2.json", artifact_path=dst)
+    shutil.rmtree(src)
+    z = load_json(dst / "doc2.json", artifact_path=dst)
+    assert_array_equal(z[0], np.full(2000, -1))
+    for i in range(1, 25):
+        assert_array_equal(z[i], np.full(2000, i))
@@ -0,0 +1,92 @@
+"""Artifact compression test suite"""
+
+import json
+
+import numpy as np
+import pytest
+import torch
+from numpy.testing import assert_array_equal
+from sklearn.neighbors import KDTree
+
+from turbo_broccoli import Context, EmbeddedDict, from_json, to_json
+from turbo_broccoli.compression import HAS_LZ4, HAS_ZSTD
+
+CODECS = ["bz2", "lzma", "zlib", "shuffle+zlib"]
+if HAS_LZ4:
+    CODECS.append("lz4")
+if HAS_ZSTD:
+    CODECS += ["zstd", "shuffle+zstd"]
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_compression_bytes(codec: str):
+    x = b"Hello " * 10000
+    ctx = Context(min_artifact_size=0, artifact_codec=codec)
+    doc = json.loads(to_json(x, ctx))
+    assert doc["codec"] == codec.split("+")[-1]
+    assert "shuffle" not in doc
+    path = ctx.id_to_artifact_path(doc["id"])
+    assert path.stat().st_size < len(x)
+    assert x == from_json(json.dumps(doc), ctx)
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_compression_numpy(codec: str):
+    x = np.arange(10000, dtype="float32")
+    ctx = Context(artifact_codec=codec)
+    doc = json.loads(to_json(x, ctx))
+    if codec.startswith("shuffle+"):
+        assert doc["data"]["shuffle"] == 4
+    assert_array_equal(x, from_json(json.dumps(doc), ctx))
+
+
+def test_compression_pytorch():
+    x = torch.arange(10000, dtype=torch.float64)
+    ctx = Context(artifact_codec="shuffle+zlib")
+    doc = json.loads(to_json(x, ctx))
+    assert doc["data"]["shuffle"] == 8
+    assert torch.equal(x, from_json(json.dumps(doc), ctx))
+
+
+def test_compression_random_state():
+    x = np.random.RandomState(seed=42)
+    ctx = Context(artifact_codec="zlib", min_compression_size=0)
+    doc = json.loads(to_json(x, ctx))
+    assert doc["codec"] == "zlib"
+    y = from_json(json.dumps(doc), ctx)
+    assert_array_equal(x.get_state()[1], y.get_state()[1])
+
+
+def test_compression_sklearn():
+    x = KDTree(np.random.rand(100, 2))
+    ctx = Context(artifact_codec="zlib", min_compression_size=0)
+    doc = json.loads(to_json(x, ctx))
+    assert doc["codec"] == "zlib"
+    y = from_json(json.dumps(doc), ctx)
+    assert_array_equal(x.get_arrays()[0], y.get_arrays()[0])
+
+
+def test_compression_embedded():
+    x = EmbeddedDict({"a": "abc" * 1000})
+    ctx = Context(artifact_codec="zlib")
+    doc = json.loads(to_json(x, ctx))
+    assert doc["codec"] == "zlib"
+    assert x == from_json(json.dumps(doc), ctx)
+
+
+def test_compression_threshold():
+    x = b"Hello " * 10000
+    ctx = Context(
+        min_artifact_size=0,
+        artifact_codec="zlib",
+        min_compression_size=len(x) + 1,
+    )
+    doc = json.loads(to_json(x, ctx))
+    assert "codec" not in doc
+    assert x == from_json(json.dumps(doc), ctx)
+
+
+def test_compression_unknown_codec():
+    ctx = Context(min_artifact_size=0, artifact_codec="foo")
+    with pytest.raises(ValueError):
+        to_json(b"Hello " * 10000, ctx)
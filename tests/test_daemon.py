@@ -0,0 +1,77 @@
+"""Daemon test suite"""
+
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import common  # Must be before turbo_broccoli imports
+import numpy as np
+import pytest
+
+import turbo_broccoli as tb
+from turbo_broccoli.daemon import DaemonError, fetch
+from turbo_broccoli.storage import MemoryStorage
+
+TEST_PATH = Path("out") / "test"
+
+
+@pytest.fixture
+def daemon_socket():
+    path = TEST_PATH / "daemon.sock"
+    path.unlink(missing_ok=True)
+    process = subprocess.Popen(
+        [sys.executable, "-m", "turbo_broccoli", "serve", "--socket", path]
+    )
+    try:
+        for _ in range(600):
+            if path.exists():
+                break
+            time.sleep(0.1)
+        yield path
+    finally:
+        process.terminate()
+        process.wait(30)
+    assert not path.exists()
+
+
+def test_daemon(daemon_socket: Path):
+    path = TEST_PATH / "test_daemon.json"
+    x = {"a": np.random.random((100, 100)), "b": "hello"}
+    tb.save_json(x, path)
+    for _ in range(2):
+        y = tb.load_json(path, daemon_socket=daemon_socket)
+        np.testing.assert_array_equal(x["a"], y["a"])
+        assert y["b"] == x["b"]
+        assert not y["a"].flags.writeable  # i.e. from shared memory
+    # The file changed, so the daemon decodes it again
+    x["b"] = "world"
+    tb.save_json(x, path)
+    y = tb.load_json(path, daemon_socket=daemon_socket)
+    assert y["b"] == "world"
+
+
+def test_daemon_fallback(daemon_socket: Path):
+    path = TEST_PATH / "test_daemon_fallback.json"
+    x = {"a": np.random.random((100, 100))}
+    tb.save_json(x, path)
+    # No daemon listening there
+    y = tb.load_json(path, daemon_socket=TEST_PATH / "nothing.sock")
+    np.testing.assert_array_equal(x["a"], y["a"])
+    assert y["a"].flags.writeable
+    # The daemon can't decode this document
+    with pytest.raises(FileNotFoundError):
+        tb.load_json(TEST_PATH / "nothing.json", daemon_socket=daemon_socket)
+
+
+def test_daemon_non_local_storage(daemon_socket: Path):
+    path = TEST_PATH / "test_daemon_non_local_storage.json"
+    storage = MemoryStorage()
+    x = {"a": np.random.random((100, 100))}
+    tb.save_json(x, path, storage=storage)
+    ctx = tb.Context(path, storage=storage, daemon_socket=daemon_socket)
+    with pytest.raises(DaemonError):
+        fetch(ctx)
+    y = tb.load_json(ctx=ctx)
+    np.testing.assert_array_equal(x["a"], y["a"])
+    assert y["a"].flags.writeable  # i.e. not from the daemon
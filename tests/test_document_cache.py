@@ -0,0 +1,106 @@
+"""Document cache test suite"""
+
+from dataclasses import make_dataclass
+from pathlib import Path
+
+import numpy as np
+import pytest
+from numpy.testing import assert_array_equal
+
+from turbo_broccoli import (
+    ChunkedList,
+    LockedSecret,
+    SecretStr,
+    append_json,
+    document_cache,
+    load_json,
+    save_json,
+)
+from turbo_broccoli.storage import MemoryStorage
+
+
+def test_document_cache_copy():
+    path = Path("out/test/test_document_cache_copy.json")
+    save_json({"a": np.zeros(10)}, path)
+    x = load_json(path, document_cache="copy")
+    x["a"][0] = 1
+    y = load_json(path, document_cache="copy")
+    assert y is not x
+    assert_array_equal(y["a"], np.zeros(10))
+
+
+def test_document_cache_view():
+    path = Path("out/test/test_document_cache_view.json")
+    save_json({"a": np.zeros(10)}, path)
+    x = load_json(path, document_cache="view")
+    assert load_json(path, document_cache="view") is x
+    with pytest.raises(ValueError):
+        x["a"][0] = 1
+    assert load_json(path) is not x
+
+
+def test_document_cache_invalidation():
+    path = Path("out/test/test_document_cache_invalidation.json")
+    save_json({"a": 1}, path)
+    x = load_json(path, document_cache="view")
+    save_json({"a": 2}, path)
+    y = load_json(path, document_cache="view")
+    assert y is not x and y == {"a": 2}
+    append_json(path, "b", 3)
+    assert load_json(path, document_cache="view") == {"a": 2, "b": 3}
+
+
+def test_document_cache_budget(monkeypatch):
+    monkeypatch.setattr(document_cache, "MAX_SIZE", 100_000)
+    document_cache.clear()
+    paths = [
+        Path(f"out/test/test_document_cache_budget_{i}.json") for i in range(3)
+    ]
+    for p in paths:
+        save_json(np.zeros(5000), p)  # 40kB each
+    xs = [load_json(p, document_cache="view") for p in paths]
+    assert load_json(paths[0], document_cache="view") is not xs[0]
+    assert load_json(paths[2], document_cache="view") is xs[2]
+
+
+def test_document_cache_types():
+    path = Path("out/test/test_document_cache_types.json")
+    A = make_dataclass("Point", [("x", int)])
+    B = make_dataclass("Point", [("x", int)])
+    save_json(A(1), path)
+    a = load_json(path, document_cache="view", dataclass_types=[A])
+    b = load_json(path, document_cache="view", dataclass_types=[B])
+    assert isinstance(a, A) and isinstance(b, B)
+    assert load_json(path, document_cache="view", dataclass_types=[A]) is a
+
+
+def test_document_cache_secret():
+    path = Path("out/test/test_document_cache_secret.json")
+    key = b"0" * 32
+    save_json({"s": SecretStr("password")}, path, nacl_shared_key=key)
+    x = load_json(path, document_cache="view")
+    y = load_json(path, document_cache="view", nacl_shared_key=key)
+    assert isinstance(x["s"], LockedSecret)
+    assert y["s"].get_secret_value() == "password"
+    assert load_json(path, document_cache="view") is x
+
+
+def test_document_cache_chunked():
+    path = Path("out/test/test_document_cache_chunked.json")
+    storage = MemoryStorage()
+    save_json(
+        {"c": ChunkedList(range(100), chunk_size=10)}, path, storage=storage
+    )
+    x = load_json(path, document_cache="copy", storage=storage)
+    n = len(storage.data)
+    y = load_json(path, document_cache="copy", storage=storage)
+    assert y is not x and y["c"] is not x["c"]
+    assert y["c"]._ctx is x["c"]._ctx
+    y["c"][0] = -1
+    assert list(x["c"]) == list(range(100))
+    assert y["c"][:2] == [-1, 1]
+    assert len(storage.data) == n
+    # Another storage doesn't get the cached document
+    z = load_json(path, document_cache="copy", storage=MemoryStorage())
+    with pytest.raises(FileNotFoundError):
+        z["c"][0]
@@ -1,8 +1,18 @@
 """deque (de)serialization test suite"""
 
+import json
 from json import loads
 
-from turbo_broccoli import EmbeddedDict, EmbeddedList, from_json, to_json
+import numpy as np
+from numpy.testing import assert_array_equal
+
+from turbo_broccoli import (
+    Context,
+    EmbeddedDict,
+    EmbeddedList,
+    from_json,
+    to_json,
+)
 
 
 def test_embedded_dict():
@@ -57,3 +67,31 @@ def test_embedded_list_double_save():
     assert id2 == y2[1]._tb_artifact_id
     assert x == y1
     assert x == y2
+
+
+def test_embedded_auto():
+    ctx = Context(min_embedding_size=1000)
+    x = {
+        "small": {"a": 1},
+        "large": {"b": list(range(1000)), "c": [{"d": "e" * 2000}]},
+        "array": np.random.rand(100),
+    }
+    v = loads(to_json(x, ctx))
+    assert v["small"] == {"a": 1}
+    # Children are embedded first, which can make their parent small enough
+    assert v["large"]["b"]["__type__"] == "embedded.list"
+    assert v["large"]["c"][0]["__type__"] == "embedded.dict"
+    y = from_json(to_json(x, ctx), ctx)
+    assert isinstance(y["large"]["b"], EmbeddedList)
+    assert isinstance(y["large"]["c"][0], EmbeddedDict)
+    assert y["small"] == x["small"] and y["large"] == x["large"]
+    assert_array_equal(y["array"], x["array"])
+
+
+def test_embedded_min_embedding_size_threshold():
+    child = {"a": [1, 2.5, None, True], "b": {"c": "dé"}, "d": []}
+    size = len(json.dumps(child))
+    for threshold, embedded in [(size, True), (size + 1, False)]:
+        ctx = Context(min_embedding_size=threshold)
+        v = loads(to_json({"x": child, "y": {1: child}}, ctx))
+        assert ("__type__" in v["x"]) == embedded
@@ -0,0 +1,76 @@
+"""Hashing test suite"""
+
+import subprocess
+import sys
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+import pytest
+import torch
+
+import turbo_broccoli as tb
+from turbo_broccoli.storage import LocalStorage
+
+
+@dataclass
+class C:
+    a: int
+    b: np.ndarray
+
+
+def test_hash_equal_content():
+    x = {
+        "a": np.arange(100),
+        "b": torch.ones(10),
+        "c": pd.DataFrame({"d": [1, 2, 3]}),
+        "e": [1, 2.0, "3", None, True, b"4"],
+        "f": {1, 2, 3},
+        "g": C(1, np.zeros(3)),
+    }
+    y = {k: x[k] for k in reversed(x)}
+    assert tb.hash(x) == tb.hash(y)
+    assert len(tb.hash(x)) == 32
+
+
+@pytest.mark.parametrize(
+    "a,b",
+    [
+        (np.arange(10), np.arange(10).astype("float64")),
+        (np.zeros((2, 3)), np.zeros((3, 2))),
+        ([1, 2], (1, 2)),
+        ([1, [2]], [[1], 2]),
+        ({"a": 1}, {"a": 2}),
+        (C(1, np.zeros(3)), C(1, np.ones(3))),
+        (1, 1.0),
+        ("1", 1),
+    ],
+)
+def test_hash_different_content(a, b):
+    assert tb.hash(a) != tb.hash(b)
+
+
+def test_hash_no_artifacts(monkeypatch):
+    def _fail(*_, **__):
+        raise AssertionError("An artifact was written")
+
+    monkeypatch.setattr(LocalStorage, "open", _fail)
+    monkeypatch.setattr(LocalStorage, "write", _fail)
+    tb.hash({"a": np.random.rand(1000, 100), "c": C(1, np.zeros(10000))})
+
+
+def test_hash_stable_across_runs():
+    code = (
+        "import numpy as np, turbo_broccoli as tb;"
+        "print(tb.hash({'a': np.arange(10), 'b': {'c', 'd', 'e'}}))"
+    )
+    hashes = {
+        subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout
+        for _ in range(2)
+    }
+    assert len(hashes) == 1
@@ -0,0 +1,83 @@
+"""Incremental save test suite"""
+
+import json
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import torch
+from numpy.testing import assert_array_equal
+
+from turbo_broccoli import (
+    Context,
+    GuardedBlockHandler,
+    load_json,
+    provenance,
+    save_json,
+)
+from turbo_broccoli.storage import MemoryStorage, RecordingStorage
+
+
+def _artifacts(path: Path) -> set[str]:
+    return {p.name for p in path.parent.iterdir() if p != path}
+
+
+def test_incremental():
+    path = Path("out/test/test_incremental/doc.json")
+    shutil.rmtree(path.parent, ignore_errors=True)
+    ctx = Context(path, artifact_path=path.parent, incremental=True)
+    x = {
+        "a": np.random.rand(100, 100),
+        "b": torch.rand(100, 100),
+        "c": pd.DataFrame({"d": np.random.rand(1000)}),
+    }
+    save_json(x, ctx=ctx)
+    a, doc = _artifacts(path), json.loads(path.read_text())
+    x["e"] = 1
+    save_json(x, ctx=ctx)  # Nothing is re-encoded
+    assert _artifacts(path) == a
+    assert json.loads(path.read_text()) == {**doc, "e": 1}
+    x["a"][0, 0] = -1  # Only "a" is re-encoded
+    save_json(x, ctx=ctx)
+    new = _artifacts(path) - a
+    assert len(new) == 1
+    y = load_json(path, artifact_path=path.parent)
+    assert_array_equal(x["a"], y["a"])
+    assert torch.equal(x["b"], y["b"])
+
+
+def test_incremental_not_reused_by_other_contexts():
+    storage = MemoryStorage()
+    x = np.random.rand(100, 100)
+    path = "out/test/test_incremental_not_reused_by_other_contexts.json"
+    ctx = Context(path, artifact_path="/tb", storage=storage)
+    save_json(x, ctx=Context(**{**ctx.__dict__, "incremental": True}))
+    save_json(x, ctx=ctx)
+    assert len(storage.data) == 2
+    assert not provenance.active(ctx, encoding=True)
+
+
+def test_incremental_guard():
+    path = Path("out/test/test_incremental_guard/doc.json")
+    shutil.rmtree(path.parent, ignore_errors=True)
+    h = GuardedBlockHandler(path, artifact_path=path.parent, incremental=True)
+    for _, x in h(range(5)):
+        h.result[x] = np.random.rand(100, 100)
+    assert len(_artifacts(path)) == 5
+    y = load_json(path, artifact_path=path.parent)
+    for k, v in h.result.items():
+        assert_array_equal(v, y[k])
+
+
+def test_incremental_recorded_paths():
+    path = "out/test/test_incremental_recorded_paths.json"
+    ctx = Context(path, artifact_path="/tb", storage=MemoryStorage())
+    ctx = Context(**{**ctx.__dict__, "incremental": True})
+    assert isinstance(ctx.storage, RecordingStorage)
+    x = {"a": np.random.rand(100, 100)}
+    for i in range(5):
+        x[str(i)] = np.random.rand(100, 100)
+        save_json(x, ctx=ctx)
+        assert not ctx.storage.writes and not ctx.storage.reads
+    assert_array_equal(load_json(ctx=ctx)["4"], x["4"])
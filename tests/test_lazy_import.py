@@ -0,0 +1,79 @@
+"""Lazy import of the optional custom modules test suite"""
+
+import subprocess
+import sys
+
+import common  # Must be before turbo_broccoli imports
+
+import turbo_broccoli as tb
+from turbo_broccoli.custom import get_encoders
+
+
+def _run(code: str) -> list[str]:
+    """
+    Runs some code in a new interpreter, and returns the heavy packages that
+    got imported
+    """
+    code += (
+        "\nimport sys"
+        "\nfor m in ['bokeh', 'fsspec', 'networkx', 'pandas', 'scipy',"
+        " 'sklearn', 'tensorflow', 'torch']:"
+        "\n    if m in sys.modules:"
+        "\n        print(m)"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    return result.stdout.split()
+
+
+def test_lazy_import():
+    assert _run("import turbo_broccoli") == []
+
+
+def test_lazy_import_numpy():
+    code = (
+        "import numpy as np\n"
+        "import turbo_broccoli as tb\n"
+        "tb.from_json(tb.to_json({'a': np.zeros(3), 'b': [1, 2]}))"
+    )
+    assert _run(code) == []
+
+
+def test_lazy_import_encode():
+    code = (
+        "import torch\n"
+        "import turbo_broccoli as tb\n"
+        "tb.to_json(torch.zeros(3))\n"
+        "assert 'turbo_broccoli.custom.pytorch' in sys.modules\n"
+        "assert 'turbo_broccoli.custom.pandas' not in sys.modules"
+    )
+    assert _run("import sys\n" + code) == ["torch"]
+
+
+def test_lazy_import_decode():
+    import torch
+
+    doc = tb.to_json(torch.zeros(3))
+    code = (
+        "import turbo_broccoli as tb\n"
+        f"x = tb.from_json({doc!r})\n"
+        "assert type(x).__name__ == 'Tensor'"
+    )
+    assert _run(code) == ["torch"]
+
+
+def test_get_encoders():
+    import torch
+
+    from turbo_broccoli.custom import pytorch
+
+    class MyModule(torch.nn.Module):
+        pass
+
+    assert pytorch.to_json in get_encoders(MyModule)
+    assert pytorch.to_json not in get_encoders(int)
+    assert len(get_encoders(int)) < len(get_encoders())
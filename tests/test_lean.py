@@ -0,0 +1,69 @@
+"""Lean decoding test suite"""
+
+from array import array
+from collections import deque
+
+import common  # Must be before turbo_broccoli imports
+import numpy as np
+import pytest
+
+import turbo_broccoli as tb
+
+
+def test_lean_interning():
+    doc = tb.to_json([{"name" + "x": "label" + str(i % 2)} for i in range(4)])
+    obj = tb.from_json(doc, tb.Context(lean=True))
+    assert obj == [{"namex": "label0"}, {"namex": "label1"}] * 2
+    keys = [next(iter(d)) for d in obj]
+    assert all(k is keys[0] for k in keys)
+    assert obj[0]["namex"] is obj[2]["namex"]
+
+
+def test_lean_long_strings_not_interned():
+    s = "a" * (tb.turbo_broccoli.LEAN_MAX_STR_LEN + 1)
+    obj = tb.from_json(tb.to_json([s, s]), tb.Context(lean=True))
+    assert obj == [s, s]
+    assert obj[0] is not obj[1]
+
+
+def test_lean_lists_array():
+    doc = tb.to_json({"i": [1, 2, 3], "f": [1.0, 2.5], "m": [1, 2.0], "e": []})
+    obj = tb.from_json(doc, tb.Context(lean_lists="array"))
+    assert obj["i"] == array("q", [1, 2, 3])
+    assert obj["f"] == array("d", [1.0, 2.5])
+    assert obj["m"] == [1, 2.0]
+    assert obj["e"] == []
+
+
+def test_lean_lists_numpy():
+    doc = tb.to_json({"i": [1, 2, 3], "b": [True, False], "o": [2**70]})
+    obj = tb.from_json(doc, tb.Context(lean_lists="numpy"))
+    assert obj["i"].dtype == np.int64
+    np.testing.assert_array_equal(obj["i"], [1, 2, 3])
+    assert obj["b"] == [True, False]
+    assert obj["o"] == [2**70]
+
+
+@pytest.mark.parametrize("lean_lists", ["array", "numpy"])
+def test_lean_lists_typed_objects(lean_lists):
+    x = {
+        "t": (1, 2, 3),
+        "s": {1, 2, 3},
+        "d": deque([1.0, 2.0], maxlen=5),
+        "l": [(1, 2), [1, 2]],
+    }
+    obj = tb.from_json(tb.to_json(x), tb.Context(lean_lists=lean_lists))
+    assert obj["t"] == (1, 2, 3)
+    assert all(type(v) is int for v in obj["t"] + tuple(obj["s"]))
+    assert obj["s"] == {1, 2, 3}
+    assert obj["d"] == deque([1.0, 2.0]) and obj["d"].maxlen == 5
+    assert all(type(v) is float for v in obj["d"])
+    assert obj["l"][0] == (1, 2)
+    assert isinstance(
+        obj["l"][1], array if lean_lists == "array" else np.ndarray
+    )
+
+
+def test_lean_lists_invalid():
+    with pytest.raises(ValueError):
+        tb.Context(lean_lists="tuple")  # type: ignore
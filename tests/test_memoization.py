@@ -0,0 +1,131 @@
+"""Memoization test suite"""
+
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+import common  # Must be before turbo_broccoli imports
+import numpy as np
+
+import turbo_broccoli as tb
+
+CACHE_PATH = Path("out") / "test" / "memoization"
+
+
+def test_cache_hit_miss():
+    calls = []
+
+    @tb.cache(CACHE_PATH / "hit_miss")
+    def f(x: np.ndarray, n: int = 2) -> tuple:
+        calls.append(n)
+        return x**n, n
+
+    f.clear()
+    x = np.random.random((100, 100))
+    for y, n in [f(x), f(x, 2), f(x, n=2)]:
+        np.testing.assert_array_equal(y, x**2)
+        assert n == 2
+    for y, n in [f(x, 3), f(x.copy(), 3)]:
+        np.testing.assert_array_equal(y, x**3)
+        assert n == 3
+    assert calls == [2, 3]
+    assert (f.hits, f.misses) == (3, 2)
+    assert f.__name__ == "f"
+
+
+def test_cache_none():
+    calls = []
+
+    @tb.cache(CACHE_PATH / "none")
+    def f() -> None:
+        calls.append(0)
+
+    f.clear()
+    assert f() is None
+    assert f() is None
+    assert len(calls) == 1
+
+
+def test_cache_functions_are_distinct():
+    directory = CACHE_PATH / "distinct"
+
+    @tb.cache(directory)
+    def f(x: int) -> int:
+        return x + 1
+
+    @tb.cache(directory)
+    def g(x: int) -> int:
+        return x - 1
+
+    f.clear()
+    assert f(0) == 1
+    assert g(0) == -1
+    assert (f.misses, g.misses) == (1, 1)
+
+
+def test_cache_max_entries():
+    @tb.cache(CACHE_PATH / "max_entries", max_entries=2)
+    def f(x: int) -> int:
+        return x * 2
+
+    f.clear()
+    for x in [0, 1, 2]:
+        f(x)
+        # Make sure modification times are ordered
+        path = f._context(f.key(x)).file_path
+        os.utime(path, ns=(x * 10**9, x * 10**9))
+    assert len(f._entries()) == 2
+    f(1)  # Hit, 1 is now the most recently used
+    f(3)  # Miss, 2 is evicted
+    assert (f.hits, f.misses) == (1, 4)
+    f(1)
+    f(2)
+    assert (f.hits, f.misses) == (2, 5)
+
+
+def test_cache_max_bytes():
+    @tb.cache(CACHE_PATH / "max_bytes", max_bytes=20_000, min_artifact_size=0)
+    def f(x: int) -> np.ndarray:
+        return np.full(1000, x, dtype=np.float64)  # 8000 bytes artifact
+
+    f.clear()
+    for x in range(4):
+        np.testing.assert_array_equal(f(x), np.full(1000, x))
+    entries = f._entries()
+    assert len(entries) == 2
+    assert sum(s for _, _, s in entries) <= 20_000
+    assert len([p for p in f.directory.iterdir() if p.is_dir()]) == 2
+
+
+def test_cache_corrupted():
+    @tb.cache(CACHE_PATH / "corrupted")
+    def f(x: int) -> list:
+        return [x] * 1000
+
+    f.clear()
+    assert f(1) == [1] * 1000
+    (CACHE_PATH / "corrupted" / (f.key(1) + ".json")).write_text('{"a": [1')
+    assert f(1) == [1] * 1000
+    assert f(1) == [1] * 1000
+    assert (f.hits, f.misses) == (1, 2)
+    assert not list((CACHE_PATH / "corrupted").glob(".*.tmp"))
+
+
+@dataclass
+class Scaler:
+    factor: int
+    calls: int = 0
+
+    @tb.cache(CACHE_PATH / "method")
+    def scale(self, x: int) -> int:
+        self.calls += 1
+        return self.factor * x
+
+
+def test_cache_method():
+    Scaler.scale.clear()
+    a, b = Scaler(2), Scaler(3)
+    assert a.scale(5) == 10 and b.scale(5) == 15
+    assert Scaler(2).scale(5) == 10  # Same instance state, so cached
+    assert a.calls == b.calls == 1
+    assert Scaler.scale.hits == 1 and a.scale.misses == 2
@@ -0,0 +1,162 @@
+"""Dry-run encoding test suite"""
+
+from dataclasses import dataclass
+from pathlib import Path
+
+import common  # Must be before turbo_broccoli imports
+import numpy as np
+import pandas as pd
+import pytest
+import torch
+
+import turbo_broccoli as tb
+from turbo_broccoli.storage import MemoryStorage
+
+TEST_PATH = Path("out") / "test"
+
+
+@dataclass
+class Point:
+    x: np.ndarray
+    label: str
+
+
+def _obj() -> dict:
+    return {
+        "a": np.random.random((100, 100)),
+        "b": [1, 2.5, "x", None, True, (1, 2)],
+        "c": {"d": np.zeros(3), "e": Point(np.ones(10), "p")},
+        "t": torch.zeros(5000),
+        "s": {1, 2},
+        "k": {1: "a"},
+        "f": np.float32(3),
+    }
+
+
+def _encode(obj: dict, **kwargs) -> tuple[str, MemoryStorage]:
+    storage = MemoryStorage()
+    return tb.to_json(obj, tb.Context(storage=storage, **kwargs)), storage
+
+
+def test_plan():
+    obj = _obj()
+    p = tb.plan(obj)
+    doc, storage = _encode(obj)
+    assert p.document_size == len(doc)
+    assert p.artifacts == len(storage.data)
+    assert p.artifact_size == sum(len(v) for v in storage.data.values())
+    entries = {e.json_path: e for e in p.entries}
+    assert entries["$.a"].type_name == "numpy.ndarray"
+    assert entries["$.a"].encoder == "turbo_broccoli.custom.numpy"
+    assert entries["$.a"].target == "artifact"
+    assert entries["$.c.d"].target == "inline"
+    assert entries["$.c.e"].type_name == "dataclass.Point"
+    assert entries["$.t"].type_name == "pytorch.tensor"
+    assert entries["$"].encoder is None
+    assert set(p.by_path()) == {"$", "$.a", "$.b", "$.c", "$.t", "$.s"} | {
+        "$.k",
+        "$.f",
+    }
+    assert "numpy.ndarray" in p.report()
+
+
+def test_plan_thresholds():
+    obj = {"a": np.random.random(100), "t": torch.zeros(100)}
+    p = tb.plan(obj, min_artifact_size=100)
+    assert all(e.target == "artifact" for e in p.entries[1:])
+    p = tb.plan(obj, min_artifact_size=10000)
+    assert all(e.target == "inline" for e in p.entries)
+    assert p.document_size == len(_encode(obj, min_artifact_size=10000)[0])
+    p = tb.plan(obj, min_artifact_size=100, large_artifact_size=100)
+    doc, storage = _encode(obj, min_artifact_size=100, large_artifact_size=100)
+    assert p.document_size == len(doc)
+    assert p.artifact_size == sum(len(v) for v in storage.data.values())
+
+
+def test_plan_embedding():
+    obj = {"a": [list(range(1000)), [1]], "b": 1}
+    p = tb.plan(obj, min_embedding_size=1000)
+    doc, storage = _encode(obj, min_embedding_size=1000)
+    assert p.document_size == len(doc)
+    assert p.artifact_size == sum(len(v) for v in storage.data.values())
+    assert [e.type_name for e in p.entries if e.artifacts] == ["embedded.list"]
+
+
+def test_plan_pandas():
+    df = pd.DataFrame({"x": range(10000), "y": ["a"] * 10000})
+    p = tb.plan({"df": df, "s": df["x"]})
+    assert [e.type_name for e in p.entries[1:]] == [
+        "pandas.dataframe",
+        "pandas.series",
+    ]
+    assert all(e.target == "artifact" and not e.exact for e in p.entries[1:])
+    assert p.artifact_size >= df.memory_usage(deep=True).sum()
+
+
+def test_plan_writes_nothing():
+    path = TEST_PATH / "test_plan_writes_nothing"
+    tb.plan(_obj(), tb.Context(artifact_path=path))
+    assert not path.exists()
+
+
+def test_plan_unsupported():
+    with pytest.raises(TypeError):
+        tb.plan({"a": [object()]})
+
+
+def test_plan_chunked_and_stream():
+    def _gen():
+        for i in range(5):
+            yield np.full(2000, i)
+
+    arrays = [np.full(2000, i) for i in range(25)]
+    obj = {
+        "c": tb.ChunkedList(arrays, chunk_size=10),
+        "s": tb.Stream(_gen()),
+        "l": tb.Stream(arrays[:3]),
+    }
+    p = tb.plan(obj)
+    entries = {e.json_path: e for e in p.entries}
+    assert entries["$.c"].type_name == "chunked.list"
+    assert entries["$.s"].artifacts == 1 and not entries["$.s"].exact
+    _, storage = _encode({"c": obj["c"], "l": obj["l"]})
+    c, s = entries["$.c"], entries["$.l"]
+    assert c.artifacts + s.artifacts == len(storage.data)
+    size = sum(len(v) for v in storage.data.values())
+    assert c.artifact_size + s.artifact_size == size
+    # Planning changed nothing, so the objects can still be saved
+    obj = {
+        "c": tb.ChunkedList(arrays, chunk_size=10),
+        "s": tb.Stream(_gen()),
+    }
+    path = TEST_PATH / "test_plan_chunked_and_stream"
+    tb.plan(obj)
+    tb.save_json(obj, path / "doc.json", artifact_path=path / "a")
+    loaded = tb.load_json(path / "doc.json", artifact_path=path / "a")
+    assert len(loaded["c"]) == 25
+    assert all((x == y).all() for x, y in zip(loaded["c"], arrays))
+    assert [int(x[0]) for x in loaded["s"]] == list(range(5))
+    # Same with loaded objects
+    tb.plan(loaded)
+    tb.save_json(loaded, path / "doc2.json", artifact_path=path / "b")
+    loaded = tb.load_json(path / "doc2.json", artifact_path=path / "b")
+    assert all((x == y).all() for x, y in zip(loaded["c"], arrays))
+    assert [int(x[0]) for x in loaded["s"]] == list(range(5))
+
+
+def test_plan_embedded():
+    obj = {
+        "e": tb.EmbeddedDict({"a": np.random.random(10000), "b": [1, 2]}),
+        "l": tb.EmbeddedList([np.zeros(3), {"c": "d"}]),
+    }
+    p = tb.plan(obj)
+    assert obj["e"]._tb_artifact_id is None
+    assert obj["l"]._tb_artifact_id is None
+    entries = {e.json_path: e for e in p.entries}
+    assert entries["$.e"].type_name == "embedded.dict"
+    assert entries["$.e.a"].type_name == "numpy.ndarray"
+    assert entries["$.l"].type_name == "embedded.list"
+    doc, storage = _encode(obj)
+    assert p.document_size == len(doc)
+    assert p.artifacts == len(storage.data)
+    assert p.artifact_size == sum(len(v) for v in storage.data.values())
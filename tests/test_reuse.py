@@ -0,0 +1,78 @@
+"""Artifact re-use test suite"""
+
+import json
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import torch
+from numpy.testing import assert_array_equal
+
+from turbo_broccoli import EmbeddedDict, load_json, save_json
+from turbo_broccoli.storage import MemoryStorage
+
+
+def _artifacts(path: Path) -> list[Path]:
+    ps = [p for p in path.parent.iterdir() if p != path]
+    return sorted(ps, key=lambda p: p.name.split(".")[-2])
+
+
+def test_reuse_numpy():
+    src = Path("out/test/test_reuse_numpy/src/doc.json")
+    dst = Path("out/test/test_reuse_numpy/dst/copy.json")
+    shutil.rmtree("out/test/test_reuse_numpy", ignore_errors=True)
+    x = {"a": np.random.rand(100, 100), "b": torch.rand(100, 100)}
+    save_json(x, src, artifact_path=src.parent)
+    y = load_json(src, artifact_path=src.parent, reuse_artifacts=True)
+    save_json(y, dst, artifact_path=dst.parent)
+    assert json.loads(dst.read_text()) == json.loads(src.read_text())
+    a, b = _artifacts(src), _artifacts(dst)
+    assert len(a) == len(b) == 2
+    for p, q in zip(a, b):
+        assert p.name.split(".")[-2:] == q.name.split(".")[-2:]
+        assert p.stat().st_ino == q.stat().st_ino
+    z = load_json(dst, artifact_path=dst.parent)
+    assert_array_equal(x["a"], z["a"])
+    assert torch.equal(x["b"], z["b"])
+
+
+def test_reuse_mutated():
+    src = Path("out/test/test_reuse_mutated/src/doc.json")
+    dst = Path("out/test/test_reuse_mutated/dst/doc.json")
+    save_json({"a": np.zeros((100, 100))}, src)
+    y = load_json(src, reuse_artifacts=True)
+    y["a"] = y["a"].copy()
+    y["a"][0, 0] = 1
+    save_json(y, dst)
+    assert json.loads(dst.read_text()) != json.loads(src.read_text())
+    assert load_json(dst)["a"][0, 0] == 1
+    assert load_json(src)["a"][0, 0] == 0
+
+
+def test_reuse_pandas_embedded():
+    src = Path("out/test/test_reuse_pandas_embedded/src/doc.json")
+    dst = Path("out/test/test_reuse_pandas_embedded/dst/doc.json")
+    x = EmbeddedDict(
+        {"a": pd.DataFrame({"b": np.arange(1000), "c": np.random.rand(1000)})}
+    )
+    save_json({"x": x}, src, pandas_format="parquet", min_artifact_size=0)
+    y = load_json(src, reuse_artifacts=True, pandas_format="parquet")
+    save_json(y, dst, pandas_format="parquet", min_artifact_size=0)
+    z = load_json(dst, pandas_format="parquet")
+    assert (x["a"] == z["x"]["a"]).all().all()
+
+
+def test_reuse_memory_storage():
+    src = Path("out/test/test_reuse_memory_storage/src.json")
+    dst = Path("out/test/test_reuse_memory_storage/dst.json")
+    x = {"a": np.random.rand(100, 100)}
+    with MemoryStorage() as storage:
+        kw = {"artifact_path": "/tb", "storage": storage}
+        save_json(x, src, **kw)
+        y = load_json(src, reuse_artifacts=True, **kw)
+        save_json(y, dst, **kw)
+        assert len(storage.data) == 2
+    # The artifacts of a closed storage can't be reused, so "a" is serialized
+    save_json(y, dst, artifact_path=dst.parent)
+    assert_array_equal(x["a"], load_json(dst, artifact_path=dst.parent)["a"])
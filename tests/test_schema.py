@@ -0,0 +1,136 @@
+"""Schema-driven deserialization test suite"""
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterator, Literal, TypedDict
+
+import common  # Must be before turbo_broccoli imports
+import numpy as np
+import pandas as pd
+import pytest
+
+import turbo_broccoli as tb
+from turbo_broccoli.exceptions import DeserializationError
+
+TEST_PATH = Path("out") / "test"
+
+
+@dataclass
+class Step:
+    i: int
+    loss: float
+
+
+@dataclass
+class Result:
+    name: str
+    scores: dict[str, float]
+    weights: np.ndarray
+    history: list[Step]
+    frame: pd.DataFrame | None = None
+
+
+@dataclass
+class Node:
+    value: int
+    children: list["Node"]
+
+
+@dataclass
+class Unsupported:
+    children: list["Unsupported"]
+    f: Iterator[int]
+
+
+class Config(TypedDict, total=False):
+    kind: Literal["a", "b"]
+    shape: tuple[int, int]
+    tags: set[str]
+
+
+def _result() -> Result:
+    return Result(
+        name="r",
+        scores={"a": 1.0, "b": 2},
+        weights=np.random.random((10, 10)),
+        history=[Step(0, 1.0), Step(1, 0.5)],
+        frame=pd.DataFrame({"x": [1, 2, 3]}),
+    )
+
+
+def test_schema_dataclass():
+    path = TEST_PATH / "test_schema_dataclass.json"
+    results = [_result(), _result()]
+    tb.save_json(results, path)
+    loaded = tb.load_json(path, schema=list[Result])
+    assert len(loaded) == 2
+    for a, b in zip(results, loaded):
+        assert isinstance(b, Result)
+        assert isinstance(b.history[0], Step)
+        assert a.history == b.history and a.scores == b.scores
+        np.testing.assert_array_equal(a.weights, b.weights)
+        pd.testing.assert_frame_equal(a.frame, b.frame)
+
+
+def test_schema_recursive_dataclass():
+    tree = Node(0, [Node(1, []), Node(2, [Node(3, [])])])
+    assert tb.from_json(tb.to_json(tree), schema=Node) == tree
+
+
+def test_schema_typeddict():
+    config: Config = {"kind": "a", "shape": (2, 3), "tags": {"x", "y"}}
+    assert tb.from_json(tb.to_json(config), schema=Config) == config
+    assert tb.from_json(tb.to_json({"kind": "b"}), schema=Config) == {
+        "kind": "b"
+    }
+
+
+@pytest.mark.parametrize(
+    "obj,schema",
+    [
+        ({"a": 1}, list[int]),
+        ([1, "2"], list[int]),
+        ([1.5], list[int]),
+        ([True], list[int]),
+        ((1, 2, 3), tuple[int, int]),
+        ({"kind": "c"}, Config),
+        ({"kind": "a", "other": 1}, Config),
+        (Step(0, 1.0), Result),
+        ({"i": 0, "loss": 1.0}, Step),
+        (Step(0, "1.0"), Step),  # type: ignore
+        (np.zeros(3), pd.DataFrame),
+        ([1, "a"], list[int | None]),
+    ],
+)
+def test_schema_invalid(obj: Any, schema: Any):
+    with pytest.raises(DeserializationError):
+        tb.from_json(tb.to_json(obj), schema=schema)
+
+
+@pytest.mark.parametrize("schema", [Unsupported, list[Unsupported]])
+def test_schema_unsupported(schema: Any):
+    doc = tb.to_json([])
+    for _ in range(2):  # No half-compiled decoder is left behind
+        with pytest.raises(TypeError):
+            tb.from_json(doc, schema=schema)
+        with pytest.raises(TypeError):
+            tb.from_json(doc, schema=list[Unsupported])
+
+
+def test_schema_nodecode():
+    doc = tb.to_json([Step(0, 1.0), np.zeros(3)])
+    ctx = tb.Context(nodecode_types=["numpy"])
+    obj = tb.from_json(doc, ctx, schema=list[Step | np.ndarray])
+    assert obj[0] == Step(0, 1.0)
+    assert obj[1]["__type__"].startswith("numpy")
+
+
+def test_schema_document_cache():
+    path = TEST_PATH / "test_schema_document_cache.json"
+    tb.save_json([Step(0, 1.0)], path)
+    kw = {"document_cache": "view", "dataclass_types": [Step]}
+    a = tb.load_json(path, schema=list[Step], **kw)
+    b = tb.load_json(path, schema=list[Step], **kw)
+    c = tb.load_json(path, **kw)
+    assert a == c == [Step(0, 1.0)]
+    assert a is b and a is not c
@@ -0,0 +1,73 @@
+"""Shared memory documents test suite"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import common  # Must be before turbo_broccoli imports
+import numpy as np
+import pandas as pd
+import pytest
+import torch
+
+import turbo_broccoli as tb
+from turbo_broccoli.shared import _default_name, unlink_shared
+
+TEST_PATH = Path("out") / "test"
+
+
+def _document() -> dict:
+    return {
+        "a": np.random.random((100, 10)),
+        "b": [torch.arange(10), "hello", {"c": 1}],
+        "d": pd.DataFrame({"x": np.arange(5), "y": list("abcde")}),
+    }
+
+
+def test_load_shared():
+    path = TEST_PATH / "test_load_shared.json"
+    x = _document()
+    tb.save_json(x, path)
+    try:
+        for y in [tb.load_shared(path), tb.load_shared(path)]:
+            np.testing.assert_array_equal(x["a"], y["a"])
+            assert not y["a"].flags.writeable
+            assert torch.equal(x["b"][0], y["b"][0])
+            assert x["b"][1:] == y["b"][1:]
+            pd.testing.assert_frame_equal(x["d"], y["d"])
+            with pytest.raises(ValueError):
+                y["a"][0, 0] = 0
+    finally:
+        unlink_shared(path)
+
+
+def test_load_shared_other_process():
+    path = TEST_PATH / "test_load_shared_other_process.json"
+    x = _document()
+    tb.save_json(x, path)
+    # The segment is created here. The other process must attach to it rather
+    # than load the file, which is removed in the meantime.
+    y = tb.load_shared(path)
+    name = _default_name(path)
+    path.unlink()
+    code = (
+        "import turbo_broccoli as tb;"
+        f"y = tb.load_shared('{path}', name='{name}');"
+        "print(y['a'].sum(), y['b'][0].sum().item())"
+    )
+    try:
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            check=True,
+            text=True,
+        )
+        a, b = result.stdout.split()
+        assert float(a) == pytest.approx(y["a"].sum())
+        assert int(b) == 45
+        # Still there after the other process exited
+        np.testing.assert_array_equal(
+            tb.load_shared(path, name=name)["a"], x["a"]
+        )
+    finally:
+        unlink_shared(name=name)
@@ -0,0 +1,123 @@
+"""Instrumentation test suite"""
+
+import json
+from pathlib import Path
+
+import common  # Must be before turbo_broccoli imports
+import numpy as np
+import pandas as pd
+from numpy.testing import assert_array_equal
+
+import turbo_broccoli as tb
+from turbo_broccoli.stats import StatsStorage
+
+TEST_PATH = Path("out") / "test"
+
+
+def test_stats_save_load():
+    path = TEST_PATH / "test_stats_save_load.json"
+    x = {
+        "a": {"b": np.random.random((100, 100)), "c": [1, 2, 3]},
+        "d": "hello",
+    }
+    stats = tb.Stats()
+    tb.save_json(x, path, stats=stats)
+    y = tb.load_json(path, stats=stats)
+    assert_array_equal(x["a"]["b"], y["a"]["b"])
+
+    arr = stats.by_type["numpy.ndarray"]
+    assert arr.encoded == 1 and arr.decoded == 1
+    assert arr.artifacts_written == 1
+    assert arr.largest_artifact_written == arr.bytes_written
+    assert arr.bytes_written >= x["a"]["b"].nbytes
+    assert stats.by_type["bytes"].bytes_read == arr.bytes_written
+    assert stats.by_type["str"].encoded >= 1
+    assert stats.by_type["int"].encoded >= 3
+    assert stats.by_type["bytes"].decoded == 1
+    assert set(stats.by_path) == {"$", "$.a", "$.d"}
+    assert stats.by_path["$.a"].bytes_written == arr.bytes_written
+
+    assert stats.encode_time > 0 and stats.decode_time > 0
+    assert 0 <= stats.encode_traversal_time <= stats.encode_time
+    assert 0 <= stats.decode_traversal_time <= stats.decode_time
+    assert stats.document_bytes_written == path.stat().st_size
+    assert stats.document_bytes_read == path.stat().st_size
+    json.dumps(stats.to_dict())
+    assert "numpy.ndarray" in stats.report()
+
+
+def test_stats_artifacts_summary():
+    stats = tb.Stats()
+    ctx = tb.Context(stats=stats, min_artifact_size=0)
+    for n in (10, 1000, 100):
+        tb.from_json(tb.to_json(np.zeros(n), ctx), ctx)
+    arr = stats.by_type["numpy.ndarray"]
+    assert arr.artifacts_written == 3
+    assert arr.largest_artifact_written >= 8000
+    assert arr.bytes_written >= 8 * 1110
+    raw = stats.by_type["bytes"]
+    assert raw.artifacts_read == 3
+    assert raw.largest_artifact_read == arr.largest_artifact_written
+
+
+def test_stats_path_depth():
+    stats = tb.Stats(path_depth=2)
+    tb.to_json({"a": {"b": {"c": 1}, "d": 2}}, tb.Context(stats=stats))
+    assert set(stats.by_path) == {"$", "$.a", "$.a.b", "$.a.d"}
+    assert stats.by_path["$.a.b"].encoded == 2
+
+
+def test_stats_compression():
+    stats = tb.Stats()
+    ctx = tb.Context(artifact_codec="zlib", stats=stats)
+    doc = tb.to_json(np.zeros((100, 100)), ctx)
+    tb.from_json(doc, ctx)
+    arr = stats.by_type["numpy.ndarray"]
+    assert arr.compression_time > 0
+    assert arr.bytes_written < 100 * 100 * 8
+    assert stats.by_type["bytes"].decompression_time > 0
+
+
+def test_stats_open():
+    stats = tb.Stats()
+    x = pd.DataFrame({"a": range(1000)})
+    ctx = tb.Context(stats=stats, pandas_format="parquet")
+    y = tb.from_json(tb.to_json(x, ctx), ctx)
+    pd.testing.assert_frame_equal(x, y)
+    df = stats.by_type["pandas.dataframe"]
+    assert df.artifacts_written == df.artifacts_read == 1
+    assert df.bytes_written > 0 and df.bytes_read > 0
+
+
+def test_stats_schema():
+    stats = tb.Stats()
+    ctx = tb.Context(stats=stats)
+    tb.from_json(tb.to_json([np.zeros(3)] * 3), ctx, schema=list[np.ndarray])
+    assert stats.by_type["numpy.ndarray"].decoded == 3
+    assert stats.decode_time >= stats.by_type["numpy.ndarray"].decode_time
+
+
+def test_stats_callback():
+    calls = []
+    stats = tb.Stats(callback=calls.append)
+    ctx = tb.Context(stats=stats)
+    tb.from_json(tb.to_json({"a": [np.zeros(3)]}, ctx), ctx)
+    assert calls == [stats, stats]
+    stats.reset()
+    assert not stats.by_type and stats.encode_time == 0
+
+
+def test_stats_storage_not_wrapped_twice():
+    stats = tb.Stats()
+    ctx = tb.Context(stats=stats, reuse_artifacts=True) / "a" / "b"
+    n, storage = 0, ctx.storage
+    while hasattr(storage, "backend"):
+        n += isinstance(storage, StatsStorage)
+        storage = storage.backend
+    assert n == 1
+
+
+def test_stats_disabled():
+    ctx = tb.Context()
+    assert ctx.stats is None
+    assert not isinstance(ctx.storage, StatsStorage)
@@ -0,0 +1,141 @@
+"""Artifact storage backends test suite"""
+
+import json
+from pathlib import Path
+
+import fsspec
+import numpy as np
+import pandas as pd
+import pytest
+from common import to_from_json
+from numpy.testing import assert_array_equal
+
+from turbo_broccoli import Context, EmbeddedDict, from_json, to_json
+from turbo_broccoli.storage import (
+    FsspecStorage,
+    LocalStorage,
+    MemoryStorage,
+    StorageBackend,
+)
+
+
+def _storages() -> list[StorageBackend]:
+    fs = fsspec.filesystem("memory")
+    return [
+        LocalStorage(),
+        MemoryStorage(),
+        FsspecStorage(fs),
+        FsspecStorage(fs, max_pending_bytes=0),
+    ]
+
+
+@pytest.mark.parametrize("storage", _storages())
+def test_storage_numpy(storage: StorageBackend):
+    ctx = Context(artifact_path="/tb/test_storage_numpy", storage=storage)
+    if isinstance(storage, LocalStorage):
+        ctx.artifact_path = Path("out/test/test_storage_numpy")
+    x = {"a": np.random.rand(100, 100), "b": np.random.RandomState(0)}
+    y = to_from_json(x, ctx)
+    assert_array_equal(x["a"], y["a"])
+    assert_array_equal(x["b"].get_state()[1], y["b"].get_state()[1])
+
+
+@pytest.mark.parametrize("storage", _storages()[1:])
+@pytest.mark.parametrize("fmt", ["parquet", "pickle"])
+def test_storage_pandas(storage: StorageBackend, fmt: str):
+    ctx = Context(
+        artifact_path="/tb/test_storage_pandas",
+        storage=storage,
+        pandas_format=fmt,
+        min_artifact_size=0,
+    )
+    x = pd.DataFrame({"a": np.arange(100), "b": np.random.rand(100)})
+    doc = to_json(x, ctx)
+    assert "id" in json.loads(doc)
+    y = from_json(doc, ctx)
+    assert (x == y).all().all()
+
+
+@pytest.mark.parametrize("storage", _storages()[1:])
+def test_storage_embedded(storage: StorageBackend):
+    ctx = Context(artifact_path="/tb/test_storage_embedded", storage=storage)
+    x = {"a": EmbeddedDict({"b": np.random.rand(100, 100)})}
+    y = to_from_json(x, ctx)
+    assert_array_equal(x["a"]["b"], y["a"]["b"])
+
+
+def test_storage_memory_no_files():
+    storage = MemoryStorage()
+    ctx = Context(artifact_path="/tb/test_storage_memory", storage=storage)
+    to_json({"a": b"a" * 10000, "b": EmbeddedDict({"c": 1})}, ctx)
+    assert len(storage.data) == 2
+    assert not Path("/tb/test_storage_memory").exists()
+
+
+def test_storage_fsspec_buffering():
+    fs = fsspec.filesystem("memory")
+    storage = FsspecStorage(fs)
+    path = Path("/tb/test_storage_fsspec_buffering/a.tb")
+    storage.write(path, b"hello")
+    assert storage.exists(path)
+    assert not fs.exists(str(path))
+    assert storage.read(path) == b"hello"
+    storage.flush()
+    assert fs.exists(str(path))
+    assert fs.cat_file(str(path)) == b"hello"
+
+
+def test_storage_fsspec_read_write_many():
+    storage = FsspecStorage("memory")
+    items = {
+        Path(f"/tb/test_storage_fsspec_read_write_many/{i}.tb"): bytes([i])
+        for i in range(20)
+    }
+    storage.write_many(items)
+    assert storage.read_many(items.keys()) == list(items.values())
+
+
+def test_storage_local_path():
+    storage = MemoryStorage()
+    path = Path("/tb/test_storage_local_path/a.tb")
+    with storage.local_path(path, "wb") as local:
+        local.write_bytes(b"hello")
+    assert storage.read(path) == b"hello"
+    with storage.local_path(path, "rb") as local:
+        assert local.read_bytes() == b"hello"
+
+
+def test_storage_no_artifact_no_directory():
+    ctx = Context(artifact_path="out/test/test_storage_no_artifact/foo")
+    to_json({"a": 1}, ctx)
+    assert not ctx.artifact_path.exists()
+
+
+def test_storage_memory_lifetime():
+    with MemoryStorage() as storage:
+        path = "out/test/test_storage_memory_lifetime"
+        ctx = Context(artifact_path=path, storage=storage)
+        x = {"a": np.random.rand(100, 100)}
+        doc = to_json(x, ctx)
+        assert_array_equal(x["a"], from_json(doc, ctx)["a"])
+        assert not ctx.artifact_path.exists()
+    assert storage.closed and not storage.data
+    with pytest.raises(ValueError):
+        from_json(doc, ctx)
+
+
+def test_storage_memory_export_import():
+    path = Path("out/test/test_storage_memory_export_import")
+    x = {"a": np.random.rand(100, 100), "b": EmbeddedDict({"c": b"c" * 10000})}
+    with MemoryStorage() as storage:
+        doc = to_json(x, Context(storage=storage))
+        storage.export_to(path)
+    y = from_json(doc, Context(artifact_path=path))
+    assert_array_equal(x["a"], y["a"])
+    assert x["b"] == y["b"]
+    with MemoryStorage() as storage:
+        storage.import_from(path, "/somewhere/else")
+        ctx = Context(artifact_path="/somewhere/else", storage=storage)
+        y = from_json(doc, ctx)
+    assert_array_equal(x["a"], y["a"])
+    assert x["b"] == y["b"]
@@ -0,0 +1,62 @@
+"""Stream test suite"""
+
+import json
+import shutil
+from pathlib import Path
+
+import numpy as np
+from numpy.testing import assert_array_equal
+
+from turbo_broccoli import Context, Stream, load_json, save_json
+from turbo_broccoli.storage import MemoryStorage
+
+
+def test_stream():
+    path = Path("out/test/test_stream.json")
+    produced = []
+
+    def _gen():
+        for i in range(100):
+            produced.append(i)
+            yield {"i": i, "x": np.full(1000, i)}
+
+    x = {"a": Stream(_gen())}
+    save_json(x, path)
+    assert json.loads(path.read_text())["a"]["__type__"] == "stream"
+    assert len(produced) == 100
+    it = iter(load_json(path)["a"])
+    for i in range(3):
+        y = next(it)
+        assert y["i"] == i
+        assert_array_equal(y["x"], np.full(1000, i))
+    # The serialized stream now iterates over its artifact
+    assert [y["i"] for y in x["a"]] == list(range(100))
+
+
+def test_stream_resave():
+    storage = MemoryStorage()
+    ctx = Context("out/test/test_stream_resave.json", storage=storage)
+    save_json(Stream(iter(range(10))), ctx=ctx)
+    y = load_json(ctx=ctx)
+    kw = {"artifact_path": "/tb", "storage": storage}
+    save_json({"b": y}, "out/test/test_stream_resave_2.json", **kw)
+    assert len(storage.data) == 2  # The items have been re-encoded
+    z = load_json("out/test/test_stream_resave_2.json", **kw)
+    assert list(z["b"]) == list(range(10))
+    assert list(z["b"]) == list(range(10))  # Can be iterated again
+
+
+def test_stream_resave_arrays():
+    root = Path("out/test/test_stream_resave_arrays")
+    shutil.rmtree(root, ignore_errors=True)
+    # Items large enough to be written to their own artefacts
+    x = Stream(np.full(2000, i) for i in range(10))
+    save_json(x, root / "doc.json", artifact_path=root)
+    y = load_json(root / "doc.json", artifact_path=root)
+    save_json(y, root / "doc2.json", artifact_path=root)
+    for p in root.glob("doc.*"):
+        p.unlink()
+    z = load_json(root / "doc2.json", artifact_path=root)
+    for i, v in enumerate(z):
+        assert_array_equal(v, np.full(2000, i))
+    assert i == 9
@@ -65,3 +65,11 @@ def test_turbo_broccoli_save_load_json_compress():
     save_json(x, p)
     y = load_json(p)
     assert x == y
+
+
+def test_turbo_broccoli_context_truediv():
+    ctx = Context(min_artifact_size=10, stats=None)
+    sub = ctx / "a" / 0
+    assert sub.json_path == "$.a.0" and ctx.json_path == "$"
+    assert sub.storage is ctx.storage
+    assert sub.min_artifact_size == 10
@@ -0,0 +1,55 @@
+"""update_json test suite"""
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+from numpy.testing import assert_array_equal
+
+from turbo_broccoli import EmbeddedDict, load_json, save_json, update_json
+
+
+def test_update_json():
+    path = Path("out/test/test_update_json.json")
+    x = {"a": {"b": [1, 2, 3]}, "c": np.random.rand(100, 100)}
+    save_json(x, path)
+    update_json(path, "$.a.b.1", np.zeros(10))
+    update_json(path, "$.a.b.3", "appended")
+    update_json(path, "$.a.d", {"e": 4})
+    update_json(path, "$.a.b.0", delete=True)
+    y = load_json(path)
+    assert_array_equal(y["c"], x["c"])
+    assert_array_equal(y["a"]["b"][0], np.zeros(10))
+    assert y["a"]["b"][1:] == [3, "appended"]
+    assert y["a"]["d"] == {"e": 4}
+
+
+def test_update_json_root():
+    path = Path("out/test/test_update_json_root.json")
+    save_json({"a": 1}, path)
+    update_json(path, "$", [1, 2])
+    assert load_json(path) == [1, 2]
+    with pytest.raises(ValueError):
+        update_json(path, "$", delete=True)
+
+
+def test_update_json_errors():
+    path = Path("out/test/test_update_json_errors.json")
+    save_json({"a": [1], "b": EmbeddedDict({"c": 1})}, path)
+    with pytest.raises(ValueError):
+        update_json(path, "a", 0)
+    with pytest.raises(ValueError):
+        update_json(path, "$.b.c", 0)
+    with pytest.raises(KeyError):
+        update_json(path, "$.a.2", 0)
+    with pytest.raises(KeyError):
+        update_json(path, "$.x.y", 0)
+    with pytest.raises(KeyError):
+        update_json(path, "$.a.0.b", 0)
+    with pytest.raises(KeyError):
+        update_json(path, "$.a.-2", 0)
+    with pytest.raises(KeyError):
+        update_json(path, "$.a.1", delete=True)
+    update_json(path, "$.a.-1", 2)
+    update_json(path, "$.a.1", 3)
+    assert load_json(path)["a"] == [2, 3]
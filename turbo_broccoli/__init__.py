@@ -3,17 +3,29 @@
 .. include:: ../CHANGELOG.md
 """
 
+from .aio import aload_json, asave_json
+from .background import BackgroundWriter
 from .context import Context
+from .custom.chunked import ChunkedList
 from .custom.embedded import EmbeddedDict, EmbeddedList
 from .custom.external import ExternalData
+from .custom.stream import Stream
 from .guard import GuardedBlockHandler
+from .hashing import hash
+from .memoization import cache
 from .native import load, save
 from .parallel import Parallel, delayed
+from .planning import plan
+from .shared import load_shared
+from .stats import Stats
 from .turbo_broccoli import (
+    append_json,
+    compact_json,
     from_json,
     load_json,
     save_json,
     to_json,
+    update_json,
 )
 from .user import register_decoder, register_encoder
 
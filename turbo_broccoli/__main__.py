@@ -0,0 +1,31 @@
+"""Command line interface"""
+
+import argparse
+
+from .daemon import DEFAULT_MAX_SIZE, serve
+
+
+def main() -> None:
+    """Entry point of `python -m turbo_broccoli`"""
+    parser = argparse.ArgumentParser(prog="python -m turbo_broccoli")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve_parser = commands.add_parser(
+        "serve", help="Runs a daemon, see turbo_broccoli.daemon"
+    )
+    serve_parser.add_argument(
+        "--socket",
+        help="Unix socket to listen to. Defaults to TB_DAEMON_SOCKET.",
+    )
+    serve_parser.add_argument(
+        "--max-size",
+        type=int,
+        default=DEFAULT_MAX_SIZE,
+        help="Maximum total size of the shared memory segments, in bytes",
+    )
+    args = parser.parse_args()
+    if args.command == "serve":
+        serve(args.socket, args.max_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+"""
+Asynchronous API. `turbo_broccoli.aio.asave_json` and
+`turbo_broccoli.aio.aload_json` are the `asyncio` counterparts of
+`turbo_broccoli.save_json` and `turbo_broccoli.load_json`:
+
+```py
+import turbo_broccoli as tb
+
+
+async def handler(request):
+    ...
+    await tb.asave_json(result, "out/result.json")
+```
+
+Encoding and decoding are CPU-bound and run in an executor (the event loop's
+default executor unless one is provided), so the event loop is never blocked.
+Meanwhile, artifacts are written (resp. read) concurrently by a pool of at most
+`max_workers` threads. When loading, artifacts are read ahead of the decoder
+in the order in which the decoder will need them.
+
+If the calling task is cancelled, the executor thread stops at the next
+artifact it tries to read or write. When saving, the JSON file is written
+atomically (to a temporary file that then replaces the target file) after all
+artifacts have been written, so a cancelled save never leaves a partially
+written or dangling document behind, although some orphan artifacts might
+remain.
+"""
+
+import asyncio
+import copy
+import json
+import threading
+from collections import deque
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from io import BytesIO
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Iterable, Literal
+
+from .context import Context
+from .exceptions import TypeIsNodecode
+from .storage import RecordingStorage, StorageBackend, StorageWrapper
+from .turbo_broccoli import (
+    _decoder,
+    _load,
+    _make_or_set_ctx,
+    _to_jsonable,
+    _write_document,
+)
+
+
+class _ConcurrentStorage(StorageWrapper):
+    """
+    Wraps a backend so that artifact writes happen in a thread pool, and
+    (optionally) so that a given list of artifacts is read ahead of time.
+    There are at most `max_workers` pending writes or pending reads at any
+    time, which bounds the amount of memory held by this storage.
+    """
+
+    _cancelled: threading.Event
+    _pool: ThreadPoolExecutor
+    _reads: dict[str, Future]
+    _queue: deque[Path]
+    _slots: threading.BoundedSemaphore
+    _writes: dict[str, Future]
+
+    def __init__(
+        self,
+        backend: StorageBackend,
+        max_workers: int,
+        cancelled: threading.Event,
+        prefetch: Iterable[Path] = (),
+    ) -> None:
+        super().__init__(backend)
+        self.max_workers, self._cancelled = max_workers, cancelled
+        self._pool = ThreadPoolExecutor(max_workers)
+        self._slots = threading.BoundedSemaphore(max_workers)
+        self._reads, self._writes = {}, {}
+        self._queue = deque(prefetch)
+        self._prefetch()
+
+    def _check(self) -> None:
+        """Raises `asyncio.CancelledError` if the operation was cancelled"""
+        if self._cancelled.is_set():
+            raise asyncio.CancelledError()
+
+    def _prefetch(self) -> None:
+        """Starts reading the next artifacts, if there are free workers"""
+        while self._queue and len(self._reads) < self.max_workers:
+            path = self._queue.popleft()
+            if str(path) not in self._reads:
+                self._reads[str(path)] = self._pool.submit(
+                    self.backend.read, path
+                )
+
+    def _wait_for_write(self, path: Path) -> None:
+        if future := self._writes.get(str(path)):
+            future.result()
+
+    def close(self) -> None:
+        """Stops all pending reads. Pending writes are not interrupted."""
+        self._queue.clear()
+        for future in self._reads.values():
+            future.cancel()
+        self._pool.shutdown(wait=False)
+
+    def flush(self) -> None:
+        writes, self._writes = self._writes, {}
+        for future in writes.values():
+            future.result()
+        self._check()
+        self.backend.flush()
+
+    def open(self, path: Path, mode: Literal["rb", "wb"] = "rb") -> BinaryIO:
+        self._check()
+        if mode == "rb":
+            if str(path) in self._reads:
+                return BytesIO(self.read(path))
+            self._wait_for_write(path)
+        return self.backend.open(path, mode)
+
+    def read(self, path: Path) -> bytes:
+        self._check()
+        future = self._reads.pop(str(path), None)
+        self._prefetch()
+        if future is not None:
+            return future.result()
+        self._wait_for_write(path)
+        return self.backend.read(path)
+
+    def write(self, path: Path, data: bytes) -> None:
+        self._check()
+        self._slots.acquire()
+        future = self._pool.submit(self.backend.write, path, data)
+        future.add_done_callback(lambda _: self._slots.release())
+        self._writes[str(path)] = future
+
+
+_PREFETCHABLE = {
+    "bytes": ("id", "tb"),
+    "embedded.dict": ("id", "json"),
+    "embedded.list": ("id", "json"),
+}
+"""
+Types whose artifact can be read ahead of time, mapped to the key of the
+artifact id and to the artifact extension
+"""
+
+
+def _artifacts_to_prefetch(obj: Any, ctx: Context) -> list[Path]:
+    """
+    Lists the artifacts of a raw JSON document that can be read ahead of
+    time, in the order in which `turbo_broccoli.turbo_broccoli._from_jsonable`
+    will read them.
+    """
+    paths: list[Path] = []
+
+    def _visit(x: Any) -> None:
+        if isinstance(x, list):
+            for v in x:
+                _visit(v)
+        elif isinstance(x, dict):
+            for v in x.values():
+                _visit(v)
+            if (t := x.get("__type__")) in _PREFETCHABLE:
+                key, extension = _PREFETCHABLE[t]
+                try:
+                    ctx.raise_if_nodecode(t)
+                except TypeIsNodecode:
+                    return
+                if isinstance(x.get(key), str):
+                    paths.append(ctx.id_to_artifact_path(x[key], extension))
+
+    _visit(obj)
+    return paths
+
+
+def _concurrent_context(
+    ctx: Context,
+    max_workers: int,
+    cancelled: threading.Event,
+    prefetch: Iterable[Path] = (),
+) -> tuple[Context, _ConcurrentStorage]:
+    """
+    Returns a copy of `ctx` whose storage is wrapped in a
+    `_ConcurrentStorage`, and that storage. If the storage of `ctx` records
+    artifact paths (see `turbo_broccoli.provenance`), the concurrent storage
+    is placed under the recording layer rather than on top of it.
+    """
+    storage, result = ctx.storage, copy.copy(ctx)
+    if isinstance(storage, RecordingStorage):
+        concurrent = _ConcurrentStorage(
+            storage.backend, max_workers, cancelled, prefetch
+        )
+        result.storage = RecordingStorage(concurrent)
+    else:
+        concurrent = _ConcurrentStorage(
+            storage, max_workers, cancelled, prefetch
+        )
+        result.storage = concurrent
+    return result, concurrent
+
+
+async def _run(
+    function: Callable[[threading.Event], Any], executor: Executor | None
+) -> Any:
+    """
+    Runs `function` in an executor. `function` receives an event that is set
+    if the calling task is cancelled.
+    """
+    cancelled = threading.Event()
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(executor, function, cancelled)
+    except asyncio.CancelledError:
+        cancelled.set()
+        raise
+
+
+async def aload_json(
+    file_path: str | Path | None = None,
+    ctx: Context | None = None,
+    schema: Any = None,
+    executor: Executor | None = None,
+    max_workers: int = 8,
+    **kwargs,
+) -> Any:
+    """
+    Asynchronous counterpart of `turbo_broccoli.load_json`. Like the latter,
+    it honors the schema, the document cache, and the daemon.
+
+    Args:
+        file_path (str | Path | None): If left to `None`, a context with a file
+            path must be provided
+        ctx (Context | None): The context to use. If `None`, a new context will
+            be created with the kwargs.
+        schema (Any): Expected type of the document, see
+            `turbo_broccoli.schema`
+        executor (Executor | None): Executor in which to decode the document.
+            Defaults to the event loop's default executor.
+        max_workers (int): Maximum number of artifacts that are read
+            concurrently
+        **kwargs: Forwarded to the `turbo_broccoli.context.Context`
+            constructor. If `ctx` is provided, the kwargs are ignored.
+    """
+    ctx = _make_or_set_ctx(file_path, ctx, **kwargs)
+    decode = _decoder(schema, ctx)
+
+    def _load_async(cancelled: threading.Event) -> Any:
+        def _decode(document: Any, ctx: Context) -> Any:
+            tmp, storage = _concurrent_context(
+                ctx,
+                max_workers,
+                cancelled,
+                _artifacts_to_prefetch(document, ctx),
+            )
+            try:
+                return decode(document, tmp)
+            finally:
+                storage.close()
+
+        return _load(ctx, schema, _decode)
+
+    return await _run(_load_async, executor)
+
+
+async def asave_json(
+    obj: Any,
+    file_path: str | Path | None = None,
+    ctx: Context | None = None,
+    executor: Executor | None = None,
+    max_workers: int = 8,
+    **kwargs,
+) -> None:
+    """
+    Asynchronous counterpart of `turbo_broccoli.save_json`. The output file is
+    written atomically.
+
+    Args:
+        obj (Any):
+        file_path (str | Path):
+        ctx (Context | None): The context to use. If `None`, a new context will
+            be created with the kwargs.
+        executor (Executor | None): Executor in which to encode the object.
+            Defaults to the event loop's default executor.
+        max_workers (int): Maximum number of artifacts that are written
+            concurrently
+        **kwargs: Forwarded to the `turbo_broccoli.context.Context`
+            constructor.
+    """
+    ctx = _make_or_set_ctx(file_path, ctx, **kwargs)
+
+    def _save(cancelled: threading.Event) -> None:
+        tmp, storage = _concurrent_context(ctx, max_workers, cancelled)
+        try:
+            data = json.dumps(_to_jsonable(obj, tmp))
+            storage.flush()
+        finally:
+            storage.close()
+        if cancelled.is_set():
+            raise asyncio.CancelledError()
+        _write_document(data, ctx, atomic=True)
+
+    await _run(_save, executor)
@@ -0,0 +1,150 @@
+"""
+Low-level artifact I/O, tuned for large payloads. Large artifacts are written
+in chunks straight from the memory of the object being serialized, and read
+with `readinto` into preallocated buffers, so that (de)serializing an object
+doesn't require twice its size in memory. When an artifact is an actual file,
+`posix_fadvise` hints are given to the kernel where available.
+
+Numerical arrays (numpy arrays and pytorch tensors) are stored as
+[safetensors](https://huggingface.co/docs/safetensors) files containing a
+single tensor named `data`. See `turbo_broccoli.artifact_io.tensor_buffers`
+and `turbo_broccoli.artifact_io.read_tensor_header`.
+"""
+
+import json
+import os
+import struct
+from contextlib import contextmanager
+from io import UnsupportedOperation
+from pathlib import Path
+from typing import Any, BinaryIO, Generator, Iterable, Literal
+
+from .exceptions import DeserializationError
+from .storage import StorageBackend
+
+CHUNK_SIZE = 16 * 1024 * 1024
+"""
+Size of the chunks in which large artifacts are read and written. Artifacts
+smaller than this are written in a single `StorageBackend.write` call, which
+lets the storage backend buffer them.
+"""
+
+
+def _fadvise(fp: Any, advice: str) -> None:
+    """
+    Calls `os.posix_fadvise` on the whole file if `fp` is backed by an actual
+    file and if the platform supports it. `advice` is the name of the advice
+    without the `POSIX_FADV_` prefix, e.g. `"SEQUENTIAL"`.
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        fd = fp.fileno()
+    except (AttributeError, OSError, UnsupportedOperation):
+        return
+    try:
+        os.posix_fadvise(fd, 0, 0, getattr(os, "POSIX_FADV_" + advice))
+    except OSError:
+        pass
+
+
+@contextmanager
+def open_artifact(
+    storage: StorageBackend, path: Path, mode: Literal["rb", "wb"] = "rb"
+) -> Generator[BinaryIO, None, None]:
+    """
+    Opens an artifact for sequential access. If the artifact is an actual
+    file, the kernel is told to read ahead aggressively, and when reading,
+    to drop the file's pages from the page cache afterwards since the data
+    now lives in the deserialized object.
+    """
+    with storage.open(path, mode) as fp:
+        _fadvise(fp, "SEQUENTIAL")
+        yield fp
+        if mode == "rb":
+            _fadvise(fp, "DONTNEED")
+
+
+def read_artifact(storage: StorageBackend, path: Path) -> bytes:
+    """
+    Reads an artifact in one go. For local files, this allocates a single
+    buffer of the size of the file and reads directly into it.
+    """
+    with open_artifact(storage, path) as fp:
+        return fp.read()
+
+
+def readinto(fp: BinaryIO, buffer: Any) -> None:
+    """
+    Fills a writable buffer (e.g. a `bytearray` or a numpy array) with the next
+    bytes of `fp`, in chunks of `CHUNK_SIZE` bytes and without intermediate
+    copies. Raises a `turbo_broccoli.exceptions.DeserializationError` if the
+    file is too short.
+    """
+    view, pos = memoryview(buffer).cast("B"), 0
+    while pos < len(view):
+        n = fp.readinto(view[pos : pos + CHUNK_SIZE])  # type: ignore
+        if not n:
+            raise DeserializationError(
+                f"Truncated artifact: expected {len(view)} bytes, got {pos}"
+            )
+        pos += n
+
+
+def write_artifact(
+    storage: StorageBackend, path: Path, buffers: Iterable[Any], size: int
+) -> None:
+    """
+    Writes an artifact made of the concatenation of `buffers`, which are
+    bytes-like objects (e.g. numpy arrays or memoryviews) whose sizes add up
+    to `size` bytes. Large artifacts are streamed in chunks of `CHUNK_SIZE`
+    bytes, small ones are written with a single `StorageBackend.write`.
+    """
+    if size < CHUNK_SIZE:
+        storage.write(path, b"".join(buffers))
+        return
+    with open_artifact(storage, path, "wb") as fp:
+        for buffer in buffers:
+            view = memoryview(buffer).cast("B")
+            for i in range(0, len(view), CHUNK_SIZE):
+                fp.write(view[i : i + CHUNK_SIZE])
+
+
+def read_tensor_header(fp: BinaryIO) -> tuple[str, list[int]]:
+    """
+    Reads the header of a safetensors file containing a single tensor named
+    `data` (see `turbo_broccoli.artifact_io.tensor_buffers`), and leaves `fp`
+    at the beginning of the tensor's data. Returns the safetensors dtype
+    (e.g. `"F32"`) and the shape of the tensor.
+    """
+    try:
+        (n,) = struct.unpack("<Q", fp.read(8))
+        meta = json.loads(fp.read(n))["data"]
+        if begin := meta["data_offsets"][0]:
+            fp.read(begin)
+        return meta["dtype"], meta["shape"]
+    except (KeyError, TypeError, ValueError, struct.error) as exc:
+        raise DeserializationError("Invalid tensor artifact") from exc
+
+
+def tensor_buffers(
+    dtype: str, shape: list[int], buffers: Iterable[Any], size: int
+) -> tuple[list[Any], int]:
+    """
+    Returns the buffers making up a safetensors file that contains a single
+    tensor named `data`, and the total size of that file. The tensor's data is
+    not copied. The result can be passed to
+    `turbo_broccoli.artifact_io.write_artifact`.
+
+    Args:
+        dtype (str): Safetensors dtype, e.g. `"F32"`
+        shape (list[int]):
+        buffers (Iterable[Any]): Bytes-like objects whose concatenation is the
+            tensor's data, in C order and little-endian
+        size (int): Size of the tensor's data in bytes
+    """
+    meta = {"dtype": dtype, "shape": shape, "data_offsets": [0, size]}
+    header = json.dumps({"data": meta}, separators=(",", ":")).encode()
+    header += b" " * (-len(header) % 8)  # Aligns the data on 8 bytes
+    prefix = struct.pack("<Q", len(header)) + header
+    return [prefix, *buffers], len(prefix) + size
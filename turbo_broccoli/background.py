@@ -0,0 +1,187 @@
+"""
+Background JSON writer, for checkpointing without stalling e.g. a training
+loop:
+
+```py
+import turbo_broccoli as tb
+
+with tb.BackgroundWriter("out/checkpoint.json") as writer:
+    for step in range(n_steps):
+        ...
+        if step % 10 == 0:
+            writer.submit({"step": step, "weights": weights, ...})
+# At this point, the last submitted object has been written
+```
+
+`BackgroundWriter.submit` takes a snapshot of the object, which is a copy of
+all containers (dicts, lists, tuples, sets), numpy arrays, pytorch tensors
+(moved to the CPU), and pandas objects in it. Other objects are deep-copied.
+The snapshot is then serialized and written by a worker thread, while the
+caller can modify the original object.
+
+If a snapshot is submitted while the previous one is still waiting to be
+written, the previous one is dropped. In other words, only the most recent
+snapshot is guaranteed to be written. The output file is written atomically,
+so it is always a complete document.
+
+Errors that occur in the worker thread are re-raised by the next call to
+`BackgroundWriter.submit`, `BackgroundWriter.flush`, or
+`BackgroundWriter.close`.
+"""
+
+import copy
+import json
+import sys
+import threading
+from pathlib import Path
+from typing import Any
+
+from .context import Context
+from .turbo_broccoli import _make_or_set_ctx, _to_jsonable, _write_document
+
+
+def _snapshot(obj: Any) -> Any:
+    """See module documentation"""
+    if obj is None or isinstance(obj, (bool, int, float, str, bytes)):
+        return obj
+    if isinstance(obj, dict):
+        new = copy.copy(obj)
+        for k, v in obj.items():
+            new[k] = _snapshot(v)
+        return new
+    if isinstance(obj, list):
+        new = copy.copy(obj)
+        new[:] = [_snapshot(v) for v in obj]
+        return new
+    if isinstance(obj, tuple):
+        items = [_snapshot(v) for v in obj]
+        return type(obj)(*items) if hasattr(obj, "_fields") else tuple(items)
+    if isinstance(obj, (set, frozenset)):
+        return type(obj)(_snapshot(v) for v in obj)
+    if (np := sys.modules.get("numpy")) and isinstance(obj, np.ndarray):
+        return obj.copy()
+    if (torch := sys.modules.get("torch")) and isinstance(obj, torch.Tensor):
+        return obj.detach().to("cpu", copy=True)
+    if (pd := sys.modules.get("pandas")) and isinstance(
+        obj, (pd.DataFrame, pd.Series)
+    ):
+        return obj.copy(deep=True)
+    return copy.deepcopy(obj)
+
+
+class BackgroundWriter:
+    """See module documentation"""
+
+    context: Context
+    dropped: int
+    """Number of snapshots that were dropped because a newer one arrived"""
+    written: int
+    """Number of snapshots that were written"""
+
+    _closed: bool = False
+    _condition: threading.Condition
+    _error: Exception | None = None
+    _pending: list[Any]
+    _thread: threading.Thread
+    _writing: bool = False
+
+    def __enter__(self) -> "BackgroundWriter":
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.close()
+
+    def __init__(
+        self,
+        file_path: str | Path | None = None,
+        ctx: Context | None = None,
+        **kwargs: Any,
+    ) -> None:
+        """
+        Args:
+            file_path (str | Path | None): If left to `None`, a context with a
+                file path must be provided
+            ctx (Context | None): The context to use. If `None`, a new context
+                will be created with the kwargs.
+            **kwargs: Forwarded to the `turbo_broccoli.context.Context`
+                constructor. If `ctx` is provided, the kwargs are ignored.
+        """
+        self.context = _make_or_set_ctx(file_path, ctx, **kwargs)
+        self.dropped, self.written = 0, 0
+        self._condition, self._pending = threading.Condition(), []
+        self._thread = threading.Thread(
+            target=self._run, name="tb-background-writer", daemon=True
+        )
+        self._thread.start()
+
+    def _raise_if_error(self) -> None:
+        """Re-raises the last error of the worker thread, if any"""
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _run(self) -> None:
+        """Worker thread loop"""
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending or self._closed)
+                if not self._pending:
+                    return
+                obj = self._pending.pop()
+                self._writing = True
+            try:
+                data = json.dumps(_to_jsonable(obj, self.context))
+                self.context.storage.flush()
+                _write_document(data, self.context, atomic=True)
+                self.written += 1
+            except Exception as exc:  # pylint: disable=broad-except
+                self._error = exc
+            finally:
+                with self._condition:
+                    self._writing = False
+                    self._condition.notify_all()
+
+    def close(self) -> None:
+        """
+        Waits for the last submitted snapshot to be written and stops the
+        worker thread. The writer cannot be used afterwards.
+        """
+        if self._closed:
+            return
+        self.flush()
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+
+    def flush(self, timeout: float | None = None) -> None:
+        """
+        Waits until the last submitted snapshot has been written.
+
+        Args:
+            timeout (float | None): Maximum number of seconds to wait. If the
+                snapshot is still not written after that, a `TimeoutError` is
+                raised.
+        """
+        with self._condition:
+            if not self._condition.wait_for(
+                lambda: not (self._pending or self._writing), timeout
+            ):
+                raise TimeoutError(
+                    "The background writer did not finish in time"
+                )
+        self._raise_if_error()
+
+    def submit(self, obj: Any) -> None:
+        """
+        Takes a snapshot of `obj` and schedules it to be written. Returns
+        immediately, i.e. without waiting for the snapshot to be written.
+        """
+        if self._closed:
+            raise ValueError("The background writer is closed")
+        self._raise_if_error()
+        snapshot = _snapshot(obj)
+        with self._condition:
+            self.dropped += len(self._pending)
+            self._pending = [snapshot]
+            self._condition.notify_all()
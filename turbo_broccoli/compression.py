@@ -0,0 +1,172 @@
+"""
+Artifact compression codecs. Artifacts (see the
+[README](https://altaris.github.io/turbo-broccoli/turbo_broccoli.html#artifacts))
+are stored raw by default. If a context has an `artifact_codec`, artifacts
+larger than `min_compression_size` bytes are compressed before being written,
+and the codec is recorded in the document that references the artifact, so
+that deserialization is transparent.
+
+Available codecs are:
+
+* `bz2`, `lzma`, `zlib`: from the standard library;
+* `lz4`: requires [`lz4`](https://pypi.org/project/lz4/);
+* `zstd`: requires [`zstandard`](https://pypi.org/project/zstandard/).
+
+Any codec can be prefixed with `shuffle+` (e.g. `shuffle+zstd`), in which case
+numerical payloads (numpy arrays and pytorch tensors) are byte-shuffled before
+compression. This usually improves compression ratios of floating point data
+significantly. Byte-shuffling requires numpy.
+"""
+
+import bz2
+import lzma
+import time
+import zlib
+from typing import Callable
+
+try:
+    import zstandard
+
+    HAS_ZSTD = True
+except ModuleNotFoundError:
+    HAS_ZSTD = False
+
+try:
+    import lz4.frame
+
+    HAS_LZ4 = True
+except ModuleNotFoundError:
+    HAS_LZ4 = False
+
+from . import stats
+from .context import Context
+
+
+def _bz2_compress(data: bytes, level: int | None) -> bytes:
+    return bz2.compress(data, 9 if level is None else level)
+
+
+def _lz4_compress(data: bytes, level: int | None) -> bytes:
+    return lz4.frame.compress(data, compression_level=level or 0)
+
+
+def _lzma_compress(data: bytes, level: int | None) -> bytes:
+    return lzma.compress(data, preset=level)
+
+
+def _zlib_compress(data: bytes, level: int | None) -> bytes:
+    return zlib.compress(data, -1 if level is None else level)
+
+
+def _zstd_compress(data: bytes, level: int | None) -> bytes:
+    return zstandard.ZstdCompressor(level=level or 3).compress(data)
+
+
+def _zstd_decompress(data: bytes) -> bytes:
+    return zstandard.ZstdDecompressor().decompress(data)
+
+
+def _codecs() -> dict[str, tuple[Callable, Callable]]:
+    """
+    Returns a dict that maps a codec name to a `(compress, decompress)` pair.
+    Codecs whose package is not installed are omitted.
+    """
+    codecs: dict[str, tuple[Callable, Callable]] = {
+        "bz2": (_bz2_compress, bz2.decompress),
+        "lzma": (_lzma_compress, lzma.decompress),
+        "zlib": (_zlib_compress, zlib.decompress),
+    }
+    if HAS_LZ4:
+        codecs["lz4"] = (_lz4_compress, lz4.frame.decompress)
+    if HAS_ZSTD:
+        codecs["zstd"] = (_zstd_compress, _zstd_decompress)
+    return codecs
+
+
+def _get_codec(codec: str) -> tuple[Callable, Callable]:
+    """Returns the `(compress, decompress)` pair of a codec"""
+    try:
+        return _codecs()[codec]
+    except KeyError as exc:
+        raise ValueError(
+            f"Unknown or unavailable artifact codec '{codec}'. Available "
+            f"codecs are: {', '.join(_codecs())}"
+        ) from exc
+
+
+def _shuffle(data: bytes, itemsize: int) -> bytes:
+    """
+    Byte-shuffles `data`, i.e. groups the first bytes of every item together,
+    then the second bytes, etc. Trailing bytes that do not form a complete
+    item are left untouched.
+    """
+    import numpy as np
+
+    n = len(data) - len(data) % itemsize
+    arr = np.frombuffer(data, dtype=np.uint8, count=n)
+    return arr.reshape(-1, itemsize).T.tobytes() + data[n:]
+
+
+def _unshuffle(data: bytes, itemsize: int) -> bytes:
+    """Inverse of `_shuffle`"""
+    import numpy as np
+
+    n = len(data) - len(data) % itemsize
+    arr = np.frombuffer(data, dtype=np.uint8, count=n)
+    return arr.reshape(itemsize, -1).T.tobytes() + data[n:]
+
+
+def compress(
+    data: bytes, ctx: Context, itemsize: int = 1
+) -> tuple[bytes, dict]:
+    """
+    Compresses an artifact payload according to the context's codec settings.
+
+    Args:
+        data (bytes): Raw artifact payload
+        ctx (Context):
+        itemsize (int, optional): Size of the items of the payload, if it is
+            numerical. Only used for byte-shuffling.
+
+    Returns:
+        A tuple containing the (possibly) compressed payload and a dict to be
+        merged in the document referencing the artifact. This dict is empty if
+        the payload was not compressed, and looks like
+
+        ```py
+        {
+            "codec": <str>,
+            "shuffle": <int>,  # Only if the payload was byte-shuffled
+        }
+        ```
+
+        otherwise.
+    """
+    if ctx.artifact_codec is None or len(data) < ctx.min_compression_size:
+        return data, {}
+    codec, meta, start = ctx.artifact_codec, {}, time.perf_counter()
+    if codec.startswith("shuffle+"):
+        codec = codec[len("shuffle+") :]
+        if itemsize > 1:
+            data, meta = _shuffle(data, itemsize), {"shuffle": itemsize}
+    f, _ = _get_codec(codec)
+    data = f(data, ctx.artifact_codec_level)
+    stats.record_compression(time.perf_counter() - start)
+    return data, {"codec": codec, **meta}
+
+
+def decompress(data: bytes, dct: dict) -> bytes:
+    """
+    Decompresses an artifact payload. `dct` is the document referencing the
+    artifact. If it doesn't have a `codec` key, then `data` is returned as is.
+    See `turbo_broccoli.compression.compress`.
+    """
+    if "codec" not in dct:
+        return data
+    _, f = _get_codec(dct["codec"])
+    start = time.perf_counter()
+    data = f(data)
+    if "shuffle" in dct:
+        data = _unshuffle(data, dct["shuffle"])
+    stats.record_compression(time.perf_counter() - start, decompression=True)
+    return data
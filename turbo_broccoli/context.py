@@ -10,6 +10,13 @@ from typing import Literal
 from uuid import uuid4
 
 from .exceptions import TypeIsNodecode
+from .stats import Stats, StatsStorage
+from .storage import (
+    LocalStorage,
+    RecordingStorage,
+    StorageBackend,
+    StorageWrapper,
+)
 
 
 def _list_of_types_to_dict(lot: list[type]) -> dict[str, type]:
@@ -20,6 +27,18 @@ def _list_of_types_to_dict(lot: list[type]) -> dict[str, type]:
     return {t.__name__: t for t in lot}
 
 
+def _wraps_stats(storage: StorageBackend, stats: Stats) -> bool:
+    """
+    Whether `storage` is (or wraps) a `turbo_broccoli.stats.StatsStorage` of
+    `stats`
+    """
+    while isinstance(storage, StorageWrapper):
+        if isinstance(storage, StatsStorage) and storage.stats is stats:
+            return True
+        storage = storage.backend
+    return False
+
+
 class Context:
     """
     (De)Serialization context, which is an object that contains various
@@ -36,18 +55,31 @@ class Context:
     take the context parameter's as kwargs.
     """
 
+    artifact_codec: str | None
+    artifact_codec_level: int | None
     artifact_path: Path
+    daemon_socket: Path | None
     dataclass_types: dict[str, type]
+    document_cache: Literal["copy", "view"] | None
     file_path: Path | None
+    incremental: bool
     json_path: str
     keras_format: str
+    large_artifact_size: int = 16 * 1024 * 1024
+    lean: bool
+    lean_lists: Literal["array", "numpy"] | None
     min_artifact_size: int = 8000
+    min_compression_size: int = 1024
+    min_embedding_size: int | None
     nacl_shared_key: bytes | None
     nodecode_types: list[str]
     pandas_format: str
     pandas_kwargs: dict
     pytorch_module_types: dict[str, type]
     compress: bool
+    reuse_artifacts: bool
+    stats: Stats | None
+    storage: StorageBackend
 
     def __init__(
         self,
@@ -79,13 +111,28 @@ class Context:
         pytorch_module_types: dict[str, type] | list[type] | None = None,
         json_path: str = "$",
         compress: bool = False,
+        artifact_codec: str | None = None,
+        artifact_codec_level: int | None = None,
+        min_compression_size: int | None = None,
+        storage: StorageBackend | None = None,
+        reuse_artifacts: bool = False,
+        large_artifact_size: int | None = None,
+        incremental: bool = False,
+        min_embedding_size: int | None = None,
+        document_cache: Literal["copy", "view"] | None = None,
+        lean: bool = False,
+        lean_lists: Literal["array", "numpy"] | None = None,
+        daemon_socket: str | Path | None = None,
+        stats: Stats | None = None,
     ) -> None:
         """
         Args:
             file_path (str | Path | None, optional): Output JSON file path.
             artifact_path (str | Path | None, optional): Artifact path.
                 Defaults to the parent directory of `file_path`, or a new
-                temporary directory if `file_path` is `None`.
+                temporary directory if `file_path` is `None`. In the latter
+                case, the directory is only created if an artifact is
+                actually written.
             min_artifact_size (int, optional): Byte strings (and everything
                 that serialize to byte strings such as numpy arrays) larget
                 than this will be stored in artifact rather than be embedded in
@@ -119,6 +166,75 @@ class Context:
             compress (bool, optional): Wether to compress the output JSON file/
                 string. Defaults to `False`. If `file_path` is provided and
                 ends in `.json.gz`, then this parameter is overrode to `True`.
+            artifact_codec (str, optional): Codec used to compress artifacts,
+                e.g. `"zstd"` or `"shuffle+zstd"`. See
+                `turbo_broccoli.compression`. Defaults to the
+                `TB_ARTIFACT_CODEC` environment variable, or no compression.
+            artifact_codec_level (int, optional): Compression level, the
+                meaning of which depends on the codec. Defaults to the codec's
+                default level.
+            min_compression_size (int, optional): Artifacts smaller than this
+                (in bytes) are never compressed. Defaults to 1024.
+            storage (turbo_broccoli.storage.StorageBackend, optional): Where
+                artifacts are read from and written to. Defaults to a
+                `turbo_broccoli.storage.LocalStorage`, i.e. the local
+                filesystem. See `turbo_broccoli.storage`.
+            reuse_artifacts (bool, optional): If `True`, objects decoded with
+                this context remember the artifacts they were loaded from, and
+                re-saving them unchanged copies (or hard links) these
+                artifacts instead of serializing the objects again. See
+                `turbo_broccoli.provenance`. Defaults to `False`.
+            large_artifact_size (int, optional): Uncompressed numpy arrays and
+                pytorch tensors larger than this (in bytes) are written to and
+                read from their artifact directly, without intermediate
+                copies. See `turbo_broccoli.artifact_io`. Defaults to the
+                `TB_LARGE_ARTIFACT_SIZE` environment variable, or 16MiB.
+            incremental (bool, optional): If `True`, numpy arrays, pytorch
+                tensors and pandas objects serialized with this context
+                remember their JSON document and artifacts, and serializing
+                them again unchanged re-uses both instead of re-encoding them.
+                Useful when the same context repeatedly saves a mostly
+                unchanged object. See `turbo_broccoli.provenance`. Defaults to
+                `False`.
+            min_embedding_size (int, optional): Plain dicts and lists (except
+                the root of the document) whose JSON representation is larger
+                than this (in bytes) are written to their own artifact, as if
+                they were `turbo_broccoli.custom.embedded.EmbeddedDict`s or
+                `turbo_broccoli.custom.embedded.EmbeddedList`s, which is also
+                what they are deserialized as. Defaults to the
+                `TB_MIN_EMBEDDING_SIZE` environment variable, or `None`, which
+                disables this behavior.
+            document_cache ("copy", "view", optional): If set,
+                `turbo_broccoli.load_json` keeps the decoded documents in a
+                process-level cache, and returns copies of the cached
+                documents (`copy`) or the cached documents themselves
+                (`view`). See `turbo_broccoli.document_cache`. Defaults to the
+                `TB_DOCUMENT_CACHE` environment variable, or `None`, which
+                disables the cache.
+            lean (bool, optional): If `True`, decoding interns dict keys and
+                short strings (see
+                [`sys.intern`](https://docs.python.org/3/library/sys.html#sys.intern)),
+                so that repeated keys and values share the same string object.
+                Reduces the memory footprint of large documents with many
+                similar records. Defaults to `False`.
+            lean_lists ("array", "numpy", optional): If set, decoded non-empty
+                lists that only contain integers (resp. only floats) are
+                converted to
+                [`array.array`](https://docs.python.org/3/library/array.html)s
+                (`array`) or numpy arrays (`numpy`) of 64-bit integers (resp.
+                floats), which are much more compact. Lists of integers that
+                don't fit in 64 bits are left as is. Only plain lists are
+                converted, not the content of other types (e.g. tuples or
+                sets). Defaults to `None`, i.e. no conversion.
+            daemon_socket (str | Path, optional): Unix socket of a
+                `turbo_broccoli.daemon`, which `turbo_broccoli.load_json` asks
+                for the decoded document before decoding it itself. Defaults
+                to the `TB_DAEMON_SOCKET` environment variable, or `None`,
+                which disables the daemon.
+            stats (turbo_broccoli.stats.Stats, optional): Collector that
+                records where the time of the (de)serialization goes, see
+                `turbo_broccoli.stats`. Defaults to `None`, i.e. no
+                instrumentation.
         """
         self.json_path = json_path
         self.file_path = (
@@ -128,10 +244,12 @@ class Context:
             if p := ENV.get("TB_ARTIFACT_PATH"):
                 self.artifact_path = Path(p)
             else:
+                # The temporary directory is only created if an artifact is
+                # actually written, see turbo_broccoli.storage.LocalStorage
                 self.artifact_path = (
                     self.file_path.parent
                     if self.file_path is not None
-                    else Path(tempfile.mkdtemp())
+                    else Path(tempfile.gettempdir()) / f"tb-{uuid4().hex}"
                 )
         else:
             self.artifact_path = Path(artifact_path)
@@ -174,6 +292,53 @@ class Context:
             )
             else compress
         )
+        self.artifact_codec = artifact_codec or ENV.get("TB_ARTIFACT_CODEC")
+        self.artifact_codec_level = artifact_codec_level
+        self.min_compression_size = (
+            min_compression_size
+            if min_compression_size is not None
+            else int(ENV.get("TB_MIN_COMPRESSION_SIZE", 1024))
+        )
+        self.reuse_artifacts = reuse_artifacts
+        self.large_artifact_size = (
+            large_artifact_size
+            if large_artifact_size is not None
+            else int(ENV.get("TB_LARGE_ARTIFACT_SIZE", 16 * 1024 * 1024))
+        )
+        self.incremental = incremental
+        self.document_cache = document_cache or (
+            ENV.get("TB_DOCUMENT_CACHE") or None  # type: ignore
+        )
+        if self.document_cache not in [None, "copy", "view"]:
+            raise ValueError(
+                f"Unknown document cache mode '{self.document_cache}'"
+            )
+        self.min_embedding_size = (
+            min_embedding_size
+            if min_embedding_size is not None
+            else (
+                int(ENV["TB_MIN_EMBEDDING_SIZE"])
+                if ENV.get("TB_MIN_EMBEDDING_SIZE")
+                else None
+            )
+        )
+        self.lean = lean
+        self.lean_lists = lean_lists
+        if self.lean_lists not in [None, "array", "numpy"]:
+            raise ValueError(f"Unknown lean list mode '{self.lean_lists}'")
+        daemon_socket = daemon_socket or ENV.get("TB_DAEMON_SOCKET") or None
+        self.daemon_socket = (
+            Path(daemon_socket) if daemon_socket is not None else None
+        )
+        self.stats = stats
+        storage = storage if storage is not None else LocalStorage()
+        if stats is not None and not _wraps_stats(storage, stats):
+            storage = StatsStorage(storage, stats)
+        if (reuse_artifacts or incremental) and not isinstance(
+            storage, RecordingStorage
+        ):
+            storage = RecordingStorage(storage)
+        self.storage = storage
 
     def __repr__(self) -> str:
         fp, ap = str(self.file_path), str(self.artifact_path)
@@ -188,9 +353,11 @@ class Context:
         attribute is `self.json_path + "." + str(x)`. Use this when you're
         going down the document.
         """
-        kwargs = self.__dict__.copy()
-        kwargs["json_path"] = self.json_path + "." + str(x)
-        return Context(**kwargs)
+        # Shallow copy, without going through __init__ again
+        result = self.__class__.__new__(self.__class__)
+        result.__dict__.update(self.__dict__)
+        result.json_path = self.json_path + "." + str(x)
+        return result
 
     def id_to_artifact_path(self, art_id: str, extension: str = "tb") -> Path:
         """
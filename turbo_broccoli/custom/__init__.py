@@ -1,9 +1,24 @@
-"""Custom type encoder and decoders, all grouped in a dedicated submodule"""
-
+"""
+Custom type encoder and decoders, all grouped in a dedicated submodule.
+
+The modules that depend on optional packages (e.g. `turbo_broccoli.custom.pytorch`
+depends on pytorch) are only imported when they are needed: when encoding an
+object whose type (or a parent type) comes from one of the packages they
+support, or when decoding a document whose `__type__` starts with their name.
+In particular, `import turbo_broccoli` does not import pytorch, tensorflow,
+etc.
+"""
+
+from functools import lru_cache
+from importlib import import_module
+from importlib.util import find_spec
+from types import ModuleType
 from typing import Any, Callable
 
 from ..context import Context
+from ..exceptions import DeserializationError
 from . import bytes as _bytes
+from . import chunked as _chunked
 from . import collections as _collections
 from . import dataclass as _dataclass
 from . import datetime as _datetime
@@ -11,73 +26,159 @@ from . import dct as _dict
 from . import embedded as _embedded
 from . import external as _external
 from . import generic as _generic
-from . import networkx as _networkx
 from . import pathlib as _pathlib
+from . import stream as _stream
 from . import uuid as _uuid
 
-try:
-    from turbo_broccoli.custom import keras as _keras
-
-    HAS_KERAS = True
-except:
-    HAS_KERAS = False
-
-try:
-    from turbo_broccoli.custom import numpy as _numpy
-
-    HAS_NUMPY = True
-except:
-    HAS_NUMPY = False
+_BACKENDS: dict[str, tuple[tuple[str, ...], tuple[str, ...]]] = {
+    "bokeh": (("bokeh",), ("bokeh",)),
+    "keras": (("tensorflow",), ("keras", "tensorflow", "tf_keras")),
+    "networkx": (("networkx",), ("networkx",)),
+    "numpy": (("joblib", "numpy", "safetensors"), ("numpy",)),
+    "pandas": (("pandas",), ("pandas",)),
+    "pytorch": (("safetensors", "torch"), ("torch",)),
+    "scipy": (("scipy",), ("scipy",)),
+    "secret": (("nacl",), ("turbo_broccoli",)),
+    "sklearn": (("sklearn",), ("sklearn",)),
+    "tensorflow": (("tensorflow",), ("tensorflow",)),
+}
+"""
+Custom modules that depend on optional packages. For each of them, the
+packages it needs, and the top-level modules of the types it can encode.
+"""
+
+_DECODERS: dict[str, ModuleType | str] = {
+    "bytes": _bytes,
+    "chunked": _chunked,
+    "datetime": _datetime,
+    "dict": _dict,
+    "external": _external,
+    "networkx": "networkx",
+    "pathlib": _pathlib,
+    "stream": _stream,
+    "uuid": _uuid,
+    "keras": "keras",
+    "numpy": "numpy",
+    "pandas": "pandas",
+    "pytorch": "pytorch",
+    "secret": "secret",
+    "tensorflow": "tensorflow",
+    "scipy": "scipy",
+    "sklearn": "sklearn",
+    "bokeh": "bokeh",
+    # Intentionally put last
+    "collections": _collections,
+    "dataclass": _dataclass,
+    "embedded": _embedded,
+}
+"""Custom modules (or names of optional ones) by `__type__` prefix"""
+
+_ENCODERS: list[ModuleType | str] = [
+    _bytes,
+    _chunked,
+    _datetime,
+    _dict,
+    _external,
+    "networkx",
+    _pathlib,
+    _stream,
+    _uuid,
+    "keras",
+    "numpy",
+    "pandas",
+    "pytorch",
+    "secret",
+    "tensorflow",
+    "scipy",
+    "sklearn",
+    "bokeh",
+    # Intentionally put last
+    _collections,
+    _dataclass,
+    _generic,
+    _embedded,
+]
+"""Custom modules (or names of optional ones), in the order they are tried"""
 
-try:
-    from turbo_broccoli.custom import pandas as _pandas
+_IMPORTED: dict[str, ModuleType | None] = {}
 
-    HAS_PANDAS = True
-except:
-    HAS_PANDAS = False
 
+def _has(name: str) -> bool:
+    """
+    Whether the packages needed by an optional custom module are installed,
+    without importing them
+    """
+    return all(find_spec(p) is not None for p in _BACKENDS[name][0])
 
-try:
-    from turbo_broccoli.custom import secret as _secret
 
-    HAS_SECRET = True
-except:
-    HAS_SECRET = False
+HAS_BOKEH = _has("bokeh")
+HAS_KERAS = _has("keras")
+HAS_NETWORKX = _has("networkx")
+HAS_NUMPY = _has("numpy")
+HAS_PANDAS = _has("pandas")
+HAS_PYTORCH = _has("pytorch")
+HAS_SCIPY = _has("scipy")
+HAS_SECRET = _has("secret")
+HAS_SKLEARN = _has("sklearn")
+HAS_TENSORFLOW = _has("tensorflow")
 
-try:
-    from turbo_broccoli.custom import tensorflow as _tensorflow
 
-    HAS_TENSORFLOW = True
-except:
-    HAS_TENSORFLOW = False
+def _import(name: str) -> ModuleType | None:
+    """
+    Imports an optional custom module, or returns `None` if it can't be
+    imported
+    """
+    if name not in _IMPORTED:
+        try:
+            _IMPORTED[name] = import_module(f"turbo_broccoli.custom.{name}")
+        except Exception:  # pylint: disable=broad-except
+            _IMPORTED[name] = None
+    return _IMPORTED[name]
 
-try:
-    from turbo_broccoli.custom import pytorch as _pytorch
 
-    HAS_PYTORCH = True
-except:
-    HAS_PYTORCH = False
+def _lazy_decoder(name: str) -> Callable[[dict, Context], Any]:
+    """
+    Decoder that imports an optional custom module the first time it is
+    called, and then forwards to its `from_json`
+    """
 
-try:
-    from turbo_broccoli.custom import scipy as _scipy
+    def _decoder(dct: dict, ctx: Context) -> Any:
+        if (module := _import(name)) is None:
+            raise DeserializationError(
+                f"Cannot decode type '{dct.get('__type__')}': "
+                f"turbo_broccoli.custom.{name} could not be imported"
+            )
+        return module.from_json(dct, ctx)
 
-    HAS_SCIPY = True
-except:
-    HAS_SCIPY = False
+    return _decoder
 
-try:
-    from turbo_broccoli.custom import sklearn as _sklearn
 
-    HAS_SKLEARN = True
-except:
-    HAS_SKLEARN = False
+@lru_cache(maxsize=1)
+def _decoders() -> dict[str, Callable[[dict, Context], Any]]:
+    """Cached result of `turbo_broccoli.custom.get_decoders`"""
+    return {
+        k: _lazy_decoder(m) if isinstance(m, str) else m.from_json
+        for k, m in _DECODERS.items()
+        if not isinstance(m, str) or _has(m)
+    }
 
-try:
-    from turbo_broccoli.custom import bokeh as _bokeh
 
-    HAS_BOKEH = True
-except:
-    HAS_BOKEH = False
+@lru_cache(maxsize=1024)
+def _encoders(t: type | None) -> list[Callable[[Any, Context], dict]]:
+    """Cached result of `turbo_broccoli.custom.get_encoders`"""
+    packages = (
+        None if t is None else {c.__module__.split(".")[0] for c in t.__mro__}
+    )
+    encoders = []
+    for m in _ENCODERS:
+        if isinstance(m, str):
+            if packages is not None and packages.isdisjoint(_BACKENDS[m][1]):
+                continue
+            if (module := _import(m)) is None:
+                continue
+            m = module
+        encoders.append(m.to_json)
+    return encoders
 
 
 def get_decoders() -> dict[str, Callable[[dict, Context], Any]]:
@@ -101,42 +202,15 @@ def get_decoders() -> dict[str, Callable[[dict, Context], Any]]:
         ...
     }
     ```
+
+    The decoders of optional custom modules import them when first called.
     """
-    decoders: dict[str, Callable[[dict, Context], Any]] = {
-        "bytes": _bytes.from_json,
-        "datetime": _datetime.from_json,
-        "dict": _dict.from_json,
-        "external": _external.from_json,
-        "networkx": _networkx.from_json,
-        "pathlib": _pathlib.from_json,
-        "uuid": _uuid.from_json,
-    }
-    if HAS_KERAS:
-        decoders["keras"] = _keras.from_json
-    if HAS_NUMPY:
-        decoders["numpy"] = _numpy.from_json
-    if HAS_PANDAS:
-        decoders["pandas"] = _pandas.from_json
-    if HAS_PYTORCH:
-        decoders["pytorch"] = _pytorch.from_json
-    if HAS_SECRET:
-        decoders["secret"] = _secret.from_json
-    if HAS_TENSORFLOW:
-        decoders["tensorflow"] = _tensorflow.from_json
-    if HAS_SCIPY:
-        decoders["scipy"] = _scipy.from_json
-    if HAS_SKLEARN:
-        decoders["sklearn"] = _sklearn.from_json
-    if HAS_BOKEH:
-        decoders["bokeh"] = _bokeh.from_json
-    # Intentionally put last
-    decoders["collections"] = _collections.from_json
-    decoders["dataclass"] = _dataclass.from_json
-    decoders["embedded"] = _embedded.from_json
-    return decoders
+    return dict(_decoders())
 
 
-def get_encoders() -> list[Callable[[Any, Context], dict]]:
+def get_encoders(
+    t: type | None = None,
+) -> list[Callable[[Any, Context], dict]]:
     """
     Returns the dict of all available encoder. An encoder is a function that
     takes an object and returns a readily vanilla JSON-serializable dict. This
@@ -152,39 +226,10 @@ def get_encoders() -> list[Callable[[Any, Context], dict]]:
 
     The encoder should raise a `turbo_broccoli.utils.TypeNotSupported` if it
     doesn't handle the kind of object it was given.
+
+    If a type `t` is given, only the encoders that may support objects of that
+    type are returned, and only the optional custom modules that support a
+    package that `t` (or one of its parent types) comes from are imported.
+    Otherwise, all optional custom modules are imported.
     """
-    encoders: list[Callable[[Any, Context], dict]] = [
-        _bytes.to_json,
-        _datetime.to_json,
-        _dict.to_json,
-        _external.to_json,
-        _networkx.to_json,
-        _pathlib.to_json,
-        _uuid.to_json,
-    ]
-    if HAS_KERAS:
-        encoders.append(_keras.to_json)
-    if HAS_NUMPY:
-        encoders.append(_numpy.to_json)
-    if HAS_PANDAS:
-        encoders.append(_pandas.to_json)
-    if HAS_PYTORCH:
-        encoders.append(_pytorch.to_json)
-    if HAS_SECRET:
-        encoders.append(_secret.to_json)
-    if HAS_TENSORFLOW:
-        encoders.append(_tensorflow.to_json)
-    if HAS_SCIPY:
-        encoders.append(_scipy.to_json)
-    if HAS_SKLEARN:
-        encoders.append(_sklearn.to_json)
-    if HAS_BOKEH:
-        encoders.append(_bokeh.to_json)
-    # Intentionally put last
-    encoders += [
-        _collections.to_json,
-        _dataclass.to_json,
-        _generic.to_json,
-        _embedded.to_json,
-    ]
-    return encoders
+    return list(_encoders(t))
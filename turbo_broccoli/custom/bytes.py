@@ -2,8 +2,10 @@
 
 from base64 import b64decode, b64encode
 from math import ceil
-from typing import Any
+from typing import Any, Iterable
 
+from ..artifact_io import read_artifact, write_artifact
+from ..compression import compress, decompress
 from ..context import Context
 from ..exceptions import DeserializationError, TypeNotSupported
 
@@ -12,8 +14,7 @@ def _bytes_from_json_v3(dct: dict, ctx: Context) -> bytes:
     if "data" in dct:
         return b64decode(dct["data"])
     path = ctx.id_to_artifact_path(dct["id"])
-    with path.open(mode="rb") as fp:
-        return fp.read()
+    return decompress(read_artifact(ctx.storage, path), dct)
 
 
 def from_json(dct: dict, ctx: Context) -> bytes | None:
@@ -26,7 +27,35 @@ def from_json(dct: dict, ctx: Context) -> bytes | None:
         raise DeserializationError() from exc
 
 
-def to_json(obj: Any, ctx: Context) -> dict:
+def buffers_to_json(
+    buffers: Iterable[Any], size: int, ctx: Context, itemsize: int = 1
+) -> dict:
+    """
+    Same as `turbo_broccoli.custom.bytes.to_json`, but the payload is the
+    concatenation of `buffers`, which are bytes-like objects whose sizes add
+    up to `size` bytes. If the payload is written to an uncompressed
+    artifact, the buffers are written one after the other without being
+    concatenated in memory.
+    """
+    # https://stackoverflow.com/a/32140193
+    b64_size = (ceil((size * 4) / 3) + 3) & ~3
+    if b64_size <= ctx.min_artifact_size:
+        return {
+            "__type__": "bytes",
+            "__version__": 3,
+            "data": b64encode(b"".join(buffers)).decode("ascii"),
+        }
+    path, name = ctx.new_artifact_path()
+    if ctx.artifact_codec is None or size < ctx.min_compression_size:
+        write_artifact(ctx.storage, path, buffers, size)
+        meta: dict = {}
+    else:
+        data, meta = compress(b"".join(buffers), ctx, itemsize)
+        ctx.storage.write(path, data)
+    return {"__type__": "bytes", "__version__": 3, "id": name, **meta}
+
+
+def to_json(obj: Any, ctx: Context, itemsize: int = 1) -> dict:
     """
     Serializes a Python `bytes` object into JSON using a base64 + ASCII
     scheme. The return dict has the following structure
@@ -49,20 +78,12 @@ def to_json(obj: Any, ctx: Context) -> dict:
     }
     ```
 
-    if the base64 encoding of the object is too large.
-
+    if the base64 encoding of the object is too large. In this case, if the
+    context has an `artifact_codec`, the artifact may be compressed, and the
+    document has additional `codec` and `shuffle` keys, see
+    `turbo_broccoli.compression.compress`. The `itemsize` argument is only
+    used for byte-shuffling.
     """
     if not isinstance(obj, bytes):
         raise TypeNotSupported()
-    # https://stackoverflow.com/a/32140193
-    b64_size = (ceil((len(obj) * 4) / 3) + 3) & ~3
-    if b64_size <= ctx.min_artifact_size:
-        return {
-            "__type__": "bytes",
-            "__version__": 3,
-            "data": b64encode(obj).decode("ascii"),
-        }
-    path, name = ctx.new_artifact_path()
-    with path.open(mode="wb") as fp:
-        fp.write(obj)
-    return {"__type__": "bytes", "__version__": 3, "id": name}
+    return buffers_to_json([obj], len(obj), ctx, itemsize)
@@ -0,0 +1,266 @@
+"""
+Chunked lists, for long lists that need random access:
+
+```py
+import turbo_broccoli as tb
+
+predictions = tb.ChunkedList(chunk_size=10_000)
+for x in dataset:
+    predictions.append(model(x))
+tb.save_json({"predictions": predictions}, "out/predictions.json")
+
+predictions = tb.load_json("out/predictions.json")["predictions"]
+predictions[5_000_000]  # Only decodes the chunk containing this element
+predictions[10:20]  # Same, returns a list
+```
+
+A `ChunkedList` is stored as a sequence of chunks of `chunk_size` elements,
+each in its own JSON artefact (the last chunk may be shorter). When a
+`ChunkedList` is deserialized, no chunk is actually read. Chunks are read and
+decoded when elements are accessed, and the last few decoded chunks are kept
+in memory. Appending elements or setting an element only modifies one chunk,
+and when the list is serialized again to the same file, only the modified
+chunks are written. Serializing it to another file writes all chunks.
+Removing or inserting elements is not supported.
+"""
+
+import copy
+from collections import OrderedDict
+from typing import Any, Iterable, Iterator, Sequence, overload
+
+from ..compression import compress, decompress
+from ..context import Context
+from ..exceptions import DeserializationError, TypeNotSupported
+
+
+class ChunkedList(Sequence):
+    """See module documentation"""
+
+    cache_size: int
+    """Maximum number of unmodified decoded chunks kept in memory"""
+    chunk_size: int
+
+    _cache: OrderedDict[int, list]
+    _ctx: Context | None
+    _dirty: dict[int, list]
+    _length: int
+    _refs: list[dict | None]
+
+    def __deepcopy__(self, memo: dict) -> "ChunkedList":
+        """
+        Deep copy that shares the context (and therefore the storage) of the
+        list, which chunk artefacts are read from
+        """
+        result = copy.copy(self)
+        memo[id(self)] = result
+        for k, v in self.__dict__.items():
+            if k != "_ctx":
+                setattr(result, k, copy.deepcopy(v, memo))
+        return result
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, (ChunkedList, list)):
+            return len(self) == len(other) and all(
+                a == b for a, b in zip(self, other)
+            )
+        return NotImplemented
+
+    @overload
+    def __getitem__(self, index: int) -> Any: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list: ...
+
+    def __getitem__(self, index: int | slice) -> Any:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._length)
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            result: list = []
+            while start < stop:
+                c, i = divmod(start, self.chunk_size)
+                chunk = self._chunk(c)
+                result += chunk[i : i + stop - start]
+                start += len(chunk) - i
+            return result
+        c, i = divmod(self._index(index), self.chunk_size)
+        return self._chunk(c)[i]
+
+    def __init__(
+        self,
+        iterable: Iterable = (),
+        chunk_size: int = 1000,
+        cache_size: int = 4,
+    ) -> None:
+        """
+        Args:
+            iterable (Iterable, optional): Initial elements
+            chunk_size (int, optional): Number of elements per chunk
+            cache_size (int, optional): Maximum number of unmodified decoded
+                chunks kept in memory
+        """
+        if chunk_size < 1:
+            raise ValueError("The chunk size must be positive")
+        self.cache_size, self.chunk_size = cache_size, chunk_size
+        self._cache, self._ctx, self._dirty = OrderedDict(), None, {}
+        self._length, self._refs = 0, []
+        self.extend(iterable)
+
+    def __iter__(self) -> Iterator[Any]:
+        for c in range(len(self._refs)):
+            yield from self._chunk(c)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __repr__(self) -> str:
+        return (
+            f"ChunkedList(length={self._length}, chunk_size={self.chunk_size})"
+        )
+
+    def __setitem__(self, index: int, value: Any) -> None:
+        c, i = divmod(self._index(index), self.chunk_size)
+        self._modify(c)[i] = value
+
+    def _chunk(self, c: int, cache: bool = True) -> list:
+        """
+        Returns the `c`-th chunk, reading and decoding it if necessary. If
+        `cache` is `False`, a chunk that had to be read is not kept in memory.
+        """
+        if c in self._dirty:
+            return self._dirty[c]
+        if c in self._cache:
+            self._cache.move_to_end(c)
+            return self._cache[c]
+        from turbo_broccoli.turbo_broccoli import from_json as _from_json
+
+        ref = self._refs[c]
+        assert self._ctx is not None and ref is not None
+        path = self._ctx.id_to_artifact_path(ref["id"], extension="json")
+        data = decompress(self._ctx.storage.read(path), ref)
+        chunk = _from_json(data.decode("utf-8"), self._ctx)
+        if not cache:
+            return chunk
+        self._cache[c] = chunk
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return chunk
+
+    def _index(self, index: int) -> int:
+        """Normalizes a (possibly negative) index"""
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("ChunkedList index out of range")
+        return index
+
+    def _modify(self, c: int) -> list:
+        """
+        Returns the `c`-th chunk and marks it as modified, so that it is kept
+        in memory and written again when the list is serialized.
+        """
+        if c not in self._dirty:
+            self._dirty[c] = (
+                list(self._chunk(c)) if self._refs[c] is not None else []
+            )
+            self._cache.pop(c, None)
+            self._refs[c] = None
+        return self._dirty[c]
+
+    def append(self, value: Any) -> None:
+        """Appends an element. Only the last chunk is modified."""
+        c, i = divmod(self._length, self.chunk_size)
+        if i == 0:
+            self._refs.append(None)
+        self._modify(c).append(value)
+        self._length += 1
+
+    def extend(self, values: Iterable) -> None:
+        """Appends elements"""
+        for v in values:
+            self.append(v)
+
+
+def _chunked_list_to_json(obj: ChunkedList, ctx: Context) -> dict:
+    from turbo_broccoli.turbo_broccoli import to_json as _to_json
+
+    refs: list[dict] = []
+    for c, ref in enumerate(obj._refs):
+        if ref is not None and ctx.storage.exists(
+            ctx.id_to_artifact_path(ref["id"], extension="json")
+        ):
+            # Unmodified chunk that is already there, and so are the artefacts
+            # it references (if any)
+            refs.append(ref)
+            continue
+        # Modified chunk, or unmodified chunk saved elsewhere. In the latter
+        # case, it is re-encoded rather than copied, since the artefacts it
+        # references must be written to ctx's artifact path too.
+        path, name = ctx.new_artifact_path(extension="json")
+        data, meta = compress(
+            _to_json(obj._chunk(c), ctx).encode("utf-8"), ctx
+        )
+        ctx.storage.write(path, data)
+        refs.append({"id": name, **meta})
+    # All chunks are now in the artifact path of ctx
+    obj._cache.update(obj._dirty)
+    obj._ctx, obj._dirty, obj._refs = ctx, {}, list(refs)
+    while len(obj._cache) > obj.cache_size:
+        obj._cache.popitem(last=False)
+    return {
+        "__type__": "chunked.list",
+        "__version__": 1,
+        "chunk_size": obj.chunk_size,
+        "length": len(obj),
+        "chunks": refs,
+    }
+
+
+def _json_to_chunked_list(dct: dict, ctx: Context) -> ChunkedList:
+    decoders = {
+        1: _json_to_chunked_list_v1,
+    }
+    return decoders[dct["__version__"]](dct, ctx)
+
+
+def _json_to_chunked_list_v1(dct: dict, ctx: Context) -> ChunkedList:
+    obj = ChunkedList(chunk_size=dct["chunk_size"])
+    obj._ctx, obj._length = ctx, dct["length"]
+    obj._refs = list(dct["chunks"])
+    return obj
+
+
+def from_json(dct: dict, ctx: Context) -> Any:
+    decoders = {
+        "chunked.list": _json_to_chunked_list,
+    }
+    try:
+        type_name = dct["__type__"]
+        return decoders[type_name](dct, ctx)
+    except KeyError as exc:
+        raise DeserializationError() from exc
+
+
+def to_json(obj: Any, ctx: Context) -> dict:
+    """
+    Serializes a `ChunkedList` into JSON. The return dict has the following
+    structure
+
+    ```py
+    {
+        "__type__": "chunked.list",
+        "__version__": 1,
+        "chunk_size": <int>,
+        "length": <int>,
+        "chunks": [{"id": <uuid4>}, ...],
+    }
+    ```
+
+    where the UUIDs point to the artefacts containing the chunks, in order.
+    Element `i` is in chunk `i // chunk_size`. If the context has an
+    `artifact_codec`, a chunk's artefact may be compressed, in which case its
+    dict has an additional `codec` key.
+    """
+    if isinstance(obj, ChunkedList):
+        return _chunked_list_to_json(obj, ctx)
+    raise TypeNotSupported()
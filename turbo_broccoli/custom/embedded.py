@@ -4,11 +4,18 @@ Embedded JSON documents.
 Serializing a `EmbeddedDict` or a `EmbeddedList` will (unconditionally) result
 in its own JSON artefact being created and referenced by the main JSON
 document.
+
+If the context has a `min_embedding_size`, plain dicts and lists whose JSON
+representation is larger than that are also written to their own artefact,
+and are deserialized as `EmbeddedDict`s and `EmbeddedList`s. See
+`turbo_broccoli.custom.embedded.embed`.
 """
 
+import json
 from pathlib import Path
 from typing import Any, Callable, Tuple
 
+from ..compression import compress, decompress
 from ..context import Context
 from ..exceptions import DeserializationError, TypeNotSupported
 
@@ -46,10 +53,10 @@ def _embedded_dict_to_json(obj: EmbeddedDict, ctx: Context) -> dict:
     from turbo_broccoli.turbo_broccoli import to_json as _to_json
 
     path, name = _get_artifact_path(obj, ctx)
-    with path.open("w", encoding="utf-8") as fp:
-        fp.write(_to_json(dict(obj), ctx))
+    data, meta = compress(_to_json(dict(obj), ctx).encode("utf-8"), ctx)
+    ctx.storage.write(path, data)
     obj._tb_artifact_id = name
-    return {"__type__": "embedded.dict", "__version__": 1, "id": name}
+    return {"__type__": "embedded.dict", "__version__": 1, "id": name, **meta}
 
 
 # TODO: deduplicate with _embedded_dict_to_json
@@ -57,10 +64,10 @@ def _embedded_list_to_json(obj: EmbeddedList, ctx: Context) -> dict:
     from turbo_broccoli.turbo_broccoli import to_json as _to_json
 
     path, name = _get_artifact_path(obj, ctx)
-    with path.open("w", encoding="utf-8") as fp:
-        fp.write(_to_json(list(obj), ctx))
+    data, meta = compress(_to_json(list(obj), ctx).encode("utf-8"), ctx)
+    ctx.storage.write(path, data)
     obj._tb_artifact_id = name
-    return {"__type__": "embedded.list", "__version__": 1, "id": name}
+    return {"__type__": "embedded.list", "__version__": 1, "id": name, **meta}
 
 
 def _json_to_embedded_dict(dct: dict, ctx: Context) -> EmbeddedDict:
@@ -74,8 +81,8 @@ def _json_to_embedded_dict_v1(dct: dict, ctx: Context) -> EmbeddedDict:
     from turbo_broccoli.turbo_broccoli import from_json as _from_json
 
     path = ctx.id_to_artifact_path(dct["id"], extension="json")
-    with path.open("r", encoding="utf-8") as fp:
-        obj = EmbeddedDict(_from_json(fp.read(), ctx))
+    data = decompress(ctx.storage.read(path), dct).decode("utf-8")
+    obj = EmbeddedDict(_from_json(data, ctx))
     obj._tb_artifact_id = dct["id"]
     return obj
 
@@ -92,12 +99,30 @@ def _json_to_embedded_list_v1(dct: dict, ctx: Context) -> EmbeddedList:
     from turbo_broccoli.turbo_broccoli import from_json as _from_json
 
     path = ctx.id_to_artifact_path(dct["id"], extension="json")
-    with path.open("r", encoding="utf-8") as fp:
-        obj = EmbeddedList(_from_json(fp.read(), ctx))
+    data = decompress(ctx.storage.read(path), dct).decode("utf-8")
+    obj = EmbeddedList(_from_json(data, ctx))
     obj._tb_artifact_id = dct["id"]
     return obj
 
 
+def embed(obj: dict | list, ctx: Context) -> Any:
+    """
+    Takes an already encoded dict or list (i.e. the output of
+    `turbo_broccoli.turbo_broccoli._to_jsonable`). If its JSON representation
+    is at least `ctx.min_embedding_size` bytes long, writes it to its own
+    artefact and returns an `embedded.dict` or `embedded.list` document
+    pointing to it. Otherwise, returns `obj` as is.
+    """
+    raw = json.dumps(obj).encode("utf-8")
+    if ctx.min_embedding_size is None or len(raw) < ctx.min_embedding_size:
+        return obj
+    path, name = ctx.new_artifact_path(extension="json")
+    data, meta = compress(raw, ctx)
+    ctx.storage.write(path, data)
+    t = "embedded.dict" if isinstance(obj, dict) else "embedded.list"
+    return {"__type__": t, "__version__": 1, "id": name, **meta}
+
+
 def from_json(dct: dict, ctx: Context) -> Any:
     decoders = {
         "embedded.dict": _json_to_embedded_dict,
@@ -133,7 +158,9 @@ def to_json(obj: Any, ctx: Context) -> dict:
     }
     ```
 
-    where the UUID points to the artefact containing the actual data.
+    where the UUID points to the artefact containing the actual data. If the
+    context has an `artifact_codec`, the artefact may be compressed, in which
+    case the document has an additional `codec` key.
     """
     encoders: list[Tuple[type, Callable[[Any, Context], dict]]] = [
         (EmbeddedDict, _embedded_dict_to_json),
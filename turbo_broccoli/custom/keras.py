@@ -310,7 +310,8 @@ def _json_to_model_v5(dct: dict, ctx: Context) -> Any:
         if ctx.keras_format == "keras"
         else ctx.id_to_artifact_path(dct["id"])
     )
-    return keras.models.load_model(path)
+    with ctx.storage.local_path(path, "rb") as local:
+        return keras.models.load_model(local)
 
 
 def _json_to_optimizer(dct: dict, ctx: Context) -> Any:
@@ -365,7 +366,8 @@ def _model_to_json(model: keras.Model, ctx: Context) -> dict:
         path, name = ctx.new_artifact_path(extension="keras")
     else:
         path, name = ctx.new_artifact_path()
-    model.save(path, save_format=ctx.keras_format)
+    with ctx.storage.local_path(path, "wb") as local:
+        model.save(local, save_format=ctx.keras_format)
     return {
         "__type__": "keras.model",
         "__version__": 5,
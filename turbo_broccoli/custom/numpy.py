@@ -5,14 +5,59 @@ Todo:
     Handle numpy's `generic` type (which supersedes the `number` type).
 """
 
-from typing import Any, Callable, Tuple
+import sys
+from io import BytesIO
+from typing import Any, Callable, Iterator, Tuple
 
 import joblib
 import numpy as np
 from safetensors import numpy as st
 
+from ..artifact_io import (
+    CHUNK_SIZE,
+    open_artifact,
+    read_tensor_header,
+    readinto,
+    tensor_buffers,
+    write_artifact,
+)
+from ..compression import compress, decompress
 from ..context import Context
 from ..exceptions import DeserializationError, TypeNotSupported
+from .bytes import buffers_to_json
+from .bytes import to_json as _bytes_to_json
+
+_SAFETENSORS_DTYPES = {
+    "b1": "BOOL",
+    "f2": "F16",
+    "f4": "F32",
+    "f8": "F64",
+    "i1": "I8",
+    "i2": "I16",
+    "i4": "I32",
+    "i8": "I64",
+    "u1": "U8",
+    "u2": "U16",
+    "u4": "U32",
+    "u8": "U64",
+}
+"""Maps numpy dtype kinds and sizes to safetensors dtypes"""
+
+
+def _ndarray_buffers(arr: np.ndarray) -> Iterator[np.ndarray]:
+    """
+    Yields the content of `arr` in C order as contiguous byte arrays. If `arr`
+    is not C-contiguous, it is copied in slices of about `CHUNK_SIZE` bytes
+    along its first axis rather than all at once.
+    """
+    if arr.flags.c_contiguous:
+        yield arr.reshape(-1).view(np.uint8)
+        return
+    step = max(1, CHUNK_SIZE // max(1, arr[0].nbytes))
+    for i in range(0, len(arr), step):
+        yield (
+            np.ascontiguousarray(arr[i : i + step]).reshape(-1).view(np.uint8)
+        )
 
 
 def _json_to_dtype(dct: dict, ctx: Context) -> np.dtype:
@@ -30,6 +75,7 @@ def _json_to_ndarray(dct: dict, ctx: Context) -> np.ndarray:
     ctx.raise_if_nodecode("bytes")
     decoders = {
         5: _json_to_ndarray_v5,
+        6: _json_to_ndarray_v6,
     }
     return decoders[dct["__version__"]](dct, ctx)
 
@@ -38,6 +84,16 @@ def _json_to_ndarray_v5(dct: dict, ctx: Context) -> np.ndarray:
     return st.load(dct["data"])["data"]
 
 
+def _json_to_ndarray_v6(dct: dict, ctx: Context) -> np.ndarray:
+    dtypes = {v: k for k, v in _SAFETENSORS_DTYPES.items()}
+    path = ctx.id_to_artifact_path(dct["id"])
+    with open_artifact(ctx.storage, path) as fp:
+        dtype, shape = read_tensor_header(fp)
+        arr = np.empty(shape, dtype="<" + dtypes[dtype])
+        readinto(fp, arr.reshape(-1).view(np.uint8))
+    return arr
+
+
 def _json_to_number(dct: dict, ctx: Context) -> np.number:
     decoders = {
         3: _json_to_number_v3,
@@ -57,7 +113,11 @@ def _json_to_random_state(dct: dict, ctx: Context) -> np.number:
 
 
 def _json_to_random_state_v3(dct: dict, ctx: Context) -> np.number:
-    return joblib.load(ctx.id_to_artifact_path(dct["data"]))
+    path = ctx.id_to_artifact_path(dct["data"])
+    if "codec" not in dct:
+        with ctx.storage.open(path, "rb") as fp:
+            return joblib.load(fp)
+    return joblib.load(BytesIO(decompress(ctx.storage.read(path), dct)))
 
 
 def _dtype_to_json(d: np.dtype, ctx: Context) -> dict:
@@ -69,10 +129,26 @@ def _dtype_to_json(d: np.dtype, ctx: Context) -> dict:
 
 
 def _ndarray_to_json(arr: np.ndarray, ctx: Context) -> dict:
+    dtype = _SAFETENSORS_DTYPES.get(f"{arr.dtype.kind}{arr.dtype.itemsize}")
+    if dtype is None or not arr.dtype.isnative or sys.byteorder != "little":
+        return {
+            "__type__": "numpy.ndarray",
+            "__version__": 5,
+            "data": _bytes_to_json(
+                st.save({"data": arr}), ctx / "data", arr.itemsize
+            ),
+        }
+    buffers, size = tensor_buffers(
+        dtype, list(arr.shape), _ndarray_buffers(arr), arr.nbytes
+    )
+    if ctx.artifact_codec is None and arr.nbytes >= ctx.large_artifact_size:
+        path, name = ctx.new_artifact_path()
+        write_artifact(ctx.storage, path, buffers, size)
+        return {"__type__": "numpy.ndarray", "__version__": 6, "id": name}
     return {
         "__type__": "numpy.ndarray",
         "__version__": 5,
-        "data": st.save({"data": arr}),
+        "data": buffers_to_json(buffers, size, ctx / "data", arr.itemsize),
     }
 
 
@@ -90,12 +166,20 @@ def _number_to_json(num: np.number, ctx: Context) -> dict:
 
 def _random_state_to_json(obj: np.random.RandomState, ctx: Context) -> dict:
     path, name = ctx.new_artifact_path()
-    with path.open(mode="wb") as fp:
-        joblib.dump(obj, fp)
+    meta: dict = {}
+    if ctx.artifact_codec is None:
+        with ctx.storage.open(path, "wb") as fp:
+            joblib.dump(obj, fp)
+    else:
+        buf = BytesIO()
+        joblib.dump(obj, buf)
+        data, meta = compress(buf.getvalue(), ctx)
+        ctx.storage.write(path, data)
     return {
         "__type__": "numpy.random_state",
         "__version__": 3,
         "data": name,
+        **meta,
     }
 
 
@@ -139,7 +223,20 @@ def to_json(obj: Any, ctx: Context) -> dict:
         }
         ```
 
-      see `turbo_broccoli.custom.bytes.to_json`.
+      see `turbo_broccoli.custom.bytes.to_json`. Arrays larger than the
+      context's `large_artifact_size` (and that are not compressed) are
+      instead stored as
+
+        ```py
+        {
+            "__type__": "numpy.ndarray",
+            "__version__": 6,
+            "id": <uuid4>,
+        }
+        ```
+
+      where the artifact is a safetensors file that is read directly into
+      the deserialized array, see `turbo_broccoli.artifact_io`.
 
     - `numpy.number`:
 
@@ -174,6 +271,9 @@ def to_json(obj: Any, ctx: Context) -> dict:
         }
         ```
 
+      If the context has an `artifact_codec`, the artifact may be compressed,
+      in which case the document has an additional `codec` key.
+
     """
     encoders: list[Tuple[type, Callable[[Any, Context], dict]]] = [
         (np.ndarray, _ndarray_to_json),
@@ -9,6 +9,11 @@ import pandas as pd
 from ..context import Context
 from ..exceptions import DeserializationError, TypeNotSupported
 
+_PATH_ONLY_FORMATS = ["h5", "hdf", "html", "latex"]
+"""
+Pandas formats that cannot be written to or read from a binary file object
+"""
+
 
 def _dataframe_to_json(df: pd.DataFrame, ctx: Context) -> dict:
     dtypes = [[str(k), v.name] for k, v in df.dtypes.items()]
@@ -21,7 +26,12 @@ def _dataframe_to_json(df: pd.DataFrame, ctx: Context) -> dict:
         }
     fmt = ctx.pandas_format
     path, name = ctx.new_artifact_path()
-    getattr(df, f"to_{fmt}")(path, **ctx.pandas_kwargs)
+    if fmt in _PATH_ONLY_FORMATS:
+        with ctx.storage.local_path(path, "wb") as local:
+            getattr(df, f"to_{fmt}")(local, **ctx.pandas_kwargs)
+    else:
+        with ctx.storage.open(path, "wb") as fp:
+            getattr(df, f"to_{fmt}")(fp, **ctx.pandas_kwargs)
     return {
         "__type__": "pandas.dataframe",
         "__version__": 2,
@@ -45,9 +55,14 @@ def _json_to_dataframe_v2(dct: dict, ctx: Context) -> pd.DataFrame:
         fmt = dct["format"]
         path = ctx.id_to_artifact_path(dct["id"])
         if fmt in ["h5", "hdf"]:
-            df = pd.read_hdf(path, "main")
+            with ctx.storage.local_path(path, "rb") as local:
+                df = pd.read_hdf(local, "main")
+        elif fmt in _PATH_ONLY_FORMATS:
+            with ctx.storage.local_path(path, "rb") as local:
+                df = getattr(pd, f"read_{fmt}")(local)
         else:
-            df = getattr(pd, f"read_{fmt}")(path)
+            with ctx.storage.open(path, "rb") as fp:
+                df = getattr(pd, f"read_{fmt}")(fp)
     # Rename columns with non-string names
     # df.rename({str(d[0]): d[0] for d in dct["dtypes"]}, inplace=True)
     df = df.astype(
@@ -1,14 +1,39 @@
 """Pytorch (de)serialization utilities."""
 
+import sys
 from typing import Any, Callable, Tuple
 
 import safetensors.torch as st
+import torch
 from torch import Tensor
 from torch.nn import Module
 from torch.utils.data import ConcatDataset, StackDataset, Subset, TensorDataset
 
+from ..artifact_io import (
+    open_artifact,
+    read_tensor_header,
+    readinto,
+    tensor_buffers,
+    write_artifact,
+)
 from ..context import Context
 from ..exceptions import DeserializationError, TypeNotSupported
+from .bytes import buffers_to_json
+from .bytes import to_json as _bytes_to_json
+
+_SAFETENSORS_DTYPES = {
+    torch.bool: "BOOL",
+    torch.bfloat16: "BF16",
+    torch.float16: "F16",
+    torch.float32: "F32",
+    torch.float64: "F64",
+    torch.int8: "I8",
+    torch.int16: "I16",
+    torch.int32: "I32",
+    torch.int64: "I64",
+    torch.uint8: "U8",
+}
+"""Maps pytorch dtypes to safetensors dtypes"""
 
 
 def _concatdataset_to_json(obj: ConcatDataset, ctx: Context) -> dict:
@@ -70,6 +95,7 @@ def _json_to_tensor(dct: dict, ctx: Context) -> Tensor:
     ctx.raise_if_nodecode("bytes")
     decoders = {
         3: _json_to_tensor_v3,
+        4: _json_to_tensor_v4,
     }
     return decoders[dct["__version__"]](dct, ctx)
 
@@ -79,6 +105,16 @@ def _json_to_tensor_v3(dct: dict, ctx: Context) -> Tensor:
     return Tensor() if data is None else st.load(data)["data"]
 
 
+def _json_to_tensor_v4(dct: dict, ctx: Context) -> Tensor:
+    dtypes = {v: k for k, v in _SAFETENSORS_DTYPES.items()}
+    path = ctx.id_to_artifact_path(dct["id"])
+    with open_artifact(ctx.storage, path) as fp:
+        dtype, shape = read_tensor_header(fp)
+        x = torch.empty(shape, dtype=dtypes[dtype])
+        readinto(fp, x.reshape(-1).view(torch.uint8).numpy())
+    return x
+
+
 def _json_to_tensordataset(dct: dict, ctx: Context) -> TensorDataset:
     decoders = {1: _json_to_tensordataset_v1}
     return decoders[dct["__version__"]](dct, ctx)
@@ -115,10 +151,31 @@ def _subset_to_json(obj: Subset, ctx: Context) -> dict:
 
 def _tensor_to_json(tens: Tensor, ctx: Context) -> dict:
     x = tens.detach().cpu().contiguous()
+    if x.numel() == 0:
+        return {"__type__": "pytorch.tensor", "__version__": 3, "data": None}
+    if x.dtype not in _SAFETENSORS_DTYPES or sys.byteorder != "little":
+        return {
+            "__type__": "pytorch.tensor",
+            "__version__": 3,
+            "data": _bytes_to_json(
+                st.save({"data": x}), ctx / "data", x.element_size()
+            ),
+        }
+    nbytes = x.numel() * x.element_size()
+    buffers, size = tensor_buffers(
+        _SAFETENSORS_DTYPES[x.dtype],
+        list(x.shape),
+        [x.reshape(-1).view(torch.uint8).numpy()],
+        nbytes,
+    )
+    if ctx.artifact_codec is None and nbytes >= ctx.large_artifact_size:
+        path, name = ctx.new_artifact_path()
+        write_artifact(ctx.storage, path, buffers, size)
+        return {"__type__": "pytorch.tensor", "__version__": 4, "id": name}
     return {
         "__type__": "pytorch.tensor",
         "__version__": 3,
-        "data": st.save({"data": x}) if x.numel() > 0 else None,
+        "data": buffers_to_json(buffers, size, ctx / "data", x.element_size()),
     }
 
 
@@ -165,7 +222,20 @@ def to_json(obj: Any, ctx: Context) -> dict:
         }
         ```
 
-      see `turbo_broccoli.custom.bytes.to_json`.
+      see `turbo_broccoli.custom.bytes.to_json`. Tensors larger than the
+      context's `large_artifact_size` (and that are not compressed) are
+      instead stored as
+
+        ```py
+        {
+            "__type__": "pytorch.tensor",
+            "__version__": 4,
+            "id": <uuid4>,
+        }
+        ```
+
+      where the artifact is a safetensors file that is read directly into
+      the deserialized tensor, see `turbo_broccoli.artifact_io`.
 
     - Module:
 
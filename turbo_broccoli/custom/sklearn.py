@@ -1,5 +1,6 @@
 """Scikit-learn estimators"""
 
+from io import BytesIO
 from typing import Any, Callable, Tuple
 
 # Sklearn recommends joblib rather than direct pickle
@@ -45,6 +46,7 @@ from sklearn import (
 from sklearn.base import BaseEstimator
 from sklearn.tree._tree import Tree
 
+from ..compression import compress, decompress
 from ..context import Context
 from ..exceptions import DeserializationError, TypeNotSupported
 
@@ -164,11 +166,20 @@ def _sklearn_to_raw(obj: Any, ctx: Context) -> dict:
         `joblib` can't dump to a string.
     """
     path, name = ctx.new_artifact_path()
-    joblib.dump(obj, path)
+    meta: dict = {}
+    if ctx.artifact_codec is None:
+        with ctx.storage.open(path, "wb") as fp:
+            joblib.dump(obj, fp)
+    else:
+        buf = BytesIO()
+        joblib.dump(obj, buf)
+        data, meta = compress(buf.getvalue(), ctx)
+        ctx.storage.write(path, data)
     return {
         "__type__": "sklearn.raw",
         "__version__": 2,
         "data": name,
+        **meta,
     }
 
 
@@ -189,7 +200,11 @@ def _json_raw_to_sklearn(dct: dict, ctx: Context) -> Any:
 
 
 def _json_raw_to_sklearn_v2(dct: dict, ctx: Context) -> Any:
-    return joblib.load(ctx.id_to_artifact_path(dct["data"]))
+    path = ctx.id_to_artifact_path(dct["data"])
+    if "codec" not in dct:
+        with ctx.storage.open(path, "rb") as fp:
+            return joblib.load(fp)
+    return joblib.load(BytesIO(decompress(ctx.storage.read(path), dct)))
 
 
 def _json_to_sklearn_estimator(dct: dict, ctx: Context) -> BaseEstimator:
@@ -251,7 +266,9 @@ def to_json(obj: BaseEstimator, ctx: Context) -> dict:
         }
         ```
 
-      where the UUID4 value points to an pickle file artifact.
+      where the UUID4 value points to an pickle file artifact. If the context
+      has an `artifact_codec`, the artifact may be compressed, in which case
+      the document has an additional `codec` key.
     """
 
     encoders: list[Tuple[type, Callable[[Any, Context], dict]]] = [
@@ -0,0 +1,143 @@
+"""
+Streams, for serializing iterables (e.g. generators) that are too large to be
+held in memory:
+
+```py
+import turbo_broccoli as tb
+
+
+def samples():
+    for x in dataset:
+        yield process(x)
+
+
+tb.save_json({"samples": tb.Stream(samples())}, "out/samples.json")
+
+document = tb.load_json("out/samples.json")
+for sample in document["samples"]:  # Samples are decoded one at a time
+    ...
+```
+
+When a `Stream` is serialized, the items of the wrapped iterable are encoded
+and written one by one to a [JSON lines](https://jsonlines.org/) artefact as
+they are produced, so that they never all are in memory at the same time.
+Note that this consumes the iterable. Stream artefacts are not compressed.
+
+A deserialized `Stream` is a lazy iterable that reads and decodes items from
+the artefact one at a time, every time it is iterated over. After a `Stream`
+has been serialized, it also iterates over its artefact rather than over the
+(consumed) wrapped iterable. Serializing it again to the same file doesn't
+write anything new, and serializing it to another file re-encodes its items
+one at a time.
+"""
+
+import copy
+import json
+from typing import Any, Iterable, Iterator
+
+from ..context import Context
+from ..exceptions import DeserializationError, TypeNotSupported
+
+
+class Stream:
+    """See module documentation"""
+
+    _ctx: Context | None = None
+    _id: str | None = None
+    _iterable: Iterable
+
+    def __deepcopy__(self, memo: dict) -> "Stream":
+        """
+        Deep copy that shares the context (and therefore the storage) of the
+        stream, which its artefact is read from
+        """
+        result = copy.copy(self)
+        memo[id(self)] = result
+        result._iterable = copy.deepcopy(self._iterable, memo)
+        return result
+
+    def __init__(self, iterable: Iterable = ()) -> None:
+        self._iterable = iterable
+
+    def __iter__(self) -> Iterator[Any]:
+        if self._ctx is None or self._id is None:
+            yield from self._iterable
+            return
+        from turbo_broccoli.turbo_broccoli import from_json as _from_json
+
+        path = self._ctx.id_to_artifact_path(self._id, extension="jsonl")
+        with self._ctx.storage.open(path, "rb") as fp:
+            for line in fp:
+                yield _from_json(line.decode("utf-8"), self._ctx)
+
+    def __repr__(self) -> str:
+        return f"Stream({self._id or self._iterable!r})"
+
+
+def _json_to_stream(dct: dict, ctx: Context) -> Stream:
+    decoders = {
+        1: _json_to_stream_v1,
+    }
+    return decoders[dct["__version__"]](dct, ctx)
+
+
+def _json_to_stream_v1(dct: dict, ctx: Context) -> Stream:
+    obj = Stream()
+    obj._ctx, obj._id = ctx, dct["id"]
+    return obj
+
+
+def _stream_to_json(obj: Stream, ctx: Context) -> dict:
+    from turbo_broccoli.turbo_broccoli import to_json as _to_json
+
+    if (
+        obj._ctx is not None
+        and obj._id is not None
+        and ctx.storage.exists(
+            ctx.id_to_artifact_path(obj._id, extension="jsonl")
+        )
+    ):
+        # Already backed by an artefact that is there, and so are the
+        # artefacts its items reference (if any)
+        return {"__type__": "stream", "__version__": 1, "id": obj._id}
+    # If the stream is backed by an artefact saved elsewhere, its items are
+    # read and re-encoded one at a time, since the artefacts they reference
+    # must be written to ctx's artifact path too
+    path, name = ctx.new_artifact_path(extension="jsonl")
+    with ctx.storage.open(path, "wb") as fp:
+        for i, x in enumerate(obj):
+            fp.write(_to_json(x, ctx / str(i)).encode("utf-8") + b"\n")
+    obj._ctx, obj._id, obj._iterable = ctx, name, ()
+    return {"__type__": "stream", "__version__": 1, "id": name}
+
+
+def from_json(dct: dict, ctx: Context) -> Stream:
+    decoders = {
+        "stream": _json_to_stream,
+    }
+    try:
+        type_name = dct["__type__"]
+        return decoders[type_name](dct, ctx)
+    except KeyError as exc:
+        raise DeserializationError() from exc
+
+
+def to_json(obj: Any, ctx: Context) -> dict:
+    """
+    Serializes a `Stream` into JSON. The return dict has the following
+    structure
+
+    ```py
+    {
+        "__type__": "stream",
+        "__version__": 1,
+        "id": <uuid4>,
+    }
+    ```
+
+    where the UUID points to a JSON lines artefact containing the encoded
+    items, one per line.
+    """
+    if isinstance(obj, Stream):
+        return _stream_to_json(obj, ctx)
+    raise TypeNotSupported()
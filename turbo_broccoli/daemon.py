@@ -0,0 +1,238 @@
+"""
+Local daemon that keeps decoded documents in memory, for when many
+short-lived processes load the same documents. Start it with
+
+```sh
+python -m turbo_broccoli serve --socket /tmp/tb.sock
+```
+
+and set the `TB_DAEMON_SOCKET` environment variable to the same socket path
+(or pass `daemon_socket=...` to the context). Then, `turbo_broccoli.load_json`
+asks the daemon for the document before decoding it itself. The daemon decodes
+the document (if it hasn't already) and copies it into a shared memory
+segment, to which the client attaches, exactly like with
+`turbo_broccoli.shared.load_shared`. In particular, the numpy arrays, pytorch
+tensors, and pandas objects of documents loaded through the daemon are backed
+by shared memory and read-only.
+
+The daemon decodes a document again if the file (or its journal, see
+`turbo_broccoli.turbo_broccoli.append_json`) has changed since it was last
+decoded. It keeps at most `--max-size` bytes of shared memory segments (1GiB by
+default), and removes the least recently requested segments first.
+
+If the daemon is not running, if it can't decode the document, or if the
+context has dataclass types, pytorch module types, a shared key, or a storage
+backend other than `turbo_broccoli.storage.LocalStorage` (none of which can be
+passed to the daemon, which always reads artifacts from the local
+filesystem), `turbo_broccoli.load_json` silently decodes the document itself.
+
+The daemon handles one request at a time: while it decodes a document, other
+clients wait, even if they request documents that are already decoded. It
+speeds up many processes loading the same few documents, not many processes
+loading many different documents concurrently.
+
+Clients unpickle what the daemon sends, so the socket must only be accessible
+to trusted users. It is created with permissions `0600`, i.e. only accessible
+to the user running the daemon.
+"""
+
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+from typing import Any
+from uuid import uuid4
+
+try:
+    from loguru import logger as logging
+except ModuleNotFoundError:
+    import logging  # type: ignore
+
+from . import shared
+from .context import Context
+from .document_cache import _signature
+from .storage import LocalStorage, StorageWrapper
+from .turbo_broccoli import _from_jsonable, _read_document
+
+DEFAULT_MAX_SIZE = 1024 * 1024 * 1024
+"""Default maximum total size of the shared memory segments, in bytes"""
+
+
+class DaemonError(Exception):
+    """Raised by `turbo_broccoli.daemon.fetch` if the daemon reported an error"""
+
+
+@dataclass
+class _Entry:
+    """A decoded document held by the daemon"""
+
+    shm: SharedMemory
+    signature: tuple
+    size: int
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """Handles one request, i.e. one JSON line, and answers with one"""
+
+    server: "Server"
+
+    def handle(self) -> None:
+        try:
+            request = json.loads(self.rfile.readline())
+            response = {"name": self.server.get(request)}
+        except Exception as exc:  # pylint: disable=broad-except
+            response = {"error": f"{type(exc).__name__}: {exc}"}
+        self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+
+
+class Server(socketserver.ThreadingUnixStreamServer):
+    """
+    The daemon. See module documentation. Requests are accepted concurrently,
+    but served one at a time.
+    """
+
+    daemon_threads = True
+    max_size: int
+
+    _entries: OrderedDict[tuple, _Entry]
+    _lock: threading.Lock
+    _size: int
+
+    def __init__(
+        self, socket_path: str | Path, max_size: int = DEFAULT_MAX_SIZE
+    ) -> None:
+        """
+        Args:
+            socket_path (str | Path): Unix socket to listen to. It must not
+                exist.
+            max_size (int, optional): Maximum total size of the shared memory
+                segments, in bytes
+        """
+        self.max_size, self._size = max_size, 0
+        self._entries, self._lock = OrderedDict(), threading.Lock()
+        umask = os.umask(0o177)
+        try:
+            super().__init__(str(socket_path), _Handler)
+        finally:
+            os.umask(umask)
+
+    def _pop(self, key: tuple) -> None:
+        """Removes an entry and its segment. The lock must be held."""
+        if (entry := self._entries.pop(key, None)) is not None:
+            self._size -= entry.size
+            shared.unlink_shared(name=entry.shm.name)
+            entry.shm.close()
+
+    def get(self, request: dict) -> str:
+        """
+        Returns the name of the shared memory segment containing the requested
+        document, decoding it first if needed
+        """
+        ctx = Context(
+            file_path=request["file_path"],
+            artifact_path=request["artifact_path"],
+            nodecode_types=request["nodecode_types"],
+            lean=request["lean"],
+            lean_lists=request["lean_lists"],
+        )
+        assert isinstance(ctx.file_path, Path)  # for typechecking
+        key = (
+            str(ctx.file_path.resolve()),
+            str(ctx.artifact_path),
+            tuple(ctx.nodecode_types),
+            ctx.lean,
+            ctx.lean_lists,
+        )
+        signature = _signature(ctx.file_path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.signature == signature:
+                self._entries.move_to_end(key)
+                return entry.shm.name
+            self._pop(key)
+            obj = _from_jsonable(_read_document(ctx), ctx)
+            shm = shared._export(obj, "tb-" + uuid4().hex[:16])
+            self._entries[key] = _Entry(shm, signature, shm.size)
+            self._size += shm.size
+            while self._size > self.max_size and len(self._entries) > 1:
+                self._pop(next(iter(self._entries)))
+            logging.debug(f"Decoded '{ctx.file_path}' into '{shm.name}'")
+            return shm.name
+
+
+def fetch(ctx: Context) -> Any:
+    """
+    Asks the daemon listening at `ctx.daemon_socket` for the document at
+    `ctx.file_path`. Raises an `OSError` if the daemon can't be reached, and a
+    `turbo_broccoli.daemon.DaemonError` if it reported an error or if the
+    context can't be passed to the daemon (e.g. if its storage backend is not
+    local).
+    """
+    if ctx.dataclass_types or ctx.pytorch_module_types or ctx.nacl_shared_key:
+        raise DaemonError("This context cannot be passed to the daemon")
+    storage = ctx.storage
+    if isinstance(storage, StorageWrapper):
+        storage = storage.unwrap()
+    if not isinstance(storage, LocalStorage):
+        raise DaemonError(
+            "The daemon can only read artifacts from the local filesystem, "
+            f"not from a {type(storage).__name__}"
+        )
+    assert isinstance(ctx.file_path, Path)  # for typechecking
+    request = {
+        "file_path": str(ctx.file_path.resolve()),
+        "artifact_path": str(ctx.artifact_path.resolve()),
+        "nodecode_types": ctx.nodecode_types,
+        "lean": ctx.lean,
+        "lean_lists": ctx.lean_lists,
+    }
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(str(ctx.daemon_socket))
+        sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        with sock.makefile("rb") as fp:
+            response = json.loads(fp.readline())
+    if "error" in response:
+        raise DaemonError(response["error"])
+    name = response["name"]
+    with shared._LOCK:
+        if (shm := shared._SEGMENTS.get(name)) is None:
+            # Never closed, since the decoded objects use its buffer
+            shm = shared._SEGMENTS[name] = shared._attach(name, 1)
+    return shared._read(shm)
+
+
+def serve(
+    socket_path: str | Path | None = None, max_size: int = DEFAULT_MAX_SIZE
+) -> None:
+    """
+    Runs the daemon until it is interrupted or terminated.
+
+    Args:
+        socket_path (str | Path | None, optional): Unix socket to listen to.
+            Defaults to the `TB_DAEMON_SOCKET` environment variable.
+        max_size (int, optional): Maximum total size of the shared memory
+            segments, in bytes
+    """
+    socket_path = socket_path or os.environ.get("TB_DAEMON_SOCKET")
+    if not socket_path:
+        raise ValueError(
+            "No socket path provided and TB_DAEMON_SOCKET is not set"
+        )
+    socket_path = Path(socket_path)
+    # Segments are removed at exit, see turbo_broccoli.shared
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    with Server(socket_path, max_size) as server:
+        logging.info(f"Listening on '{socket_path}'")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            socket_path.unlink(missing_ok=True)
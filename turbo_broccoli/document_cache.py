@@ -0,0 +1,193 @@
+"""
+Process-level cache of decoded documents. If a context has a
+`document_cache` mode, `turbo_broccoli.load_json` first looks for the
+document in this cache:
+
+```py
+config = tb.load_json("config.json", document_cache="copy")
+...
+config = tb.load_json("config.json", document_cache="copy")  # Cache hit
+```
+
+or, equivalently, set the `TB_DOCUMENT_CACHE` environment variable to `copy`,
+which also applies to e.g. `turbo_broccoli.GuardedBlockHandler` and
+`turbo_broccoli.Parallel`. An entry is only used if the file (and its journal,
+see `turbo_broccoli.turbo_broccoli.append_json`) still has the same
+modification time, size, and inode as when it was loaded. Saving a file with
+TurboBroccoli also invalidates its entries.
+
+In `copy` mode, a deep copy of the cached document is returned, which can be
+freely modified (`turbo_broccoli.custom.chunked.ChunkedList`s and
+`turbo_broccoli.custom.stream.Stream`s in the copy still read their artefacts
+through the context they were loaded with). In `view` mode, the cached document itself is returned. It
+must not be modified! To help with that, numpy arrays in cached documents are
+made read-only.
+
+The cache holds at most about `turbo_broccoli.document_cache.MAX_SIZE` bytes
+of decoded documents (see `turbo_broccoli.document_cache.approximate_size`),
+and evicts the least recently used documents first. This budget defaults to
+the `TB_DOCUMENT_CACHE_SIZE` environment variable, or 512MiB.
+"""
+
+import copy
+import hashlib
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from os import environ as ENV
+from pathlib import Path
+from typing import Any, Callable
+
+from .context import Context
+from .storage import LocalStorage, StorageBackend, StorageWrapper
+
+MAX_SIZE: int = int(ENV.get("TB_DOCUMENT_CACHE_SIZE", 512 * 1024 * 1024))
+"""Approximate maximum size of the cache, in bytes"""
+
+
+@dataclass
+class _Entry:
+    """A cached document"""
+
+    obj: Any
+    signature: tuple
+    size: int
+
+
+_ENTRIES: OrderedDict[tuple, _Entry] = OrderedDict()
+_LOCK = threading.Lock()
+_SIZE = 0
+
+
+def _freeze(obj: Any) -> None:
+    """Makes the numpy arrays in a decoded document read-only"""
+    if isinstance(obj, dict):
+        for v in obj.values():
+            _freeze(v)
+    elif isinstance(obj, (list, tuple)):
+        for v in obj:
+            _freeze(v)
+    elif (np := sys.modules.get("numpy")) and isinstance(obj, np.ndarray):
+        obj.setflags(write=False)
+
+
+def _pop(key: tuple) -> None:
+    """Removes an entry. The lock must be held."""
+    global _SIZE  # pylint: disable=global-statement
+    if (entry := _ENTRIES.pop(key, None)) is not None:
+        _SIZE -= entry.size
+
+
+def _storage_key(storage: StorageBackend) -> Any:
+    """
+    Identifies the backend artifacts are read from. All
+    `turbo_broccoli.storage.LocalStorage`s are equivalent, other backends are
+    identified by the backend object itself.
+    """
+    if isinstance(storage, StorageWrapper):
+        storage = storage.unwrap()
+    return LocalStorage if isinstance(storage, LocalStorage) else storage
+
+
+def _signature(path: Path) -> tuple:
+    """
+    Modification time, size, and inode of a file and of its journal, or
+    `None`s if they don't exist
+    """
+    result: list = []
+    for p in [path, path.with_name(path.name + ".log")]:
+        try:
+            st = p.stat()
+            result.append((st.st_mtime_ns, st.st_size, st.st_ino))
+        except FileNotFoundError:
+            result.append(None)
+    return tuple(result)
+
+
+def approximate_size(obj: Any) -> int:
+    """
+    Approximate memory footprint of a decoded document, in bytes. Numpy
+    arrays, pytorch tensors, and pandas objects count for the size of their
+    data.
+    """
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(
+            approximate_size(k) + approximate_size(v) for k, v in obj.items()
+        )
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return sys.getsizeof(obj) + sum(approximate_size(v) for v in obj)
+    if (np := sys.modules.get("numpy")) and isinstance(obj, np.ndarray):
+        # getsizeof only includes the data if the array owns it
+        return sys.getsizeof(obj) + (0 if obj.base is None else obj.nbytes)
+    if (torch := sys.modules.get("torch")) and isinstance(obj, torch.Tensor):
+        return obj.element_size() * obj.nelement()
+    if (pd := sys.modules.get("pandas")) and isinstance(
+        obj, (pd.DataFrame, pd.Series)
+    ):
+        return int(obj.memory_usage(deep=True).sum())
+    return sys.getsizeof(obj)
+
+
+def clear() -> None:
+    """Empties the cache"""
+    global _SIZE  # pylint: disable=global-statement
+    with _LOCK:
+        _ENTRIES.clear()
+        _SIZE = 0
+
+
+def invalidate(path: str | Path) -> None:
+    """Removes all cached documents loaded from `path`"""
+    resolved = str(Path(path).resolve())
+    with _LOCK:
+        for key in [k for k in _ENTRIES if k[0] == resolved]:
+            _pop(key)
+
+
+def load(ctx: Context, loader: Callable[[], Any], schema: Any = None) -> Any:
+    """
+    Returns the document at `ctx.file_path` from the cache if it's there and
+    still valid. Otherwise, loads it using `loader` and caches it. Documents
+    loaded with different schemas (see `turbo_broccoli.schema`), storage
+    backends, or keys (see `turbo_broccoli.custom.secret`) are cached
+    separately.
+    """
+    global _SIZE  # pylint: disable=global-statement
+    assert isinstance(ctx.file_path, Path)  # for typechecking
+    key = (
+        str(ctx.file_path.resolve()),
+        str(ctx.artifact_path),
+        tuple(ctx.nodecode_types),
+        tuple(sorted(ctx.dataclass_types.items())),
+        tuple(sorted(ctx.pytorch_module_types.items())),
+        ctx.lean_lists,
+        repr(sorted(ctx.pandas_kwargs.items())),
+        _storage_key(ctx.storage),
+        (
+            hashlib.sha256(ctx.nacl_shared_key).hexdigest()
+            if ctx.nacl_shared_key is not None
+            else None
+        ),
+        schema,
+    )
+    signature = _signature(ctx.file_path)
+    with _LOCK:
+        entry = _ENTRIES.get(key)
+        hit = entry is not None and entry.signature == signature
+        if hit:
+            _ENTRIES.move_to_end(key)
+    if entry is not None and hit:
+        obj = entry.obj
+    else:
+        obj = loader()
+        _freeze(obj)
+        size = approximate_size(obj)
+        with _LOCK:
+            _pop(key)
+            if size <= MAX_SIZE:
+                _ENTRIES[key] = _Entry(obj=obj, signature=signature, size=size)
+                _SIZE += size
+            while _SIZE > MAX_SIZE:
+                _pop(next(iter(_ENTRIES)))
+    return copy.deepcopy(obj) if ctx.document_cache == "copy" else obj
@@ -62,6 +62,20 @@ for _ in h:
 # None instead of the content of out/large.json
 ```
 
+## Asynchronous code
+
+In a coroutine, use `async for` and `GuardedBlockHandler.aguard`, which load
+and save the results with `turbo_broccoli.aio.aload_json` and
+`turbo_broccoli.aio.asave_json`, so that the event loop is not blocked:
+
+```py
+h = GuardedBlockHandler("out/foo.json")
+async for _ in h:
+    h.result = await something()
+async for i, x in h.aguard(an_iterable):
+    ...
+```
+
 ## Guarding a loop
 
 Let's say you have a loop
@@ -150,8 +164,18 @@ for i, x in h(an_iterable, result_type="list"):
   `"embedded"` type in the guarded block handler's internal context's
   `nodecode_types`, results that were already present in the JSON file will not
   be decoded.
+
+- Since `h.result` is saved at the end of every iteration, the arrays,
+  tensors, and dataframes of past iterations are encoded again and again. Use
+  `incremental=True` to only encode what changed since the last save, see
+  `turbo_broccoli.provenance`:
+
+  ```py
+  h = GuardedBlockHandler("out/foo.json", incremental=True)
+  ```
 """
 
+import asyncio
 from pathlib import Path
 
 try:
@@ -159,11 +183,13 @@ try:
 except ModuleNotFoundError:
     import logging  # type: ignore
 
-from typing import Any, Generator, Iterable, Literal
+from typing import Any, AsyncGenerator, Generator, Iterable, Literal
 
+from .aio import aload_json, asave_json
 from .context import Context
 from .native import load as native_load
 from .native import save as native_save
+from .turbo_broccoli import load_json, save_json
 
 
 class GuardedBlockHandler:
@@ -175,6 +201,12 @@ class GuardedBlockHandler:
     load_if_skip: bool
     result: Any = None
 
+    def __aiter__(self) -> AsyncGenerator[Any, None]:
+        """
+        Alias for `GuardedBlockHandler.aguard` with no iterable and no kwargs
+        """
+        return self.aguard()
+
     def __call__(
         self, it: Iterable, **kwargs
     ) -> Generator[tuple[int, Any], None, None]:
@@ -212,6 +244,50 @@ class GuardedBlockHandler:
         """
         yield from self.guard()
 
+    async def _aguard_iter(
+        self,
+        it: Iterable,
+        result_type: Literal["dict", "list"] = "dict",
+        **__,
+    ) -> AsyncGenerator[tuple[int, Any], None]:
+        if self.file_path.is_file():
+            self.result = await self._aload()
+        else:
+            self.result = {} if result_type == "dict" else []
+        for i, x in enumerate(it):
+            if self._is_done(i, x, result_type):
+                continue
+            yield (i, x)
+            await self._asave()
+
+    async def _aguard_no_iter(self, **__) -> AsyncGenerator[Any, None]:
+        if self.file_path.is_file():
+            self.result = await self._aload() if self.load_if_skip else None
+            if self.block_name:
+                logging.debug(f"Skipped guarded block '{self.block_name}'")
+            return
+        yield self
+        if self.result is not None:
+            await self._asave()
+            if self.block_name is not None:
+                logging.debug(
+                    f"Saved guarded block '{self.block_name}' results to "
+                    f"'{self.file_path}'"
+                )
+
+    async def _aload(self) -> Any:
+        """Asynchronous counterpart of `GuardedBlockHandler._load`"""
+        if self._is_json():
+            return await aload_json(self.file_path, self.context)
+        return await asyncio.to_thread(native_load, self.file_path)
+
+    async def _asave(self) -> None:
+        """Asynchronous counterpart of `GuardedBlockHandler._save`"""
+        if self._is_json():
+            await asave_json(self.result, self.file_path, self.context)
+        else:
+            await asyncio.to_thread(self._save)
+
     def _guard_iter(
         self,
         it: Iterable,
@@ -219,7 +295,7 @@ class GuardedBlockHandler:
         **kwargs,
     ) -> Generator[tuple[int, Any], None, None]:
         if self.file_path.is_file():
-            self.result = native_load(self.file_path)
+            self.result = self._load()
         else:
             self.result = {} if result_type == "dict" else []
         if result_type == "dict":
@@ -231,12 +307,7 @@ class GuardedBlockHandler:
         self, it: Iterable, **__
     ) -> Generator[tuple[int, Any], None, None]:
         for i, x in enumerate(it):
-            if x in self.result:
-                if self.block_name:
-                    logging.debug(
-                        f"Skipped iteration '{str(x)}' of guarded loop "
-                        f"'{self.block_name}'"
-                    )
+            if self._is_done(i, x, "dict"):
                 continue
             yield (i, x)
             self._save()
@@ -245,21 +316,14 @@ class GuardedBlockHandler:
         self, it: Iterable, **__
     ) -> Generator[tuple[int, Any], None, None]:
         for i, x in enumerate(it):
-            if i < len(self.result):
-                if self.block_name:
-                    logging.debug(
-                        f"Skipped iteration {i} of guarded loop "
-                        f"'{self.block_name}'"
-                    )
+            if self._is_done(i, x, "list"):
                 continue
             yield (i, x)
             self._save()
 
     def _guard_no_iter(self, **__) -> Generator[Any, None, None]:
         if self.file_path.is_file():
-            self.result = (
-                native_load(self.file_path) if self.load_if_skip else None
-            )
+            self.result = self._load() if self.load_if_skip else None
             if self.block_name:
                 logging.debug(f"Skipped guarded block '{self.block_name}'")
             return
@@ -272,10 +336,62 @@ class GuardedBlockHandler:
                     f"'{self.file_path}'"
                 )
 
+    def _is_done(
+        self, i: int, x: Any, result_type: Literal["dict", "list"]
+    ) -> bool:
+        """
+        Wether iteration `i` (on item `x`) of a guarded loop already has its
+        result in `self.result`, in which case the iteration is skipped.
+        """
+        if result_type == "dict":
+            if x not in self.result:
+                return False
+            msg = f"Skipped iteration '{str(x)}' of guarded loop"
+        else:
+            if i >= len(self.result):
+                return False
+            msg = f"Skipped iteration {i} of guarded loop"
+        if self.block_name:
+            logging.debug(msg + f" '{self.block_name}'")
+        return True
+
+    def _is_json(self) -> bool:
+        """Whether the output file is a (possibly compressed) JSON file"""
+        return self.file_path.name.endswith((".json", ".json.gz"))
+
+    def _load(self) -> Any:
+        """
+        Loads the output file. JSON files are loaded with `self.context`, other
+        files with `turbo_broccoli.native.load`.
+        """
+        if self._is_json():
+            return load_json(self.file_path, self.context)
+        return native_load(self.file_path)
+
     def _save(self):
-        """Saves `self.result`"""
+        """
+        Saves `self.result`. JSON files are saved with `self.context`, other
+        files with `turbo_broccoli.native.save`.
+        """
         self.file_path.parent.mkdir(parents=True, exist_ok=True)
-        native_save(self.result, self.file_path)
+        if self._is_json():
+            save_json(self.result, self.file_path, self.context)
+        else:
+            native_save(self.result, self.file_path)
+
+    async def aguard(
+        self, it: Iterable | None = None, **kwargs
+    ) -> AsyncGenerator[Any, None]:
+        """
+        Asynchronous counterpart of `GuardedBlockHandler.guard`, see the
+        module documentation
+        """
+        if it is None:
+            async for x in self._aguard_no_iter(**kwargs):
+                yield x
+        else:
+            async for x in self._aguard_iter(it, **kwargs):
+                yield x
 
     def guard(
         self, it: Iterable | None = None, **kwargs
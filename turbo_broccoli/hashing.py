@@ -0,0 +1,135 @@
+"""
+Stable content hashes of objects that TurboBroccoli can serialize:
+
+```py
+import turbo_broccoli as tb
+
+tb.hash({"a": np.arange(10), "b": [1, 2, 3]})  # A 32 character hex string
+```
+
+Two objects with the same content have the same hash, across runs and
+processes. In particular, dicts and sets are hashed regardless of their order.
+No JSON is produced and no artifact is written: numpy arrays, pytorch tensors,
+and pandas objects have their raw data fed directly into a
+[BLAKE2b](https://docs.python.org/3/library/hashlib.html#blake2) hash (see
+`turbo_broccoli.provenance.fingerprint`), and the other types are first
+transformed by their encoder (e.g. a dataclass into a dict of its fields),
+whose output is then hashed. Hashes are not stable for types whose encoder
+always writes an artefact (e.g. keras models, unless the `json` keras format
+is used), or whose encoder is not deterministic (e.g. secrets).
+
+Generators and other iterators cannot be hashed without consuming them, so
+hashing a `turbo_broccoli.custom.stream.Stream` that is not backed by an
+artefact raises a `TypeError`.
+"""
+
+import hashlib
+import struct
+import sys
+from typing import Any
+
+from . import user
+from .context import Context
+from .custom import get_encoders
+from .custom.chunked import ChunkedList
+from .custom.embedded import EmbeddedList
+from .custom.stream import Stream
+from .exceptions import TypeNotSupported
+from .provenance import fingerprint
+from .storage import MemoryStorage
+
+DIGEST_SIZE = 16
+"""Size of the hashes, in bytes"""
+
+
+def _digest(obj: Any, ctx: Context) -> bytes:
+    """Hash of an object as raw bytes"""
+    h = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    _feed(h, obj, ctx)
+    return h.digest()
+
+
+def _feed(h: Any, obj: Any, ctx: Context) -> None:
+    """Updates a hash object with the content of `obj`"""
+
+    def _update(tag: bytes, data: bytes) -> None:
+        h.update(tag + struct.pack("<Q", len(data)) + data)
+
+    if obj is None or isinstance(obj, bool):
+        _update(b"c", str(obj).encode())
+    elif isinstance(obj, int):
+        _update(b"i", str(obj).encode())
+    elif isinstance(obj, float):
+        _update(b"f", struct.pack("<d", obj))
+    elif isinstance(obj, str):
+        _update(b"s", obj.encode("utf-8"))
+    elif isinstance(obj, (bytes, bytearray, memoryview)):
+        _update(b"b", bytes(obj))
+    elif isinstance(obj, dict):
+        # Order-independent, and keys don't need to be strings
+        items = sorted(
+            _digest(k, ctx) + _digest(v, ctx) for k, v in obj.items()
+        )
+        _update(b"d", b"".join(items))
+    elif isinstance(obj, (set, frozenset)):
+        _update(b"S", b"".join(sorted(_digest(v, ctx) for v in obj)))
+    elif type(obj) in (list, tuple, EmbeddedList) or isinstance(
+        obj, ChunkedList
+    ):
+        _update(b"l" if not isinstance(obj, tuple) else b"t", b"")
+        for v in obj:
+            _feed(h, v, ctx)
+        h.update(b"]")
+    elif isinstance(obj, Stream):
+        if obj._id is None:
+            raise TypeError("Cannot hash a stream that is not serialized")
+        _update(b"l", b"")
+        for v in obj:
+            _feed(h, v, ctx)
+        h.update(b"]")
+    elif (fp := _fingerprint(obj, ctx)) is not None:
+        _update(b"a", fp)
+    else:
+        _update(b"o", type(obj).__qualname__.encode("utf-8"))
+        _feed(h, _encode(obj, ctx), ctx)
+
+
+def _encode(obj: Any, ctx: Context) -> Any:
+    """
+    Applies the first encoder that supports `obj`, like
+    `turbo_broccoli.turbo_broccoli._to_jsonable` but without recursing.
+    """
+    name = obj.__class__.__name__
+    if name in user.encoders:
+        obj = user.encoders[name](obj, ctx)
+    for encoder in get_encoders(type(obj)):
+        try:
+            return encoder(obj, ctx)
+        except TypeNotSupported:
+            pass
+    raise TypeError(f"Cannot hash objects of type '{type(obj).__name__}'")
+
+
+def _fingerprint(obj: Any, ctx: Context) -> bytes | None:
+    """
+    `turbo_broccoli.provenance.fingerprint`, extended to numpy object arrays
+    and to pandas objects with unhashable cells
+    """
+    if (fp := fingerprint(obj)) is not None:
+        return fp
+    np = sys.modules.get("numpy")
+    if np is not None and isinstance(obj, np.ndarray):  # dtype is object
+        return _digest((obj.shape, obj.reshape(-1).tolist()), ctx)
+    pd = sys.modules.get("pandas")
+    if pd is not None and isinstance(obj, (pd.DataFrame, pd.Series)):
+        return fingerprint(obj.astype(str))
+    return None
+
+
+def hash(obj: Any) -> str:  # pylint: disable=redefined-builtin
+    """
+    Returns a stable hash of the content of `obj`, as a 32 character hex
+    string. See module documentation.
+    """
+    ctx = Context(storage=MemoryStorage(), min_artifact_size=sys.maxsize)
+    return _digest(obj, ctx).hex()
@@ -0,0 +1,243 @@
+"""
+Persistent memoization of functions, similar to
+[`joblib.Memory`](https://joblib.readthedocs.io/en/latest/generated/joblib.Memory.html)
+but using TurboBroccoli's encoders:
+
+```py
+import turbo_broccoli as tb
+
+
+@tb.cache("out/cache", max_bytes=2**30)
+def embed(texts: list[str], model_name: str = "bert") -> np.ndarray: ...
+
+
+x = embed(["hello", "world"])  # Computed and saved
+x = embed(["hello", "world"], "bert")  # Loaded
+embed.hits, embed.misses  # 1, 1
+```
+
+A call is identified by a hash (see `turbo_broccoli.hashing.hash`) of the
+function's module, qualified name, and source code (if available), and of the
+arguments of the call, default values included. Therefore, all arguments must
+be hashable by `turbo_broccoli.hashing.hash`. Changing the code of the function
+invalidates its cached results.
+
+The result of each call is saved in its own JSON file, `<hash>.json`, and its
+artefacts (if any) in a `<hash>/` subdirectory of the cache directory. Several
+functions and processes can share the same cache directory. If `max_entries`
+or `max_bytes` are set, the least recently used results (across all functions
+and processes using the directory) are removed after every new result is
+saved, until the directory is within both limits. The last use of a result is
+the modification time of its JSON file, which is updated every time the result
+is loaded.
+
+Results are written atomically (to a temporary file that then replaces the
+JSON file), so concurrent callers never load a partially written result. A
+JSON file that can't be parsed anyway (e.g. after a crash) counts as a miss,
+and is overwritten.
+
+Methods can be decorated too, in which case the instance (`self`) is one of
+the arguments of the call, and must therefore be hashable by
+`turbo_broccoli.hashing.hash`, e.g. a dataclass:
+
+```py
+@dataclass
+class Model:
+    name: str
+
+    @tb.cache("out/cache")
+    def embed(self, texts: list[str]) -> np.ndarray: ...
+```
+
+Note that unlike `turbo_broccoli.guard.GuardedBlockHandler`, results that are
+`None` are cached like any other result.
+"""
+
+import inspect
+import json
+import os
+import shutil
+import zlib
+from functools import update_wrapper
+from pathlib import Path
+from types import MethodType
+from typing import Any, Callable
+
+from .context import Context
+from .hashing import hash as tb_hash
+from .turbo_broccoli import _to_jsonable, _write_document, load_json
+
+
+class CachedFunction:
+    """
+    A function decorated with `turbo_broccoli.memoization.cache`. See module
+    documentation.
+    """
+
+    directory: Path
+    function: Callable
+    hits: int
+    """Number of calls whose result was loaded from the cache"""
+    max_bytes: int | None
+    max_entries: int | None
+    misses: int
+    """Number of calls whose result was computed"""
+
+    _identity: dict
+    _kwargs: dict
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        ctx = self._context(self.key(*args, **kwargs))
+        assert isinstance(ctx.file_path, Path)  # for typechecking
+        if ctx.file_path.is_file():
+            try:
+                result = load_json(ctx=ctx)
+                os.utime(ctx.file_path)
+                self.hits += 1
+                return result
+            except FileNotFoundError:
+                pass  # Evicted by another process in the meantime
+            except (json.JSONDecodeError, zlib.error):
+                pass  # Corrupted, e.g. by a crash, so it is overwritten
+        self.misses += 1
+        result = self.function(*args, **kwargs)
+        data = json.dumps(_to_jsonable(result, ctx))
+        ctx.storage.flush()
+        _write_document(data, ctx, atomic=True)
+        self.evict()
+        return result
+
+    def __get__(self, instance: Any, owner: type | None = None) -> Any:
+        if instance is None:
+            return self
+        return MethodType(self, instance)
+
+    def __init__(
+        self,
+        function: Callable,
+        directory: str | Path,
+        max_bytes: int | None = None,
+        max_entries: int | None = None,
+        **kwargs: Any,
+    ) -> None:
+        """
+        See `turbo_broccoli.memoization.cache`.
+        """
+        self.function, self.directory = function, Path(directory)
+        self.max_bytes, self.max_entries = max_bytes, max_entries
+        self.hits, self.misses = 0, 0
+        self._kwargs = kwargs
+        try:
+            source = inspect.getsource(function)
+        except (OSError, TypeError):  # e.g. function defined in a REPL
+            source = None
+        self._identity = {
+            "module": function.__module__,
+            "qualname": function.__qualname__,
+            "source": source,
+        }
+        update_wrapper(self, function)
+
+    def _context(self, key: str) -> Context:
+        """Context of the entry with the given key"""
+        ext = ".json.gz" if self._kwargs.get("compress") else ".json"
+        return Context(
+            **{
+                **self._kwargs,
+                "file_path": self.directory / (key + ext),
+                "artifact_path": self.directory / key,
+            }
+        )
+
+    def _entries(self) -> list[tuple[int, Path, int]]:
+        """
+        Last use time (in nanoseconds), JSON file, and size in bytes (JSON file
+        and artefacts) of all the entries in the cache directory, least
+        recently used first.
+        """
+        entries = []
+        files = list(self.directory.glob("*.json")) + list(
+            self.directory.glob("*.json.gz")
+        )
+        for file in files:
+            try:
+                st = file.stat()
+            except FileNotFoundError:
+                continue
+            mtime, size = st.st_mtime_ns, st.st_size
+            artifacts = self.directory / file.name.split(".")[0]
+            for p in artifacts.rglob("*"):
+                try:
+                    size += p.stat().st_size if p.is_file() else 0
+                except FileNotFoundError:
+                    pass
+            entries.append((mtime, file, size))
+        return sorted(entries)
+
+    def clear(self) -> None:
+        """
+        Removes all entries from the cache directory, including those of other
+        functions sharing it. The hit and miss counters are not reset.
+        """
+        for _, file, _ in self._entries():
+            _remove(file)
+
+    def evict(self) -> None:
+        """
+        Removes the least recently used entries of the cache directory until
+        it is within `max_entries` and `max_bytes`. This is done
+        automatically after every miss.
+        """
+        if self.max_bytes is None and self.max_entries is None:
+            return
+        entries = self._entries()
+        n, size = len(entries), sum(s for _, _, s in entries)
+        for _, file, s in entries:
+            if (self.max_entries is None or n <= self.max_entries) and (
+                self.max_bytes is None or size <= self.max_bytes
+            ):
+                break
+            _remove(file)
+            n, size = n - 1, size - s
+
+    def key(self, *args: Any, **kwargs: Any) -> str:
+        """Hash that identifies a call to the function with these arguments"""
+        bound = inspect.signature(self.function).bind(*args, **kwargs)
+        bound.apply_defaults()
+        return tb_hash(
+            {"function": self._identity, "arguments": bound.arguments}
+        )
+
+
+def _remove(file: Path) -> None:
+    """Removes an entry, i.e. its JSON file and its artefact directory"""
+    file.unlink(missing_ok=True)
+    shutil.rmtree(file.parent / file.name.split(".")[0], ignore_errors=True)
+
+
+def cache(
+    directory: str | Path,
+    max_bytes: int | None = None,
+    max_entries: int | None = None,
+    **kwargs: Any,
+) -> Callable[[Callable], CachedFunction]:
+    """
+    Decorator that persistently memoizes a function. See module documentation.
+
+    Args:
+        directory (str | Path): Cache directory, can be shared by several
+            functions and processes
+        max_bytes (int | None, optional): Maximum total size of the cache
+            directory. If left to `None`, the size is not limited.
+        max_entries (int | None, optional): Maximum number of results in the
+            cache directory. If left to `None`, the number is not limited.
+        **kwargs: Forwarded to the `turbo_broccoli.context.Context`
+            constructor, except for `file_path` and `artifact_path`
+    """
+
+    def _decorator(function: Callable) -> CachedFunction:
+        return CachedFunction(
+            function, directory, max_bytes, max_entries, **kwargs
+        )
+
+    return _decorator
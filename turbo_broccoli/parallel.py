@@ -53,6 +53,9 @@ gives
 
 * The result of `executor(jobs)` is a dict or a generator of key/value pairs.
 
+* In asynchronous code, use `await executor.acall(jobs)` instead, which runs
+  the jobs in an executor rather than in the event loop.
+
 * The order of the results is guaranteed to be consistent with the order of the
   jobs.
 
@@ -96,8 +99,16 @@ gives
     executor = tb.Parallel(...)
     results = executor(jobs)
     ```
+
+    Alternatively, an incremental context only encodes the new results:
+
+    ```py
+    ctx = tb.Context("out/foo.json", incremental=True)
+    executor = tb.Parallel("out/foo.json", context=ctx)
+    ```
 """
 
+import asyncio
 from itertools import combinations
 from pathlib import Path
 from typing import Any, Callable, Generator, Iterable
@@ -109,6 +120,7 @@ try:
 except ModuleNotFoundError:
     import logging  # type: ignore
 
+from .aio import aload_json, asave_json
 from .context import Context
 from .turbo_broccoli import load_json, save_json
 
@@ -171,6 +183,39 @@ class Parallel:
         self.sanity_check(jobs)
         return dict(self._execute(jobs))
 
+    async def _aexecute(self, jobs: list[_DelayedCall]) -> dict:
+        """Asynchronous counterpart of `Parallel._execute`"""
+        assert self.context.file_path is not None  # for typechecking
+        results = (
+            await aload_json(self.context.file_path, self.context)
+            if self.context.file_path.exists()
+            else {}
+        )
+        job_status = self._job_status(jobs, results)
+        loop = asyncio.get_running_loop()
+        new_results_it = iter(
+            await loop.run_in_executor(
+                None,
+                lambda: list(
+                    self.executor(
+                        d["job"].to_joblib_delayed()  # type: ignore
+                        for d in job_status.values()
+                        if not d["done"]
+                    )
+                ),
+            )
+        )
+        output = {}
+        for k, s in job_status.items():
+            if s["done"]:
+                output[k] = s["result"]
+            else:
+                results[k] = output[k] = next(new_results_it)
+                await asave_json(results, self.context.file_path, self.context)
+        if next(new_results_it, new_results_it) is not new_results_it:
+            raise RuntimeError("The executor returned too many results")
+        return output
+
     def _execute(
         self, jobs: Iterable[_DelayedCall]
     ) -> Generator[tuple[Any, Any], None, None]:
@@ -184,29 +229,13 @@ class Parallel:
                 results are already in the output file (and therefore shall not
                 be run again)
         """
-
-        def _key(j: _DelayedCall) -> Any:
-            """What the key of a job should be in the result dict"""
-            return j.args[0] if self.only_one_arg else tuple(j.args)
-
-        job_status = {
-            _key(j): {"job": j, "done": False, "result": None} for j in jobs
-        }
-
         # Check if some jobs already have their results in the output file
         assert self.context.file_path is not None  # for typechecking
         if self.context.file_path.exists():
             results = load_json(self.context.file_path, self.context)
-            if not isinstance(results, dict):
-                raise RuntimeError(
-                    f"The contents of '{self.context.file_path}' is not a dict"
-                )
-            # Mark the jobs that are already done
-            for k, r in results.items():
-                if k in job_status:
-                    job_status[k]["done"], job_status[k]["result"] = True, r
         else:
             results = {}
+        job_status = self._job_status(jobs, results)
 
         new_results_it = iter(
             self.executor(
@@ -232,6 +261,43 @@ class Parallel:
         except StopIteration:
             pass
 
+    def _job_status(
+        self, jobs: Iterable[_DelayedCall], results: Any
+    ) -> dict[Any, dict]:
+        """
+        Maps the key of every job (see `Parallel._key`) to a dict containing
+        the job itself, wether its result is already in `results` (which were
+        loaded from the output file), and said result.
+        """
+        if not isinstance(results, dict):
+            raise RuntimeError(
+                f"The contents of '{self.context.file_path}' is not a dict"
+            )
+        job_status = {
+            self._key(j): {"job": j, "done": False, "result": None}
+            for j in jobs
+        }
+        # Mark the jobs that are already done
+        for k, r in results.items():
+            if k in job_status:
+                job_status[k]["done"], job_status[k]["result"] = True, r
+        return job_status
+
+    def _key(self, j: _DelayedCall) -> Any:
+        """What the key of a job should be in the result dict"""
+        return j.args[0] if self.only_one_arg else tuple(j.args)
+
+    async def acall(self, jobs: Iterable[_DelayedCall]) -> dict:
+        """
+        Asynchronous counterpart of `Parallel.__call__`: the jobs are run in
+        the event loop's default executor, and the output file is loaded and
+        saved using `turbo_broccoli.aio.aload_json` and
+        `turbo_broccoli.aio.asave_json`.
+        """
+        jobs = list(jobs)
+        self.sanity_check(jobs)
+        return await self._aexecute(jobs)
+
     def sanity_check(self, jobs: list[_DelayedCall]) -> None:
         """
         Performs various sanity checks on a list of jobs.
@@ -0,0 +1,475 @@
+"""
+Dry-run encoding. Before saving a large object, `turbo_broccoli.planning.plan`
+tells how it would be encoded with a given context, without writing anything:
+
+```py
+p = tb.plan(obj, min_artifact_size=2**20, pandas_format="parquet")
+print(p.report())
+print(p.document_size, p.artifact_size)  # Estimated sizes, in bytes
+```
+
+The plan has an entry for each object that is encoded by a custom encoder
+(e.g. a numpy array) or that is a plain dict or list, see
+`turbo_broccoli.planning.PlanEntry`. This helps tuning the context's thresholds
+and formats, and finding out what makes a document unexpectedly large.
+
+Numpy arrays, pytorch tensors, pandas objects, and byte strings are not
+encoded: their sizes are estimated from their metadata (e.g. `nbytes`,
+`numel`, or the memory usage of a dataframe). Their estimated sizes are
+before compression (see `turbo_broccoli.compression`), and the size of a
+dataframe artifact is its memory usage, whatever the `pandas_format` is.
+The chunks of a `turbo_broccoli.custom.chunked.ChunkedList`, the items of a
+`turbo_broccoli.custom.stream.Stream`, and the content of embedded dicts and
+lists (see `turbo_broccoli.custom.embedded`) are planned like the rest of the
+object, without modifying it. A stream that wraps an iterator (e.g. a
+generator) is not iterated over, since that would consume it: the size of its
+artifact is unknown and reported as 0.
+Other objects (e.g. dataclasses or scikit-learn estimators) are actually
+encoded, but their artifacts are written to a
+`turbo_broccoli.storage.MemoryStorage` and discarded right away, so their
+sizes are exact.
+"""
+
+import json
+import sys
+from dataclasses import dataclass, field
+from math import ceil
+from typing import Any, Callable, Iterator
+
+from . import user
+from .artifact_io import tensor_buffers
+from .context import Context
+from .custom import get_encoders
+from .custom.chunked import ChunkedList
+from .custom.embedded import EmbeddedDict, EmbeddedList
+from .custom.stream import Stream
+from .exceptions import TypeNotSupported
+from .storage import MemoryStorage
+
+_ID = "00000000-0000-0000-0000-000000000000"
+"""Stand-in for the UUID of an artifact, which has the same length"""
+
+_PRIMITIVES = (bool, float, int, str, type(None))
+
+
+@dataclass
+class PlanEntry:
+    """How an object would be encoded"""
+
+    json_path: str
+    type_name: str
+    """
+    `__type__` of the object's JSON document, e.g. `numpy.ndarray`, or
+    `dict` or `list` for a plain dict or list
+    """
+    encoder: str | None
+    """
+    Module of the encoder, e.g. `turbo_broccoli.custom.numpy`, or `None` for a
+    plain dict or list
+    """
+    inline_size: int
+    """
+    Size of the object in the JSON document (or in its parent's artifact), in
+    bytes, excluding the objects it contains that have their own entry
+    """
+    artifact_size: int = 0
+    """Total size of the artifacts written by the encoder, in bytes"""
+    artifacts: int = 0
+    """Number of artifacts written by the encoder"""
+    exact: bool = True
+    """Whether the sizes are exact rather than estimated"""
+
+    @property
+    def target(self) -> str:
+        """`"artifact"` if the encoder writes artifacts, `"inline"` otherwise"""
+        return "artifact" if self.artifacts else "inline"
+
+
+@dataclass
+class Plan:
+    """Result of `turbo_broccoli.planning.plan`"""
+
+    entries: list[PlanEntry] = field(default_factory=list)
+    document_size: int = 0
+    """Estimated size of the JSON document, in bytes"""
+
+    @property
+    def artifact_size(self) -> int:
+        """Estimated total size of the artifacts, in bytes"""
+        return sum(e.artifact_size for e in self.entries)
+
+    @property
+    def artifacts(self) -> int:
+        """Number of artifacts"""
+        return sum(e.artifacts for e in self.entries)
+
+    def by_path(self, depth: int = 1) -> dict[str, tuple[int, int]]:
+        """
+        Returns the estimated inline and artifact sizes grouped by JSONpath
+        prefix. For example, with the default depth of 1, everything under
+        `$.a.b` is counted under `$.a`.
+        """
+        result: dict[str, tuple[int, int]] = {}
+        for e in self.entries:
+            k = ".".join(e.json_path.split(".")[: depth + 1])
+            i, a = result.get(k, (0, 0))
+            result[k] = (i + e.inline_size, a + e.artifact_size)
+        return result
+
+    def report(self, n: int = 10) -> str:
+        """
+        Returns a human-readable summary of the plan, with the `n` largest
+        entries
+        """
+        lines = [
+            f"Document: {self.document_size} bytes, artifacts: "
+            f"{self.artifacts} ({self.artifact_size} bytes)",
+            "",
+            f"{'path':<32} {'type':<24} {'encoder':<10} {'target':<8} "
+            f"{'bytes':>12}",
+        ]
+        entries = sorted(
+            self.entries, key=lambda e: -(e.inline_size + e.artifact_size)
+        )
+        for e in entries[:n]:
+            encoder = e.encoder.split(".")[-1] if e.encoder else "-"
+            size = ("" if e.exact else "~") + str(
+                e.inline_size + e.artifact_size
+            )
+            lines.append(
+                f"{e.json_path[:32]:<32} {e.type_name[:24]:<24} "
+                f"{encoder[:10]:<10} {e.target:<8} {size:>12}"
+            )
+        return "\n".join(lines)
+
+
+def _bytes_sizes(size: int, ctx: Context) -> tuple[int, int]:
+    """
+    Inline size and artifact size of a `bytes` document whose payload is
+    `size` bytes long, see `turbo_broccoli.custom.bytes.buffers_to_json`
+    """
+    b64_size = (ceil((size * 4) / 3) + 3) & ~3
+    if b64_size <= ctx.min_artifact_size:
+        return _doc_size("bytes", 3, data="") + b64_size, 0
+    return _doc_size("bytes", 3, id=_ID), size
+
+
+def _bytes_entry(obj: Any, ctx: Context) -> PlanEntry | None:
+    if not isinstance(obj, bytes):
+        return None
+    inline, art = _bytes_sizes(len(obj), ctx)
+    return PlanEntry(
+        ctx.json_path,
+        "bytes",
+        "turbo_broccoli.custom.bytes",
+        inline,
+        art,
+        int(art > 0),
+        ctx.artifact_codec is None,
+    )
+
+
+def _chunked_entry(obj: Any, ctx: Context) -> PlanEntry | None:
+    if not isinstance(obj, ChunkedList):
+        return None
+    sub, chunks, size = Plan(), [], 0
+    for c in range(len(obj._refs)):
+        # Not cached, so that planning doesn't change the list
+        n, _ = _plan(obj._chunk(c, cache=False), ctx, sub)
+        codec = ctx.artifact_codec
+        if codec is None or n < ctx.min_compression_size:
+            chunks.append({"id": _ID})
+        else:
+            chunks.append({"id": _ID, "codec": codec.split("+")[-1]})
+        size += n
+    inline = _doc_size(
+        "chunked.list",
+        1,
+        chunk_size=obj.chunk_size,
+        length=len(obj),
+        chunks=chunks,
+    )
+    return PlanEntry(
+        ctx.json_path,
+        "chunked.list",
+        "turbo_broccoli.custom.chunked",
+        inline,
+        size + sub.artifact_size,
+        len(chunks) + sub.artifacts,
+        ctx.artifact_codec is None and all(e.exact for e in sub.entries),
+    )
+
+
+def _doc_size(type_name: str, version: int, **kwargs: Any) -> int:
+    """Size of a typed JSON document. Use `None` for a subdocument."""
+    doc = {"__type__": type_name, "__version__": version, **kwargs}
+    n = len(json.dumps(doc))
+    return n - 4 * sum(v is None for v in kwargs.values())
+
+
+def _embed_entry(entry: PlanEntry, total: int) -> int:
+    """
+    Turns the entry of a plain dict or list whose JSON representation is
+    `total` bytes long into that of an embedded dict or list. Returns the size
+    of the embedded document.
+    """
+    entry.type_name = f"embedded.{entry.type_name}"
+    entry.encoder = "turbo_broccoli.custom.embedded"
+    entry.artifact_size, entry.artifacts = total, 1
+    entry.exact = False
+    entry.inline_size = _doc_size(entry.type_name, 1, id=_ID)
+    return entry.inline_size
+
+
+def _numpy_entry(obj: Any, ctx: Context) -> PlanEntry | None:
+    np = sys.modules.get("numpy")
+    if np is None or not isinstance(obj, np.ndarray):
+        return None
+    from .custom.numpy import _SAFETENSORS_DTYPES
+
+    d = obj.dtype
+    dtype = _SAFETENSORS_DTYPES.get(f"{d.kind}{d.itemsize}")
+    if dtype is None or not d.isnative or sys.byteorder != "little":
+        return None  # Encoded for real
+    _, size = tensor_buffers(dtype, list(obj.shape), [], obj.nbytes)
+    return _tensor_entry(
+        "numpy.ndarray", "numpy", (5, 6), obj.nbytes, size, ctx
+    )
+
+
+def _pandas_entry(obj: Any, ctx: Context) -> PlanEntry | None:
+    pd = sys.modules.get("pandas")
+    if pd is None or not isinstance(obj, (pd.DataFrame, pd.Series)):
+        return None
+    df = obj
+    if isinstance(obj, pd.Series):
+        name = obj.name if obj.name is not None else "main"
+        df = obj.to_frame(name=name)
+    size = int(df.memory_usage(deep=True).sum())
+    dtypes = [[str(k), v.name] for k, v in df.dtypes.items()]
+    if size <= ctx.min_artifact_size:
+        inline = size + _doc_size(
+            "pandas.dataframe", 2, data=None, dtypes=dtypes
+        )
+        art = 0
+    else:
+        inline, art = (
+            _doc_size(
+                "pandas.dataframe",
+                2,
+                dtypes=dtypes,
+                id=_ID,
+                format=ctx.pandas_format,
+            ),
+            size,
+        )
+    type_name = "pandas.dataframe"
+    if isinstance(obj, pd.Series):
+        inline += _doc_size("pandas.series", 2, data=None, name=name)
+        type_name = "pandas.series"
+    return PlanEntry(
+        ctx.json_path,
+        type_name,
+        "turbo_broccoli.custom.pandas",
+        inline,
+        art,
+        int(art > 0),
+        False,
+    )
+
+
+def _pytorch_entry(obj: Any, ctx: Context) -> PlanEntry | None:
+    torch = sys.modules.get("torch")
+    if torch is None or not isinstance(obj, torch.Tensor) or obj.is_sparse:
+        return None
+    from .custom.pytorch import _SAFETENSORS_DTYPES
+
+    if obj.numel() == 0:
+        return PlanEntry(
+            ctx.json_path,
+            "pytorch.tensor",
+            "turbo_broccoli.custom.pytorch",
+            _doc_size("pytorch.tensor", 3, data=None) + 4,
+        )
+    if obj.dtype not in _SAFETENSORS_DTYPES or sys.byteorder != "little":
+        return None  # Encoded for real
+    nbytes = obj.numel() * obj.element_size()
+    _, size = tensor_buffers(
+        _SAFETENSORS_DTYPES[obj.dtype], list(obj.shape), [], nbytes
+    )
+    return _tensor_entry(
+        "pytorch.tensor", "pytorch", (3, 4), nbytes, size, ctx
+    )
+
+
+def _tensor_entry(
+    type_name: str,
+    module: str,
+    versions: tuple[int, int],
+    nbytes: int,
+    size: int,
+    ctx: Context,
+) -> PlanEntry:
+    """
+    Entry of a numpy array or pytorch tensor whose data is `nbytes` long and
+    whose safetensors representation is `size` bytes long. The first version
+    is that of the inline document, the second that of the direct artifact
+    document.
+    """
+    encoder = "turbo_broccoli.custom." + module
+    if ctx.artifact_codec is None and nbytes >= ctx.large_artifact_size:
+        inline = _doc_size(type_name, versions[1], id=_ID)
+        return PlanEntry(ctx.json_path, type_name, encoder, inline, size, 1)
+    inline, art = _bytes_sizes(size, ctx)
+    inline += _doc_size(type_name, versions[0], data=None)
+    return PlanEntry(
+        ctx.json_path,
+        type_name,
+        encoder,
+        inline,
+        art,
+        int(art > 0),
+        ctx.artifact_codec is None,
+    )
+
+
+def _stream_entry(obj: Any, ctx: Context) -> PlanEntry | None:
+    if not isinstance(obj, Stream):
+        return None
+    inline = _doc_size("stream", 1, id=_ID)
+    if obj._id is None and isinstance(obj._iterable, Iterator):
+        # Iterating would consume the stream, so its size is unknown
+        return PlanEntry(
+            ctx.json_path,
+            "stream",
+            "turbo_broccoli.custom.stream",
+            inline,
+            0,
+            1,
+            False,
+        )
+    sub, size = Plan(), 0
+    for i, x in enumerate(obj):
+        n, _ = _plan(x, ctx / str(i), sub)
+        size += n + 1  # Newline
+    return PlanEntry(
+        ctx.json_path,
+        "stream",
+        "turbo_broccoli.custom.stream",
+        inline,
+        size + sub.artifact_size,
+        1 + sub.artifacts,
+        all(e.exact for e in sub.entries),
+    )
+
+
+_ESTIMATORS: list[Callable[[Any, Context], PlanEntry | None]] = [
+    _bytes_entry,
+    _numpy_entry,
+    _pytorch_entry,
+    _pandas_entry,
+    _chunked_entry,
+    _stream_entry,
+]
+
+
+def _plan(
+    obj: Any, ctx: Context, plan: Plan, embeddable: bool = False
+) -> tuple[int, bool]:
+    """
+    Plans the encoding of `obj` at `ctx.json_path`, whose artifacts are
+    written to a `MemoryStorage`. Returns the size of `obj` in its parent
+    document, and whether an entry was added for it. `embeddable` is `True`
+    if `obj` is in a plain dict or list, see
+    `turbo_broccoli.turbo_broccoli._embed_large_children`.
+    """
+    name = obj.__class__.__name__
+    if name in user.encoders:
+        obj = user.encoders[name](obj, ctx)
+    if type(obj) in _PRIMITIVES:
+        return len(json.dumps(obj)), False
+    if isinstance(obj, (EmbeddedDict, EmbeddedList)):
+        # Planned as a plain dict or list that is embedded, since the real
+        # encoder would write the artifact and set the object's artifact id
+        i = len(plan.entries)
+        content = dict(obj) if isinstance(obj, dict) else list(obj)
+        total, _ = _plan(content, ctx, plan)
+        return _embed_entry(plan.entries[i], total), True
+    for estimate in _ESTIMATORS:
+        if (entry := estimate(obj, ctx)) is not None:
+            plan.entries.append(entry)
+            return entry.inline_size, True
+    doc, encoder = obj, None
+    for f in get_encoders(type(obj)):
+        try:
+            doc, encoder = f(obj, ctx), f.__module__
+            break
+        except TypeNotSupported:
+            pass
+    assert isinstance(ctx.storage, MemoryStorage)  # for typechecking
+    sizes = [len(v) for v in ctx.storage.data.values()]
+    ctx.storage.data.clear()
+    if isinstance(doc, dict):
+        items: Any = doc.items()
+        inline = 2 + sum(len(json.dumps(str(k))) + 2 for k in doc)
+    elif isinstance(doc, (list, tuple)):
+        items = enumerate(doc)
+        inline = 2
+    else:
+        raise TypeError(
+            f"Cannot serialize object of type '{type(obj).__name__}' at "
+            f"'{ctx.json_path}'"
+        )
+    inline += 2 * max(len(doc) - 1, 0)  # Separators
+    entry = PlanEntry(
+        ctx.json_path,
+        doc.get("__type__", "dict") if isinstance(doc, dict) else "list",
+        encoder,
+        inline,
+        sum(sizes),
+        len(sizes),
+    )
+    plan.entries.append(entry)
+    plain = encoder is None and type(obj) in (dict, list)
+    total = inline
+    for k, v in items:
+        size, has_entry = _plan(v, ctx / k, plan, plain)
+        total += size
+        if not has_entry:
+            entry.inline_size += size
+    if (
+        embeddable
+        and plain
+        and ctx.min_embedding_size is not None
+        and total >= ctx.min_embedding_size
+    ):
+        total = _embed_entry(entry, total)
+    return total, True
+
+
+def plan(obj: Any, ctx: Context | None = None, **kwargs: Any) -> Plan:
+    """
+    Returns how `obj` would be encoded, without writing anything. See module
+    documentation.
+
+    Args:
+        obj (Any):
+        ctx (Context | None): The context to use. If `None`, a new context will
+            be created with the kwargs.
+        **kwargs: Forwarded to the `turbo_broccoli.context.Context`
+            constructor. If `ctx` is provided, the kwargs are ignored.
+    """
+    ctx = Context(**kwargs) if ctx is None else ctx
+    with MemoryStorage() as storage:
+        sandbox = Context(
+            **{
+                **ctx.__dict__,
+                "incremental": False,
+                "reuse_artifacts": False,
+                "stats": None,
+                "storage": storage,
+            }
+        )
+        result = Plan()
+        result.document_size, _ = _plan(obj, sandbox, result)
+    return result
@@ -0,0 +1,235 @@
+"""
+Artifact re-use. If a document is loaded with `reuse_artifacts=True`, e.g.
+
+```py
+obj = tb.load_json("foo/bar.json", reuse_artifacts=True)
+tb.save_json(obj, "baz/qux.json")
+```
+
+then the objects that were decoded from artifacts remember where they come
+from, along with a fingerprint of their content. When such an object is
+serialized again and its fingerprint hasn't changed, it is not serialized at
+all: instead, its artifacts are copied to the new artifact path (which for
+`turbo_broccoli.storage.LocalStorage` means hard linked or reflinked if
+possible), and the original JSON document is re-used verbatim.
+
+Supported types are numpy arrays, pytorch tensors, and pandas dataframes and
+series. Other types are serialized as usual, but their own artifact-backed
+members (e.g. the arrays of a scikit-learn estimator) may still be re-used.
+
+The same mechanism powers incremental saves. If an object is serialized with
+`incremental=True`, e.g.
+
+```py
+ctx = tb.Context("foo/bar.json", incremental=True)
+for step in range(n_steps):
+    results[step] = ...
+    tb.save_json(results, ctx=ctx)
+```
+
+then the supported objects that were written to artifacts remember the JSON
+document they were encoded to. On the next save with an incremental context,
+the unchanged ones are not encoded again: their artifacts are still there,
+and their previous document is re-used. Thus, the cost of a save is roughly
+that of fingerprinting the object plus that of encoding what changed.
+"""
+
+import hashlib
+import sys
+import weakref
+from contextlib import nullcontext
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, ContextManager
+
+from .context import Context
+from .storage import (
+    LocalStorage,
+    RecordingStorage,
+    StorageBackend,
+    StorageWrapper,
+)
+
+
+@dataclass
+class _Record:
+    """Where an object was decoded from"""
+
+    artifacts: list[Path]
+    document: dict
+    fingerprint: bytes
+    ref: weakref.ref
+    storage: StorageBackend
+
+
+INCREMENTAL: dict[int, _Record] = {}
+"""
+Maps the `id` of incrementally encoded objects to their record. Only
+consulted by incremental contexts.
+"""
+
+REGISTRY: dict[int, _Record] = {}
+"""Maps the `id` of objects decoded with `reuse_artifacts=True` to their
+record"""
+
+
+def _numpy_buffer(obj: Any) -> tuple[str, memoryview] | None:
+    np = sys.modules.get("numpy")
+    if np is None or not isinstance(obj, np.ndarray) or obj.dtype.hasobject:
+        return None
+    meta = f"numpy.ndarray:{obj.dtype.str}:{obj.shape}"
+    x = np.ascontiguousarray(obj).reshape(-1).view(np.uint8)
+    return meta, memoryview(x)
+
+
+def _pandas_buffer(obj: Any) -> tuple[str, memoryview] | None:
+    pd = sys.modules.get("pandas")
+    if pd is None or not isinstance(obj, (pd.DataFrame, pd.Series)):
+        return None
+    try:
+        h = pd.util.hash_pandas_object(obj, index=True).to_numpy()
+    except TypeError:  # Unhashable cells
+        return None
+    if isinstance(obj, pd.DataFrame):
+        meta = f"pandas.DataFrame:{list(obj.columns)}:{list(obj.dtypes)}"
+    else:
+        meta = f"pandas.Series:{obj.name}:{obj.dtype}"
+    return meta, memoryview(h.view("uint8"))
+
+
+def _pytorch_buffer(obj: Any) -> tuple[str, memoryview] | None:
+    torch = sys.modules.get("torch")
+    if torch is None or not isinstance(obj, torch.Tensor) or obj.is_sparse:
+        return None
+    x = obj.detach().cpu().contiguous().reshape(-1)
+    meta = f"torch.Tensor:{obj.dtype}:{tuple(obj.shape)}"
+    return meta, memoryview(x.view(torch.uint8).numpy())
+
+
+_BUFFERS: list[Callable[[Any], tuple[str, memoryview] | None]] = [
+    _numpy_buffer,
+    _pytorch_buffer,
+    _pandas_buffer,
+]
+
+
+def fingerprint(obj: Any) -> bytes | None:
+    """
+    Returns a fingerprint of the content of `obj`, or `None` if the type of
+    `obj` is not supported.
+    """
+    for f in _BUFFERS:
+        if (buf := f(obj)) is not None:
+            h = hashlib.blake2b(buf[0].encode("utf-8"), digest_size=16)
+            h.update(buf[1])
+            return h.digest()
+    return None
+
+
+def active(ctx: Context, encoding: bool = False) -> bool:
+    """
+    Whether encoding (or decoding) with `ctx` needs to go through
+    `turbo_broccoli.provenance.begin` and `turbo_broccoli.provenance.reuse` at
+    every node
+    """
+    if encoding:
+        return bool(REGISTRY) or begin(ctx, encoding) is not None
+    return begin(ctx) is not None
+
+
+def begin(ctx: Context, encoding: bool = False) -> int | None:
+    """
+    Called before a typed dict is decoded, or before an object is encoded if
+    `encoding` is `True`, within a `turbo_broccoli.provenance.session`.
+    Returns a marker to pass to
+    `turbo_broccoli.provenance.register`, or `None` if the context neither
+    reuses artifacts nor is incremental.
+    """
+    if not isinstance(ctx.storage, RecordingStorage):
+        return None
+    if encoding:
+        return len(ctx.storage.writes) if ctx.incremental else None
+    return len(ctx.storage.reads) if ctx.reuse_artifacts else None
+
+
+def session(ctx: Context) -> ContextManager:
+    """
+    Context manager around a top-level encoding or decoding. The artifact
+    paths recorded by the storage of `ctx` are cleared when the outermost
+    session ends.
+    """
+    if isinstance(ctx.storage, RecordingStorage):
+        return ctx.storage.session()
+    return nullcontext()
+
+
+def register(
+    obj: Any,
+    document: dict,
+    ctx: Context,
+    marker: int,
+    encoding: bool = False,
+) -> None:
+    """
+    Called after `document` has been decoded to `obj` (or after `obj` has been
+    encoded to `document` if `encoding` is `True`). If artifacts have been
+    read (resp. written) since `marker` was obtained, and if `obj` is
+    supported, remembers where `obj` comes from.
+    """
+    assert isinstance(ctx.storage, RecordingStorage)  # for typechecking
+    paths = ctx.storage.writes if encoding else ctx.storage.reads
+    artifacts = paths[marker:]
+    if not artifacts or (fp := fingerprint(obj)) is None:
+        return
+    key, registry = id(obj), INCREMENTAL if encoding else REGISTRY
+    try:
+        ref = weakref.ref(obj, lambda _: registry.pop(key, None))
+    except TypeError:  # e.g. subclasses of bytes
+        return
+    registry[key] = _Record(
+        artifacts=list(dict.fromkeys(artifacts)),
+        document=document,
+        fingerprint=fp,
+        ref=ref,
+        storage=ctx.storage.unwrap(),
+    )
+
+
+def reuse(obj: Any, ctx: Context) -> dict | None:
+    """
+    If `obj` was decoded from artifacts (or, if `ctx` is incremental, encoded
+    incrementally) and hasn't changed since, copies these artifacts to the
+    artifact path of `ctx` and returns the JSON document of `obj`. Otherwise,
+    returns `None`.
+    """
+    record, registry = None, REGISTRY
+    if ctx.incremental:
+        record, registry = INCREMENTAL.get(id(obj)), INCREMENTAL
+    if record is None:
+        record, registry = REGISTRY.get(id(obj)), REGISTRY
+    if record is None or record.ref() is not obj:
+        return None
+    if fingerprint(obj) != record.fingerprint:
+        registry.pop(id(obj), None)
+        return None
+    storage = ctx.storage
+    if isinstance(storage, StorageWrapper):
+        storage = storage.unwrap()
+    try:
+        for src in record.artifacts:
+            art_id, extension = src.name.split(".")[-2:]
+            dst = ctx.id_to_artifact_path(art_id, extension)
+            if storage.exists(dst):
+                continue
+            if storage is record.storage or (
+                isinstance(storage, LocalStorage)
+                and isinstance(record.storage, LocalStorage)
+            ):
+                storage.copy(src, dst)
+            else:
+                storage.write(dst, record.storage.read(src))
+    except (FileNotFoundError, ValueError):
+        # The source artifacts are gone, or their storage has been closed
+        registry.pop(id(obj), None)
+        return None
+    return record.document
@@ -0,0 +1,327 @@
+"""
+Schema-driven deserialization. If the structure of a document is known in
+advance, pass it as a type to `turbo_broccoli.turbo_broccoli.load_json` or
+`turbo_broccoli.turbo_broccoli.from_json`:
+
+```py
+@dataclass
+class Result:
+    name: str
+    scores: dict[str, float]
+    weights: np.ndarray
+    history: list[Step]  # Step is another dataclass
+
+
+results = tb.load_json("out/results.json", schema=list[Result])
+```
+
+The schema is compiled (once per process) into a decoder specialized for
+that type, which follows the structure of the document instead of inspecting
+every dict for a `__type__` key, and validates it along the way: a
+`turbo_broccoli.exceptions.DeserializationError` is raised as soon as a part of
+the document doesn't match the schema. Dataclasses are decoded using the
+schema, so they don't need to be listed in the context's `dataclass_types`.
+
+The following types can be used in a schema:
+
+- `None`, `bool`, `int`, `float` (which also accepts integers), `str`;
+- `list[T]`, `tuple[T, ...]`, `tuple[T1, T2, ...]`, `set[T]`,
+  `frozenset[T]`, `dict[str, T]`;
+- dataclasses and `typing.TypedDict`s, whose fields are decoded according to
+  their annotations;
+- `T1 | T2`, `typing.Optional[T]`, `typing.Literal[...]`;
+- `typing.Any`, in which case the corresponding part of the document is
+  decoded normally;
+- any other class, e.g. `numpy.ndarray` or `pandas.DataFrame`. The
+  corresponding part of the document is decoded normally, and the result
+  must be an instance of that class.
+
+Parts of the document that are not decoded because their type is set as
+nodecode in the context (see `turbo_broccoli.context.Context`) are not
+validated.
+"""
+
+import dataclasses
+import threading
+import types
+import typing
+from typing import Any, Callable
+
+from .context import Context
+from .exceptions import DeserializationError, TypeIsNodecode
+
+Decoder = Callable[[Any, Context], Any]
+"""A compiled schema"""
+
+_COMPILED: dict[Any, Decoder] = {}
+_LOCK = threading.RLock()
+
+
+def _error(ctx: Context, message: str) -> DeserializationError:
+    """Validation error at the current JSONpath"""
+    return DeserializationError(f"At {ctx.json_path}: {message}")
+
+
+def _is_nodecode(obj: Any, ctx: Context) -> bool:
+    """Whether `obj` is a typed JSON dict that was not decoded on purpose"""
+    if not (isinstance(obj, dict) and "__type__" in obj):
+        return False
+    try:
+        ctx.raise_if_nodecode(str(obj["__type__"]))
+    except TypeIsNodecode:
+        return True
+    return False
+
+
+def _unwrap(
+    obj: Any, ctx: Context, type_name: str, version: int
+) -> dict | None:
+    """
+    If `obj` is a typed JSON dict of type `type_name`, checks its version and
+    returns it. If that type is nodecode, returns `None`, and `obj` should be
+    decoded normally.
+    """
+    if not (isinstance(obj, dict) and obj.get("__type__") == type_name):
+        raise _error(ctx, f"expected a document of type '{type_name}'")
+    try:
+        ctx.raise_if_nodecode(type_name)
+    except TypeIsNodecode:
+        return None
+    if obj.get("__version__") != version:
+        raise _error(
+            ctx,
+            f"unsupported version {obj.get('__version__')} for type "
+            f"'{type_name}'",
+        )
+    return obj
+
+
+def _compile(schema: Any) -> Decoder:
+    # pylint: disable=too-many-branches,too-many-return-statements
+    from .turbo_broccoli import _from_jsonable
+
+    if schema is Any or schema is object:
+        return _from_jsonable
+    if schema is None or schema is types.NoneType:
+        return _compile_primitive(types.NoneType)
+    if schema in (bool, int, float, str):
+        return _compile_primitive(schema)
+    origin, args = typing.get_origin(schema), typing.get_args(schema)
+    if origin in (typing.Union, types.UnionType):
+        return _compile_union([compile_schema(a) for a in args])
+    if origin is typing.Literal:
+        return _compile_literal(args)
+    if origin is list:
+        return _compile_list(compile_schema(args[0] if args else Any))
+    if origin is tuple or schema is tuple:
+        return _compile_tuple(args)
+    if origin in (set, frozenset) or schema in (set, frozenset):
+        return _compile_set(origin or schema, args)
+    if origin is dict or schema is dict:
+        return _compile_dict(args[1] if len(args) == 2 else Any)
+    if isinstance(schema, type) and dataclasses.is_dataclass(schema):
+        return _compile_dataclass(schema)
+    if typing.is_typeddict(schema):
+        return _compile_typeddict(schema)
+    if isinstance(schema, type):
+        return _compile_class(schema)
+    raise TypeError(f"Unsupported schema: {schema!r}")
+
+
+def _compile_class(cls: type) -> Decoder:
+    from .turbo_broccoli import _from_jsonable
+
+    def _decode(obj: Any, ctx: Context) -> Any:
+        obj = _from_jsonable(obj, ctx)
+        if not (isinstance(obj, cls) or _is_nodecode(obj, ctx)):
+            raise _error(
+                ctx,
+                f"expected an object of type '{cls.__name__}', got "
+                f"'{type(obj).__name__}'",
+            )
+        return obj
+
+    return _decode
+
+
+def _compile_dataclass(cls: type) -> Decoder:
+    from .turbo_broccoli import _from_jsonable
+
+    fields: dict[str, Decoder] = {}
+
+    def _decode(obj: Any, ctx: Context) -> Any:
+        dct = _unwrap(obj, ctx, "dataclass." + cls.__name__, 3)
+        if dct is None:
+            return _from_jsonable(obj, ctx)
+        data = dct["data"]
+        if not isinstance(data, dict):
+            raise _error(ctx, "dataclass data must be a dict")
+        kwargs = {}
+        for k, v in data.items():
+            if k not in fields:
+                raise _error(ctx, f"unexpected field '{k}'")
+            kwargs[k] = fields[k](v, ctx / "data" / k)
+        try:
+            return cls(**kwargs)
+        except TypeError as exc:
+            raise _error(ctx, str(exc)) from exc
+
+    # Registered before compiling the fields for recursive dataclasses
+    _COMPILED[cls] = _decode
+    for k, t in typing.get_type_hints(cls).items():
+        fields[k] = compile_schema(t)
+    return _decode
+
+
+def _compile_dict(value_schema: Any) -> Decoder:
+    decode_value = compile_schema(value_schema)
+    decode_typed = _compile_class(dict)
+
+    def _decode(obj: Any, ctx: Context) -> dict:
+        if not isinstance(obj, dict):
+            raise _error(ctx, f"expected a dict, got '{type(obj).__name__}'")
+        if "__type__" in obj:  # e.g. an embedded dict
+            return decode_typed(obj, ctx)
+        return {k: decode_value(v, ctx / k) for k, v in obj.items()}
+
+    return _decode
+
+
+def _compile_list(item: Decoder) -> Decoder:
+    decode_typed = _compile_class(list)
+
+    def _decode(obj: Any, ctx: Context) -> list:
+        if isinstance(obj, dict) and "__type__" in obj:  # e.g. embedded list
+            return decode_typed(obj, ctx)
+        if not isinstance(obj, list):
+            raise _error(ctx, f"expected a list, got '{type(obj).__name__}'")
+        return [item(v, ctx / str(i)) for i, v in enumerate(obj)]
+
+    return _decode
+
+
+def _compile_literal(values: tuple) -> Decoder:
+    def _decode(obj: Any, ctx: Context) -> Any:
+        if obj not in values:
+            raise _error(ctx, f"expected one of {values!r}, got {obj!r}")
+        return obj
+
+    return _decode
+
+
+def _compile_primitive(cls: type) -> Decoder:
+    accepted = (int, float) if cls is float else cls
+
+    def _decode(obj: Any, ctx: Context) -> Any:
+        if not isinstance(obj, accepted) or (
+            isinstance(obj, bool) and cls is not bool
+        ):
+            raise _error(
+                ctx,
+                f"expected a '{cls.__name__}', got '{type(obj).__name__}'",
+            )
+        return obj
+
+    return _decode
+
+
+def _compile_set(cls: type, args: tuple) -> Decoder:
+    from .turbo_broccoli import _from_jsonable
+
+    item = compile_schema(args[0] if args else Any)
+
+    def _decode(obj: Any, ctx: Context) -> Any:
+        dct = _unwrap(obj, ctx, "collections.set", 2)
+        if dct is None:
+            return _from_jsonable(obj, ctx)
+        ctx = ctx / "data"
+        return cls(item(v, ctx / str(i)) for i, v in enumerate(dct["data"]))
+
+    return _decode
+
+
+def _compile_tuple(args: tuple) -> Decoder:
+    from .turbo_broccoli import _from_jsonable
+
+    if not args or (len(args) == 2 and args[1] is Ellipsis):
+        items = None
+        item = compile_schema(args[0] if args else Any)
+    else:
+        items = [compile_schema(a) for a in args]
+
+    def _decode(obj: Any, ctx: Context) -> tuple:
+        dct = _unwrap(obj, ctx, "collections.tuple", 1)
+        if dct is None:
+            return _from_jsonable(obj, ctx)
+        data, ctx = dct["data"], ctx / "data"
+        if items is None:
+            return tuple(item(v, ctx / str(i)) for i, v in enumerate(data))
+        if len(data) != len(items):
+            raise _error(
+                ctx, f"expected {len(items)} elements, got {len(data)}"
+            )
+        return tuple(
+            f(v, ctx / str(i)) for i, (f, v) in enumerate(zip(items, data))
+        )
+
+    return _decode
+
+
+def _compile_typeddict(cls: type) -> Decoder:
+    fields: dict[str, Decoder] = {}
+    required: frozenset = getattr(cls, "__required_keys__", frozenset())
+
+    def _decode(obj: Any, ctx: Context) -> dict:
+        if not isinstance(obj, dict) or "__type__" in obj:
+            raise _error(ctx, f"expected a plain dict for '{cls.__name__}'")
+        if missing := required - obj.keys():
+            raise _error(ctx, f"missing keys {sorted(missing)}")
+        result = {}
+        for k, v in obj.items():
+            if k not in fields:
+                raise _error(ctx, f"unexpected key '{k}'")
+            result[k] = fields[k](v, ctx / k)
+        return result
+
+    _COMPILED[cls] = _decode
+    for k, t in typing.get_type_hints(cls).items():
+        fields[k] = compile_schema(t)
+    return _decode
+
+
+def _compile_union(options: list[Decoder]) -> Decoder:
+    def _decode(obj: Any, ctx: Context) -> Any:
+        errors = []
+        for f in options:
+            try:
+                return f(obj, ctx)
+            except DeserializationError as exc:
+                errors.append(str(exc))
+        raise _error(
+            ctx, "no option of the union matches: " + "; ".join(errors)
+        )
+
+    return _decode
+
+
+def compile_schema(schema: Any) -> Decoder:
+    """
+    Compiles a schema into a decoder, which is a function that takes an object
+    fresh from `json.load` or `json.loads` and a context. The result is cached,
+    so this is only costly the first time a given schema is compiled. See
+    module documentation.
+    """
+    with _LOCK:
+        if (decoder := _COMPILED.get(schema)) is not None:
+            return decoder
+        before = set(_COMPILED)
+        try:
+            decoder = _COMPILED[schema] = _compile(schema)
+        except Exception:
+            # Dataclasses and typed dicts are registered before their fields
+            # are compiled, so a failure leaves half-built decoders (and the
+            # decoders that use them) behind
+            for k in set(_COMPILED) - before:
+                del _COMPILED[k]
+            raise
+        return decoder
@@ -0,0 +1,253 @@
+"""
+Documents shared between processes. If several processes (e.g. the workers of
+a pool) need the same large document, use
+
+```py
+import turbo_broccoli as tb
+
+reference = tb.load_shared("data/reference.json")
+```
+
+in each of them instead of `turbo_broccoli.load_json`. The first process to
+call `load_shared` decodes the document and copies it into a
+[shared memory](https://docs.python.org/3/library/multiprocessing.shared_memory.html)
+segment. The other processes attach to that segment, and the numpy arrays,
+pytorch tensors, and pandas objects they get are backed by the shared memory,
+so their data is neither copied nor decoded again. Only the structure of the
+document around them (dicts, lists, strings, etc.) is rebuilt in each process.
+
+Shared arrays, tensors, and dataframes are read-only, since modifying them
+would modify them for all processes. The document must be picklable. Objects
+that are not directly in dicts, lists, or tuples, e.g. tensors in a dataclass,
+are shared through their pickled representation, i.e. copied in every
+process.
+
+By default, the segment is named after the file's path, modification time, and
+size, so that all the processes calling `load_shared` on the same file find
+the same segment, and a modified file gets a new segment. The context
+parameters (e.g. `nodecode_types`) are not part of the name. The segment is
+removed when the process that created it exits, or when
+`turbo_broccoli.shared.unlink_shared` is called. Processes that are already
+attached to it can keep using it.
+"""
+
+import atexit
+import hashlib
+import pickle
+import struct
+import sys
+import threading
+import time
+import warnings
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+from typing import Any
+
+from .context import Context
+from .turbo_broccoli import _make_or_set_ctx, load_json
+
+ALIGNMENT = 64
+"""Alignment of the shared buffers, in bytes"""
+
+_HEADER = struct.Struct("<BQ")  # ready flag, length of the metadata
+_CREATED: set[str] = set()
+_SEGMENTS: dict[str, SharedMemory] = {}
+_LOCK = threading.Lock()
+
+
+class _Tensor:
+    """Stand-in for a pytorch tensor, which is pickled as a numpy array"""
+
+    array: Any
+
+    def __init__(self, array: Any) -> None:
+        self.array = array
+
+
+def _attach(name: str, timeout: float) -> SharedMemory:
+    """
+    Attaches to an existing segment and waits until its creator has finished
+    writing it. Raises a `FileNotFoundError` if there is no such segment.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            if sys.version_info >= (3, 13):
+                shm = SharedMemory(name, track=False)
+            else:
+                shm = SharedMemory(name)
+                # Otherwise the segment is removed when this process exits
+                resource_tracker.unregister(
+                    shm._name,
+                    "shared_memory",  # type: ignore
+                )
+            if shm.buf[0] == 1:
+                return shm
+            shm.close()
+        except ValueError:  # Created but not yet sized
+            pass
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Shared document '{name}' is not ready")
+        time.sleep(0.01)
+
+
+def _align(n: int) -> int:
+    """Rounds `n` up to a multiple of `turbo_broccoli.shared.ALIGNMENT`"""
+    return -(-n // ALIGNMENT) * ALIGNMENT
+
+
+def _create(name: str, ctx: Context, timeout: float) -> SharedMemory:
+    """
+    Loads the document and copies it into a new segment. If another process
+    created the segment in the meantime, attaches to it instead.
+    """
+    try:
+        return _export(load_json(ctx=ctx), name)
+    except FileExistsError:
+        return _attach(name, timeout)
+
+
+def _default_name(path: Path) -> str:
+    """Segment name of a file, see module documentation"""
+    st = path.stat()
+    key = f"{path.resolve()}:{st.st_mtime_ns}:{st.st_size}"
+    return "tb-" + hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
+
+
+def _export(obj: Any, name: str) -> SharedMemory:
+    """
+    Copies a decoded document into a new segment, which is removed when this
+    process exits. Raises a `FileExistsError` if the segment already exists.
+    """
+    buffers: list[pickle.PickleBuffer] = []
+    skeleton = pickle.dumps(
+        _to_shareable(obj), protocol=5, buffer_callback=buffers.append
+    )
+    views, layout, offset = [b.raw() for b in buffers], [], 0
+    for v in views:
+        offset = _align(offset)
+        layout.append((offset, v.nbytes))
+        offset += v.nbytes
+    meta = pickle.dumps((skeleton, layout))
+    start = _align(_HEADER.size + len(meta))
+    shm = SharedMemory(name, create=True, size=start + offset)
+    _HEADER.pack_into(shm.buf, 0, 0, len(meta))
+    shm.buf[_HEADER.size : _HEADER.size + len(meta)] = meta
+    for (o, n), v in zip(layout, views):
+        shm.buf[start + o : start + o + n] = v
+    shm.buf[0] = 1
+    if not _CREATED:
+        atexit.register(_unlink_created)
+    _CREATED.add(name)
+    return shm
+
+
+def _from_shareable(obj: Any) -> Any:
+    """Inverse of `turbo_broccoli.shared._to_shareable`"""
+    if isinstance(obj, dict):
+        return {k: _from_shareable(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_from_shareable(v) for v in obj]
+    if isinstance(obj, tuple) and not hasattr(obj, "_fields"):
+        return tuple(_from_shareable(v) for v in obj)
+    if isinstance(obj, _Tensor):
+        import torch
+
+        with warnings.catch_warnings():  # The array is not writable
+            warnings.simplefilter("ignore", UserWarning)
+            return torch.from_numpy(obj.array)
+    return obj
+
+
+def _read(shm: SharedMemory) -> Any:
+    """Rebuilds the document from a segment"""
+    _, n = _HEADER.unpack_from(shm.buf, 0)
+    skeleton, layout = pickle.loads(shm.buf[_HEADER.size : _HEADER.size + n])
+    start = _align(_HEADER.size + n)
+    buffers = [
+        shm.buf[start + o : start + o + k].toreadonly() for o, k in layout
+    ]
+    return _from_shareable(pickle.loads(skeleton, buffers=buffers))
+
+
+def _to_shareable(obj: Any) -> Any:
+    """
+    Replaces the pytorch tensors in a document by `_Tensor`s, since tensors
+    are not pickled with out-of-band buffers
+    """
+    if isinstance(obj, dict):
+        return {k: _to_shareable(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_to_shareable(v) for v in obj]
+    if isinstance(obj, tuple) and not hasattr(obj, "_fields"):
+        return tuple(_to_shareable(v) for v in obj)
+    if (torch := sys.modules.get("torch")) and isinstance(obj, torch.Tensor):
+        return _Tensor(obj.detach().cpu().numpy())
+    return obj
+
+
+def _unlink_created() -> None:
+    """Removes the segments created by this process, called at exit"""
+    for name in list(_CREATED):
+        unlink_shared(name=name)
+
+
+def load_shared(
+    file_path: str | Path | None = None,
+    name: str | None = None,
+    ctx: Context | None = None,
+    timeout: float = 60,
+    **kwargs: Any,
+) -> Any:
+    """
+    Loads a JSON file into shared memory, or attaches to the shared memory
+    segment where another process already loaded it. See module
+    documentation.
+
+    Args:
+        file_path (str | Path | None): If left to `None`, a context with a file
+            path must be provided
+        name (str | None): Name of the shared memory segment. Defaults to a
+            name derived from the file's path, modification time, and size.
+        ctx (Context | None): The context to use. If `None`, a new context will
+            be created with the kwargs.
+        timeout (float): Maximum number of seconds to wait for another process
+            to finish writing the segment
+        **kwargs: Forwarded to the `turbo_broccoli.context.Context`
+            constructor. If `ctx` is provided, the kwargs are ignored.
+    """
+    ctx = _make_or_set_ctx(file_path, ctx, **kwargs)
+    assert isinstance(ctx.file_path, Path)  # for typechecking
+    name = name or _default_name(ctx.file_path)
+    with _LOCK:
+        if (shm := _SEGMENTS.get(name)) is None:
+            try:
+                shm = _attach(name, timeout)
+            except FileNotFoundError:
+                shm = _create(name, ctx, timeout)
+            # Never closed, since the decoded objects use its buffer
+            _SEGMENTS[name] = shm
+    return _read(shm)
+
+
+def unlink_shared(
+    file_path: str | Path | None = None, name: str | None = None
+) -> None:
+    """
+    Removes the shared memory segment of a file (or with a given name), if
+    it exists. Processes that are already attached to it can keep using it,
+    but in other processes, a subsequent `turbo_broccoli.shared.load_shared`
+    creates a new segment.
+    """
+    if name is None:
+        if file_path is None:
+            raise ValueError("Either a file path or a name must be provided.")
+        name = _default_name(Path(file_path))
+    _CREATED.discard(name)
+    try:
+        shm = SharedMemory(name)
+    except FileNotFoundError:
+        return
+    shm.unlink()
+    shm.close()
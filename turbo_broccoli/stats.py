@@ -0,0 +1,467 @@
+"""
+Instrumentation. To find out where the time of a (de)serialization goes, pass
+a `turbo_broccoli.stats.Stats` collector to the context:
+
+```py
+stats = tb.Stats()
+tb.save_json(obj, "out/foo.json", stats=stats)
+print(stats.report())
+```
+
+The collector records, per type and per JSONpath prefix (e.g. `$.results`,
+see `path_depth`):
+
+* the number of objects encoded and decoded;
+* the time spent in their encoder and decoder, excluding the time spent
+  encoding or decoding the objects they contain;
+* the number, total size, and largest size of the artifacts they wrote and
+  read;
+* the time spent compressing and decompressing these artifacts (see
+  `turbo_broccoli.compression`).
+
+Types are named after the `__type__` of their JSON document (e.g.
+`numpy.ndarray`), or after their Python type if they don't have one (e.g.
+`str`). When encoding, every object is recorded, including plain dicts, lists,
+and primitives, since all of them go through the encoders. When decoding,
+only typed JSON dicts are. The collector also records the total time spent
+encoding and decoding documents, from which the time spent traversing them
+(rather than in encoders and decoders) is derived, and the time spent reading
+and writing JSON files.
+
+The same collector can be used for several operations, in which case its
+counters add up. If `callback` is set, it is called with the collector after
+each encoding or decoding, e.g. to export the counters to a metrics system.
+Contexts without a collector (the default) don't pay for any of this.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Generator, Iterable, Literal
+
+from .storage import StorageBackend, StorageWrapper
+
+_LOCAL = threading.local()
+
+
+@dataclass
+class Entry:
+    """Counters of a type or of a JSONpath prefix"""
+
+    encoded: int = 0
+    decoded: int = 0
+    encode_time: float = 0.0
+    decode_time: float = 0.0
+    compression_time: float = 0.0
+    decompression_time: float = 0.0
+    artifacts_written: int = 0
+    """Number of artifacts written"""
+    artifacts_read: int = 0
+    """Number of artifacts read"""
+    bytes_written: int = 0
+    """Total size of the artifacts written"""
+    bytes_read: int = 0
+    """Total size of the artifacts read"""
+    largest_artifact_written: int = 0
+    """Size of the largest artifact written, in bytes"""
+    largest_artifact_read: int = 0
+    """Size of the largest artifact read, in bytes"""
+
+    def add_artifacts(self, sizes: list[int], written: bool) -> None:
+        """Records artifacts that have been written or read"""
+        if not sizes:
+            return
+        if written:
+            self.artifacts_written += len(sizes)
+            self.bytes_written += sum(sizes)
+            self.largest_artifact_written = max(
+                self.largest_artifact_written, *sizes
+            )
+        else:
+            self.artifacts_read += len(sizes)
+            self.bytes_read += sum(sizes)
+            self.largest_artifact_read = max(
+                self.largest_artifact_read, *sizes
+            )
+
+    def to_dict(self) -> dict:
+        """Returns the counters as a vanilla JSON-serializable dict"""
+        return {
+            "encoded": self.encoded,
+            "decoded": self.decoded,
+            "encode_time": self.encode_time,
+            "decode_time": self.decode_time,
+            "compression_time": self.compression_time,
+            "decompression_time": self.decompression_time,
+            "artifacts_written": self.artifacts_written,
+            "artifacts_read": self.artifacts_read,
+            "bytes_written": self.bytes_written,
+            "bytes_read": self.bytes_read,
+            "largest_artifact_written": self.largest_artifact_written,
+            "largest_artifact_read": self.largest_artifact_read,
+        }
+
+
+class _Frame:
+    """An encoder or decoder call in progress"""
+
+    __slots__ = (
+        "child_time",
+        "compression_time",
+        "decompression_time",
+        "read",
+        "start",
+        "written",
+    )
+
+    def __init__(self) -> None:
+        self.child_time, self.start = 0.0, time.perf_counter()
+        self.compression_time, self.decompression_time = 0.0, 0.0
+        self.read: list[int] = []
+        self.written: list[int] = []
+
+
+class _CountingFile:
+    """Wraps a file object and counts the bytes read from or written to it"""
+
+    _fp: BinaryIO
+    _sizes: list[int]
+
+    def __init__(self, fp: BinaryIO, sizes: list[int]) -> None:
+        self._fp, self._sizes = fp, sizes
+        sizes.append(0)
+
+    def __enter__(self) -> "_CountingFile":
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self._fp.close()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._fp, name)
+
+    def __iter__(self) -> Any:
+        return iter(self._fp)
+
+    def read(self, *args: Any) -> bytes:
+        data = self._fp.read(*args)
+        self._sizes[-1] += len(data)
+        return data
+
+    def readinto(self, buffer: Any) -> int:
+        n = self._fp.readinto(buffer)  # type: ignore
+        self._sizes[-1] += n or 0
+        return n
+
+    def write(self, data: Any) -> int:
+        n = self._fp.write(data)
+        self._sizes[-1] += memoryview(data).nbytes if n is None else n
+        return n
+
+
+def _frame() -> _Frame | None:
+    """Innermost encoder or decoder call of this thread, if any"""
+    frames = getattr(_LOCAL, "frames", None)
+    return frames[-1] if frames else None
+
+
+def record_compression(elapsed: float, decompression: bool = False) -> None:
+    """
+    Attributes some (de)compression time (in seconds) to the innermost
+    encoder or decoder call of this thread. Does nothing if no collector is
+    recording.
+    """
+    if (frame := _frame()) is not None:
+        if decompression:
+            frame.decompression_time += elapsed
+        else:
+            frame.compression_time += elapsed
+
+
+class Stats:
+    """Statistics collector. See module documentation."""
+
+    by_path: dict[str, Entry]
+    by_type: dict[str, Entry]
+    callback: Callable[["Stats"], None] | None
+    path_depth: int
+
+    encode_time: float
+    """Total time spent encoding documents, in seconds"""
+    decode_time: float
+    """Total time spent decoding documents, in seconds"""
+    read_time: float
+    """Time spent reading and parsing JSON files, in seconds"""
+    write_time: float
+    """Time spent writing JSON files, in seconds"""
+    document_bytes_read: int
+    document_bytes_written: int
+
+    _lock: threading.Lock
+
+    def __init__(
+        self,
+        path_depth: int = 1,
+        callback: Callable[["Stats"], None] | None = None,
+    ) -> None:
+        """
+        Args:
+            path_depth (int, optional): Number of keys of the JSONpath prefixes
+                the counters are grouped by. For example, with the default
+                depth of 1, everything under `$.a.b` is counted under `$.a`.
+            callback (Callable[[Stats], None], optional): Called with this
+                collector after each encoding or decoding
+        """
+        self.path_depth, self.callback = path_depth, callback
+        self._lock = threading.Lock()
+        self.reset()
+
+    def _end(
+        self, frame: _Frame, type_name: str, json_path: str, encoding: bool
+    ) -> None:
+        """Records a finished encoder or decoder call"""
+        _LOCAL.frames.pop()
+        elapsed = time.perf_counter() - frame.start
+        if (parent := _frame()) is not None:
+            parent.child_time += elapsed
+        elapsed -= frame.child_time
+        prefix = ".".join(json_path.split(".")[: self.path_depth + 1])
+        with self._lock:
+            for e in (
+                self._entry(self.by_type, type_name),
+                self._entry(self.by_path, prefix),
+            ):
+                if encoding:
+                    e.encoded += 1
+                    e.encode_time += elapsed
+                else:
+                    e.decoded += 1
+                    e.decode_time += elapsed
+                e.compression_time += frame.compression_time
+                e.decompression_time += frame.decompression_time
+                e.add_artifacts(frame.read, written=False)
+                e.add_artifacts(frame.written, written=True)
+
+    @staticmethod
+    def _entry(entries: dict[str, Entry], key: str) -> Entry:
+        if (e := entries.get(key)) is None:
+            e = entries[key] = Entry()
+        return e
+
+    @staticmethod
+    def _start() -> _Frame:
+        """Starts recording an encoder or decoder call"""
+        frame = _Frame()
+        if not hasattr(_LOCAL, "frames"):
+            _LOCAL.frames = []
+        _LOCAL.frames.append(frame)
+        return frame
+
+    @property
+    def active(self) -> bool:
+        """Whether an encoding or decoding is in progress in this thread"""
+        return getattr(_LOCAL, "operations", 0) > 0
+
+    @property
+    def decode_traversal_time(self) -> float:
+        """Time spent decoding documents outside of decoders"""
+        return self.decode_time - sum(
+            e.decode_time for e in self.by_type.values()
+        )
+
+    @property
+    def encode_traversal_time(self) -> float:
+        """Time spent encoding documents outside of encoders"""
+        return self.encode_time - sum(
+            e.encode_time for e in self.by_type.values()
+        )
+
+    def decode(
+        self, decoder: Callable[[dict, Any], Any], dct: dict, ctx: Any
+    ) -> Any:
+        """Calls a decoder on a typed JSON dict and records it"""
+        frame = self._start()
+        try:
+            return decoder(dct, ctx)
+        finally:
+            self._end(frame, str(dct["__type__"]), ctx.json_path, False)
+
+    def encode(
+        self, encoder: Callable[[Any, Any], Any], obj: Any, ctx: Any
+    ) -> Any:
+        """Calls an encoder on an object and records it"""
+        frame, result = self._start(), obj
+        try:
+            result = encoder(obj, ctx)
+        finally:
+            if isinstance(result, dict) and "__type__" in result:
+                name = str(result["__type__"])
+            else:
+                name = type(obj).__name__
+            self._end(frame, name, ctx.json_path, True)
+        return result
+
+    def operation(
+        self, function: Callable[..., Any], *args: Any, encoding: bool
+    ) -> Any:
+        """
+        Runs an encoding (or decoding if `encoding` is `False`), i.e. a call to
+        `turbo_broccoli.turbo_broccoli._to_jsonable` (resp.
+        `turbo_broccoli.turbo_broccoli._from_jsonable`) or to a compiled
+        schema that is not part of another one, and records its duration.
+        """
+        _LOCAL.operations = getattr(_LOCAL, "operations", 0) + 1
+        start = time.perf_counter()
+        try:
+            return function(*args)
+        finally:
+            elapsed = time.perf_counter() - start
+            _LOCAL.operations -= 1
+            with self._lock:
+                if encoding:
+                    self.encode_time += elapsed
+                else:
+                    self.decode_time += elapsed
+            if self.callback is not None:
+                self.callback(self)
+
+    @contextmanager
+    def document_io(
+        self, path: Path, write: bool
+    ) -> Generator[None, None, None]:
+        """Records the reading (or writing) of a JSON file"""
+        start = time.perf_counter()
+        yield
+        elapsed = time.perf_counter() - start
+        size = path.stat().st_size if path.exists() else 0
+        with self._lock:
+            if write:
+                self.write_time += elapsed
+                self.document_bytes_written += size
+            else:
+                self.read_time += elapsed
+                self.document_bytes_read += size
+
+    def report(self, n: int = 10) -> str:
+        """
+        Returns a human-readable summary of the counters, with the `n` types
+        and JSONpath prefixes that took the most time
+        """
+
+        def _table(title: str, entries: dict[str, Entry]) -> list[str]:
+            rows = sorted(
+                entries.items(),
+                key=lambda kv: -(kv[1].encode_time + kv[1].decode_time),
+            )[:n]
+            lines = [
+                f"{title:<32} {'count':>8} {'encode':>9} {'decode':>9} "
+                f"{'compr.':>9} {'artifacts':>9} {'MiB':>9}"
+            ]
+            for k, e in rows:
+                lines.append(
+                    f"{k[:32]:<32} {e.encoded + e.decoded:>8} "
+                    f"{e.encode_time:>8.3f}s {e.decode_time:>8.3f}s "
+                    f"{e.compression_time + e.decompression_time:>8.3f}s "
+                    f"{e.artifacts_written + e.artifacts_read:>9} "
+                    f"{(e.bytes_written + e.bytes_read) / 2**20:>9.2f}"
+                )
+            return lines
+
+        lines = [
+            f"Encoding: {self.encode_time:.3f}s "
+            f"({self.encode_traversal_time:.3f}s traversal)",
+            f"Decoding: {self.decode_time:.3f}s "
+            f"({self.decode_traversal_time:.3f}s traversal)",
+            f"JSON files: {self.write_time:.3f}s writing "
+            f"({self.document_bytes_written} bytes), {self.read_time:.3f}s "
+            f"reading ({self.document_bytes_read} bytes)",
+            "",
+            *_table("type", self.by_type),
+            "",
+            *_table("path", self.by_path),
+        ]
+        return "\n".join(lines)
+
+    def reset(self) -> None:
+        """Resets all counters"""
+        with self._lock:
+            self.by_path, self.by_type = {}, {}
+            self.encode_time, self.decode_time = 0.0, 0.0
+            self.read_time, self.write_time = 0.0, 0.0
+            self.document_bytes_read, self.document_bytes_written = 0, 0
+
+    def to_dict(self) -> dict:
+        """Returns the counters as a vanilla JSON-serializable dict"""
+        with self._lock:
+            return {
+                "encode_time": self.encode_time,
+                "encode_traversal_time": self.encode_traversal_time,
+                "decode_time": self.decode_time,
+                "decode_traversal_time": self.decode_traversal_time,
+                "read_time": self.read_time,
+                "write_time": self.write_time,
+                "document_bytes_read": self.document_bytes_read,
+                "document_bytes_written": self.document_bytes_written,
+                "by_type": {k: e.to_dict() for k, e in self.by_type.items()},
+                "by_path": {k: e.to_dict() for k, e in self.by_path.items()},
+            }
+
+
+class StatsStorage(StorageWrapper):
+    """
+    Wraps another backend and attributes the artifacts that are read or
+    written to the encoder or decoder call in progress, see
+    `turbo_broccoli.stats.Stats`. Used by contexts with a `stats` collector.
+    """
+
+    stats: Stats
+
+    def __init__(self, backend: StorageBackend, stats: Stats) -> None:
+        super().__init__(backend)
+        self.stats = stats
+
+    def copy(self, src: Path, dst: Path) -> None:
+        if (frame := _frame()) is not None:
+            frame.written.append(0)
+        self.backend.copy(src, dst)
+
+    @contextmanager
+    def local_path(
+        self, path: Path, mode: Literal["rb", "wb"] = "rb"
+    ) -> Generator[Path, None, None]:
+        with self.backend.local_path(path, mode) as local:
+            yield local
+            if (frame := _frame()) is not None and local.exists():
+                size = local.stat().st_size
+                (frame.read if mode == "rb" else frame.written).append(size)
+
+    def open(self, path: Path, mode: Literal["rb", "wb"] = "rb") -> BinaryIO:
+        fp = self.backend.open(path, mode)
+        if (frame := _frame()) is None:
+            return fp
+        sizes = frame.read if mode == "rb" else frame.written
+        return _CountingFile(fp, sizes)  # type: ignore
+
+    def read(self, path: Path) -> bytes:
+        data = self.backend.read(path)
+        if (frame := _frame()) is not None:
+            frame.read.append(len(data))
+        return data
+
+    def read_many(self, paths: Iterable[Path]) -> list[bytes]:
+        data = self.backend.read_many(paths)
+        if (frame := _frame()) is not None:
+            frame.read.extend(len(d) for d in data)
+        return data
+
+    def write(self, path: Path, data: bytes) -> None:
+        if (frame := _frame()) is not None:
+            frame.written.append(len(data))
+        self.backend.write(path, data)
+
+    def write_many(self, items: dict[Path, bytes]) -> None:
+        if (frame := _frame()) is not None:
+            frame.written.extend(len(d) for d in items.values())
+        self.backend.write_many(items)
@@ -0,0 +1,576 @@
+"""
+Artifact storage backends. Every artifact read and write goes through the
+storage backend of the current context (see
+`turbo_broccoli.context.Context`), which makes it possible to store artifacts
+somewhere else than on the local filesystem without changing any encoder or
+decoder. Artifacts are identified by their path, as returned by
+`turbo_broccoli.context.Context.id_to_artifact_path`, although the meaning of
+that path is up to the backend.
+
+The following backends are available:
+
+* `turbo_broccoli.storage.LocalStorage` (the default): artifacts are regular
+  files on the local filesystem;
+
+* `turbo_broccoli.storage.MemoryStorage`: artifacts are kept in memory;
+
+* `turbo_broccoli.storage.FsspecStorage`: artifacts are stored in any
+  [fsspec](https://filesystem-spec.readthedocs.io/en/latest/) filesystem, e.g.
+  S3 or GCS. Requires `fsspec` and the relevant implementation package (e.g.
+  `s3fs`).
+
+Example:
+
+    ```py
+    import turbo_broccoli as tb
+    from turbo_broccoli.storage import FsspecStorage
+
+    storage = FsspecStorage("s3", anon=False)
+    tb.save_json(
+        obj,
+        "foo/bar.json",
+        artifact_path="my-bucket/artifacts",
+        storage=storage,
+    )
+    ```
+
+    The main JSON document is still written on the local filesystem, but the
+    artifacts are stored in `s3://my-bucket/artifacts`. Note that the artifact
+    path does not contain the protocol.
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from importlib.util import find_spec
+from io import BytesIO
+from pathlib import Path
+from typing import Any, BinaryIO, Generator, Iterable, Literal
+
+HAS_FSSPEC = find_spec("fsspec") is not None
+"""Whether fsspec is installed. It is only imported by `FsspecStorage`."""
+
+
+class StorageBackend:
+    """
+    Base class for all storage backends. Subclasses must at least implement
+    `exists`, `open`, and `delete`. The other methods have default
+    implementations that rely on these.
+    """
+
+    max_workers: int = 8
+    """Number of threads used by `read_many` and `write_many`"""
+
+    def copy(self, src: Path, dst: Path) -> None:
+        """
+        Copies an artifact, replacing `dst` if it already exists. The default
+        implementation reads `src` and writes `dst`, but backends may do
+        better.
+        """
+        self.write(dst, self.read(src))
+
+    def delete(self, path: Path) -> None:
+        """Deletes an artifact. Does nothing if it doesn't exist."""
+        raise NotImplementedError
+
+    def exists(self, path: Path) -> bool:
+        """Returns `True` if the artifact exists"""
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        """
+        Makes sure that all pending writes are completed. This is called at the
+        end of `turbo_broccoli.to_json` and before the main document is written
+        in `turbo_broccoli.save_json`.
+        """
+
+    @contextmanager
+    def local_path(
+        self, path: Path, mode: Literal["rb", "wb"] = "rb"
+    ) -> Generator[Path, None, None]:
+        """
+        Context manager that yields a local filesystem path for an artifact,
+        for the benefit of libraries that can only read from or write to
+        actual files. The default implementation uses a temporary file that is
+        downloaded before (`mode="rb"`) or uploaded after (`mode="wb"`) the
+        `with` block.
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            local = Path(tmp) / path.name
+            if mode == "rb":
+                with self.open(path, "rb") as src, local.open("wb") as dst:
+                    shutil.copyfileobj(src, dst)
+            yield local
+            if mode == "wb":
+                with local.open("rb") as src, self.open(path, "wb") as dst:
+                    shutil.copyfileobj(src, dst)
+
+    def makedirs(self, path: Path) -> None:
+        """
+        Makes sure that artifacts can be written under `path`. Backends call
+        this lazily before writing an artifact, so that no directory is
+        created if no artifact is written. Does nothing by default.
+        """
+
+    def open(self, path: Path, mode: Literal["rb", "wb"] = "rb") -> BinaryIO:
+        """Opens an artifact in binary mode"""
+        raise NotImplementedError
+
+    def read(self, path: Path) -> bytes:
+        """Reads an artifact"""
+        with self.open(path, "rb") as fp:
+            return fp.read()
+
+    def read_many(self, paths: Iterable[Path]) -> list[bytes]:
+        """Reads several artifacts concurrently"""
+        with ThreadPoolExecutor(self.max_workers) as executor:
+            return list(executor.map(self.read, paths))
+
+    def write(self, path: Path, data: bytes) -> None:
+        """Writes an artifact, replacing it if it already exists"""
+        with self.open(path, "wb") as fp:
+            fp.write(data)
+
+    def write_many(self, items: dict[Path, bytes]) -> None:
+        """Writes several artifacts concurrently"""
+        with ThreadPoolExecutor(self.max_workers) as executor:
+            list(executor.map(self.write, items.keys(), items.values()))
+
+
+class LocalStorage(StorageBackend):
+    """
+    Artifacts are regular files on the local filesystem. Since `copy` uses
+    hard links whenever possible, artifacts are always replaced rather than
+    overwritten in place.
+    """
+
+    def copy(self, src: Path, dst: Path) -> None:
+        """
+        Hard links `src` to `dst` if possible (i.e. if both are on the same
+        filesystem), otherwise copies it with `os.copy_file_range`, which
+        some filesystems (e.g. Btrfs or XFS) turn into a reflink. Falls back
+        to a regular copy.
+        """
+        self.makedirs(dst.parent)
+        dst.unlink(missing_ok=True)
+        try:
+            os.link(src, dst)
+            return
+        except OSError:
+            pass
+        try:
+            with src.open("rb") as fsrc, dst.open("wb") as fdst:
+                while os.copy_file_range(
+                    fsrc.fileno(), fdst.fileno(), 1 << 30
+                ):
+                    pass
+        except (AttributeError, OSError):
+            shutil.copyfile(src, dst)
+
+    def delete(self, path: Path) -> None:
+        path.unlink(missing_ok=True)
+
+    def exists(self, path: Path) -> bool:
+        return path.exists()
+
+    @contextmanager
+    def local_path(
+        self, path: Path, mode: Literal["rb", "wb"] = "rb"
+    ) -> Generator[Path, None, None]:
+        if mode == "wb":
+            self.makedirs(path.parent)
+            path.unlink(missing_ok=True)
+        yield path
+
+    def makedirs(self, path: Path) -> None:
+        path.mkdir(parents=True, exist_ok=True)
+
+    def open(self, path: Path, mode: Literal["rb", "wb"] = "rb") -> BinaryIO:
+        if mode == "wb":
+            self.makedirs(path.parent)
+            path.unlink(missing_ok=True)  # The file might be a hard link
+        return path.open(mode)  # type: ignore
+
+
+class _MemoryFile(BytesIO):
+    """A `BytesIO` that commits its content to a `MemoryStorage` on close"""
+
+    _path: str
+    _storage: "MemoryStorage"
+
+    def __init__(self, storage: "MemoryStorage", path: str) -> None:
+        super().__init__()
+        self._storage, self._path = storage, path
+
+    def close(self) -> None:
+        if not self.closed:
+            self._storage.write(Path(self._path), self.getvalue())
+        super().close()
+
+
+class MemoryStorage(StorageBackend):
+    """
+    Artifacts are kept in memory, in a dict indexed by path. Using this
+    backend, `turbo_broccoli.to_json` and `turbo_broccoli.from_json` never
+    touch the filesystem:
+
+    ```py
+    with MemoryStorage() as storage:
+        ctx = tb.Context(storage=storage)
+        doc = tb.to_json(obj, ctx)
+        ...
+        obj = tb.from_json(doc, ctx)
+    # The artifacts are discarded here
+    ```
+
+    Artifacts stay in memory until the storage is closed (or garbage
+    collected). They can be exported to and imported from an actual directory
+    using `MemoryStorage.export_to` and `MemoryStorage.import_from`.
+    """
+
+    closed: bool = False
+    data: dict[str, bytes]
+
+    def __enter__(self) -> "MemoryStorage":
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.close()
+
+    def __init__(self) -> None:
+        self.data = {}
+
+    def _raise_if_closed(self) -> None:
+        if self.closed:
+            raise ValueError("I/O operation on a closed MemoryStorage")
+
+    def close(self) -> None:
+        """Discards all artifacts. The storage cannot be used afterwards."""
+        self.data, self.closed = {}, True
+
+    def copy(self, src: Path, dst: Path) -> None:
+        self._raise_if_closed()
+        self.data[str(dst)] = self.read(src)
+
+    def delete(self, path: Path) -> None:
+        self._raise_if_closed()
+        self.data.pop(str(path), None)
+
+    def exists(self, path: Path) -> bool:
+        self._raise_if_closed()
+        return str(path) in self.data
+
+    def export_to(self, directory: str | Path) -> None:
+        """
+        Writes all artifacts as files in `directory`, which is created if
+        needed. Artifact files are named after their last path component,
+        which means that a document created with this storage can then be
+        loaded using a context whose `artifact_path` is `directory`:
+
+        ```py
+        with MemoryStorage() as storage:
+            doc = tb.to_json(obj, tb.Context(storage=storage))
+            storage.export_to("foo/artifacts")
+        obj = tb.from_json(doc, tb.Context(artifact_path="foo/artifacts"))
+        ```
+        """
+        self._raise_if_closed()
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for k, v in self.data.items():
+            (directory / Path(k).name).write_bytes(v)
+
+    def import_from(
+        self,
+        directory: str | Path,
+        artifact_path: str | Path | None = None,
+        pattern: str = "*",
+    ) -> None:
+        """
+        Loads all files of `directory` (not recursively) that match `pattern`
+        as artifacts, so that they can be read by a context whose artifact
+        path is `artifact_path` (which defaults to `directory`). This is the
+        inverse of `MemoryStorage.export_to`.
+        """
+        self._raise_if_closed()
+        directory = Path(directory)
+        artifact_path = Path(artifact_path or directory)
+        for p in directory.glob(pattern):
+            if p.is_file():
+                self.data[str(artifact_path / p.name)] = p.read_bytes()
+
+    def open(self, path: Path, mode: Literal["rb", "wb"] = "rb") -> BinaryIO:
+        if mode == "wb":
+            self._raise_if_closed()
+            return _MemoryFile(self, str(path))
+        return BytesIO(self.read(path))
+
+    def read(self, path: Path) -> bytes:
+        self._raise_if_closed()
+        try:
+            return self.data[str(path)]
+        except KeyError as exc:
+            raise FileNotFoundError(str(path)) from exc
+
+    def read_many(self, paths: Iterable[Path]) -> list[bytes]:
+        return [self.read(p) for p in paths]
+
+    def write(self, path: Path, data: bytes) -> None:
+        self._raise_if_closed()
+        self.data[str(path)] = bytes(data)
+
+    def write_many(self, items: dict[Path, bytes]) -> None:
+        for p, d in items.items():
+            self.write(p, d)
+
+
+class FsspecStorage(StorageBackend):
+    """
+    Artifacts are stored in an [fsspec](https://filesystem-spec.readthedocs.io)
+    filesystem. fsspec caches filesystem instances, so all contexts (and
+    threads) using the same protocol and options share the same
+    underlying client and connection pool.
+
+    Small writes are buffered and uploaded concurrently when the buffer
+    exceeds `max_pending_bytes`, or when `flush` is called (which
+    `turbo_broccoli.save_json` and `turbo_broccoli.to_json` do). Large
+    artifacts are streamed, which for object stores results in (concurrent)
+    multipart uploads.
+    """
+
+    block_size: int | None
+    fs: Any
+    max_pending_bytes: int
+    _dirs: set[str]
+    _lock: threading.Lock
+    _pending: dict[str, bytes]
+
+    def __init__(
+        self,
+        fs: Any = "file",
+        max_workers: int = 8,
+        max_pending_bytes: int = 64 * 1024 * 1024,
+        block_size: int | None = None,
+        **storage_options: Any,
+    ) -> None:
+        """
+        Args:
+            fs (str | fsspec.AbstractFileSystem, optional): Either an fsspec
+                protocol (e.g. `"s3"`), or a filesystem object
+            max_workers (int, optional): Maximum number of concurrent
+                transfers
+            max_pending_bytes (int, optional): Size of the write buffer. Set
+                to `0` to disable buffering.
+            block_size (int, optional): Block size for streamed transfers,
+                which is also the part size of multipart uploads for object
+                stores. Defaults to the filesystem's default.
+            **storage_options: Forwarded to `fsspec.filesystem` if `fs` is a
+                protocol
+        """
+        if not HAS_FSSPEC:
+            raise RuntimeError(
+                "FsspecStorage requires fsspec. You can install it by running "
+                "python3 -m pip install fsspec"
+            )
+        import fsspec
+
+        self.fs = (
+            fsspec.filesystem(fs, **storage_options)
+            if isinstance(fs, str)
+            else fs
+        )
+        self.max_workers, self.block_size = max_workers, block_size
+        self.max_pending_bytes = max_pending_bytes
+        self._dirs, self._pending = set(), {}
+        self._lock = threading.Lock()
+
+    def copy(self, src: Path, dst: Path) -> None:
+        if str(src) in self._pending:
+            self.write(dst, self._pending[str(src)])
+            return
+        self.makedirs(dst.parent)
+        self.fs.copy(str(src), str(dst))  # Server-side for object stores
+
+    def delete(self, path: Path) -> None:
+        self._pending.pop(str(path), None)
+        if self.fs.exists(str(path)):
+            self.fs.rm_file(str(path))
+
+    def exists(self, path: Path) -> bool:
+        return str(path) in self._pending or self.fs.exists(str(path))
+
+    def flush(self) -> None:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        for p in pending:
+            self.makedirs(Path(p).parent)
+        with ThreadPoolExecutor(self.max_workers) as executor:
+            list(executor.map(self.fs.pipe_file, *zip(*pending.items())))
+
+    def makedirs(self, path: Path) -> None:
+        if str(path) not in self._dirs:
+            self.fs.makedirs(str(path), exist_ok=True)
+            self._dirs.add(str(path))
+
+    def open(self, path: Path, mode: Literal["rb", "wb"] = "rb") -> BinaryIO:
+        if mode == "rb" and str(path) in self._pending:
+            return BytesIO(self._pending[str(path)])
+        if mode == "wb":
+            self.makedirs(path.parent)
+        kwargs = (
+            {} if self.block_size is None else {"block_size": self.block_size}
+        )
+        return self.fs.open(str(path), mode, **kwargs)
+
+    def read(self, path: Path) -> bytes:
+        if str(path) in self._pending:
+            return self._pending[str(path)]
+        return self.fs.cat_file(str(path))
+
+    def write(self, path: Path, data: bytes) -> None:
+        if len(data) >= self.max_pending_bytes:
+            with self.open(path, "wb") as fp:
+                fp.write(data)
+            return
+        with self._lock:
+            self._pending[str(path)] = bytes(data)
+            full = (
+                sum(map(len, self._pending.values())) >= self.max_pending_bytes
+            )
+        if full:
+            self.flush()
+
+    def write_many(self, items: dict[Path, bytes]) -> None:
+        for p, d in items.items():
+            self.write(p, d)
+        self.flush()
+
+
+class StorageWrapper(StorageBackend):
+    """
+    Base class for backends that wrap another backend to alter some of its
+    behavior. All methods are forwarded to the wrapped backend by default.
+    """
+
+    backend: StorageBackend
+
+    def __init__(self, backend: StorageBackend) -> None:
+        self.backend, self.max_workers = backend, backend.max_workers
+
+    def copy(self, src: Path, dst: Path) -> None:
+        self.backend.copy(src, dst)
+
+    def delete(self, path: Path) -> None:
+        self.backend.delete(path)
+
+    def exists(self, path: Path) -> bool:
+        return self.backend.exists(path)
+
+    def flush(self) -> None:
+        self.backend.flush()
+
+    @contextmanager
+    def local_path(
+        self, path: Path, mode: Literal["rb", "wb"] = "rb"
+    ) -> Generator[Path, None, None]:
+        with self.backend.local_path(path, mode) as local:
+            yield local
+
+    def makedirs(self, path: Path) -> None:
+        self.backend.makedirs(path)
+
+    def open(self, path: Path, mode: Literal["rb", "wb"] = "rb") -> BinaryIO:
+        return self.backend.open(path, mode)
+
+    def read(self, path: Path) -> bytes:
+        return self.backend.read(path)
+
+    def read_many(self, paths: Iterable[Path]) -> list[bytes]:
+        return self.backend.read_many(paths)
+
+    def unwrap(self) -> StorageBackend:
+        """Returns the innermost wrapped backend"""
+        backend = self.backend
+        while isinstance(backend, StorageWrapper):
+            backend = backend.backend
+        return backend
+
+    def write(self, path: Path, data: bytes) -> None:
+        self.backend.write(path, data)
+
+    def write_many(self, items: dict[Path, bytes]) -> None:
+        self.backend.write_many(items)
+
+
+class RecordingStorage(StorageWrapper):
+    """
+    Wraps another backend and records the paths of all artifacts that are
+    read or written. Used by contexts with `reuse_artifacts=True` or
+    `incremental=True`, see `turbo_broccoli.provenance`. The recorded paths
+    are cleared at the end of every outermost `RecordingStorage.session`.
+    """
+
+    reads: list[Path]
+    writes: list[Path]
+    _depth: int
+    _lock: threading.Lock
+
+    def __init__(self, backend: StorageBackend) -> None:
+        super().__init__(backend)
+        self.reads, self.writes = [], []
+        self._depth, self._lock = 0, threading.Lock()
+
+    @contextmanager
+    def session(self) -> Generator[None, None, None]:
+        """
+        Context manager around a top-level encoding or decoding, which may be
+        nested. When the outermost session ends, the recorded paths are
+        cleared, so that they don't pile up in long-lived contexts.
+        """
+        with self._lock:
+            self._depth += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._depth -= 1
+                if self._depth == 0:
+                    self.reads, self.writes = [], []
+
+    def copy(self, src: Path, dst: Path) -> None:
+        self.writes.append(dst)
+        self.backend.copy(src, dst)
+
+    @contextmanager
+    def local_path(
+        self, path: Path, mode: Literal["rb", "wb"] = "rb"
+    ) -> Generator[Path, None, None]:
+        (self.reads if mode == "rb" else self.writes).append(path)
+        with self.backend.local_path(path, mode) as local:
+            yield local
+
+    def open(self, path: Path, mode: Literal["rb", "wb"] = "rb") -> BinaryIO:
+        (self.reads if mode == "rb" else self.writes).append(path)
+        return self.backend.open(path, mode)
+
+    def read(self, path: Path) -> bytes:
+        self.reads.append(path)
+        return self.backend.read(path)
+
+    def read_many(self, paths: Iterable[Path]) -> list[bytes]:
+        paths = list(paths)
+        self.reads.extend(paths)
+        return self.backend.read_many(paths)
+
+    def write(self, path: Path, data: bytes) -> None:
+        self.writes.append(path)
+        self.backend.write(path, data)
+
+    def write_many(self, items: dict[Path, bytes]) -> None:
+        self.writes.extend(items)
+        self.backend.write_many(items)
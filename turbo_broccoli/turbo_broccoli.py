@@ -1,14 +1,52 @@
 """Main module containing the JSON encoder and decoder methods."""
 
+import copy
 import json
+import os
+import sys
 import zlib
+from array import array
+from contextlib import nullcontext
+from functools import partial
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, ContextManager
+from uuid import uuid4
 
-from . import user
+from . import document_cache, provenance, user
 from .context import Context
 from .custom import get_decoders, get_encoders
+from .custom.embedded import embed
 from .exceptions import TypeIsNodecode, TypeNotSupported
+from .schema import compile_schema
+
+LEAN_MAX_STR_LEN = 64
+"""
+Maximum length of the strings that are interned when decoding with a lean
+context, see `turbo_broccoli.context.Context`
+"""
+
+
+def _decode_typed(obj: dict, ctx: Context) -> Any:
+    """
+    Decodes a typed JSON dict whose children have already been decoded. Returns
+    it as is if its type (or a type it contains) is nodecode, or if it is an
+    unknown user type.
+    """
+    try:
+        ctx.raise_if_nodecode(obj["__type__"])
+        base = obj["__type__"].split(".")[0]
+        if base == "user":
+            name = ".".join(obj["__type__"].split(".")[1:])
+            decoder = user.decoders.get(name)
+        else:
+            decoder = get_decoders()[base]
+        if decoder is not None and ctx.stats is not None:
+            return ctx.stats.decode(decoder, obj, ctx)
+        if decoder is not None:
+            return decoder(obj, ctx)
+    except TypeIsNodecode:
+        pass
+    return obj
 
 
 def _from_jsonable(obj: Any, ctx: Context) -> Any:
@@ -16,29 +54,135 @@ def _from_jsonable(obj: Any, ctx: Context) -> Any:
     Takes an object fresh from `json.load` or `json.loads` and loads types that
     are supported by TurboBroccoli therein.
     """
+    if ctx.stats is not None and not ctx.stats.active:
+        return ctx.stats.operation(_from_jsonable, obj, ctx, encoding=False)
+    if (
+        ctx.stats is None
+        and not ctx.lean
+        and not ctx.lean_lists
+        and not provenance.active(ctx)
+    ):
+        return _from_jsonable_plain(obj, ctx)
+    with provenance.session(ctx):
+        return _from_jsonable_hooked(obj, ctx)
+
+
+def _from_jsonable_hooked(obj: Any, ctx: Context) -> Any:
+    """
+    `turbo_broccoli.turbo_broccoli._from_jsonable` when the context records
+    statistics or provenance, or decodes leanly
+    """
     if isinstance(obj, dict):
-        obj = {k: _from_jsonable(v, ctx / k) for k, v in obj.items()}
+        document, marker, inner = obj, None, ctx
         if "__type__" in obj:
-            try:
-                ctx.raise_if_nodecode(obj["__type__"])
-                base = obj["__type__"].split(".")[0]
-                if base == "user":
-                    name = ".".join(obj["__type__"].split(".")[1:])
-                    if decoder := user.decoders.get(name):
-                        obj = decoder(obj, ctx)
-                else:
-                    obj = get_decoders()[base](obj, ctx)
-            except TypeIsNodecode:
-                pass
+            marker = provenance.begin(ctx)
+            if ctx.lean_lists:
+                # Lists in the payload of a typed object are not converted,
+                # since the decoder may turn them into e.g. tuples or sets
+                inner = copy.copy(ctx)
+                inner.lean_lists = None
+        if ctx.lean:
+            obj = {
+                sys.intern(k): _from_jsonable_hooked(v, inner / k)
+                for k, v in obj.items()
+            }
+        else:
+            obj = {
+                k: _from_jsonable_hooked(v, inner / k) for k, v in obj.items()
+            }
+        if "__type__" in obj:
+            obj = _decode_typed(obj, ctx)
+            if marker is not None:
+                provenance.register(obj, document, ctx, marker)
     elif isinstance(obj, list):
-        return [_from_jsonable(v, ctx / str(i)) for i, v in enumerate(obj)]
+        obj = [
+            _from_jsonable_hooked(v, ctx / str(i)) for i, v in enumerate(obj)
+        ]
+        return _lean_list(obj, ctx) if ctx.lean_lists else obj
     elif isinstance(obj, tuple):
         return tuple(
-            _from_jsonable(v, ctx / str(i)) for i, v in enumerate(obj)
+            _from_jsonable_hooked(v, ctx / str(i)) for i, v in enumerate(obj)
         )
+    elif ctx.lean and isinstance(obj, str) and len(obj) <= LEAN_MAX_STR_LEN:
+        return sys.intern(obj)
     return obj
 
 
+def _from_jsonable_plain(obj: Any, ctx: Context) -> Any:
+    """
+    `turbo_broccoli.turbo_broccoli._from_jsonable` when no per-node hook is
+    active. Primitives are returned as is, without creating their context.
+    """
+    if isinstance(obj, dict):
+        obj = {
+            k: (
+                _from_jsonable_plain(v, ctx / k)
+                if isinstance(v, (dict, list, tuple))
+                else v
+            )
+            for k, v in obj.items()
+        }
+        return _decode_typed(obj, ctx) if "__type__" in obj else obj
+    if isinstance(obj, (list, tuple)):
+        result = [
+            (
+                _from_jsonable_plain(v, ctx / str(i))
+                if isinstance(v, (dict, list, tuple))
+                else v
+            )
+            for i, v in enumerate(obj)
+        ]
+        return result if isinstance(obj, list) else tuple(result)
+    return obj
+
+
+def _lean_list(obj: list, ctx: Context) -> Any:
+    """
+    Converts a decoded list that only contains integers (resp. only floats) to
+    an `array.array` or a numpy array, depending on `ctx.lean_lists`. Other
+    lists are returned as is.
+    """
+    t = type(obj[0]) if obj else None
+    if t not in (int, float) or any(type(v) is not t for v in obj):
+        return obj
+    try:
+        if ctx.lean_lists == "numpy":
+            import numpy as np
+
+            return np.array(obj, dtype=np.int64 if t is int else np.float64)
+        return array("q" if t is int else "d", obj)
+    except OverflowError:  # Integers that don't fit in 64 bits
+        return obj
+
+
+def _load(
+    ctx: Context,
+    schema: Any = None,
+    decode: Callable[[Any, Context], Any] | None = None,
+) -> Any:
+    """
+    Loads the JSON file at `ctx.file_path` like `turbo_broccoli.load_json`
+    does, i.e. through the document cache and the daemon if the context
+    enables them. `decode` takes the raw document and the context, and
+    defaults to the decoder of `schema`.
+    """
+    decode = decode or _decoder(schema, ctx)
+
+    def _load_uncached() -> Any:
+        if ctx.daemon_socket is not None and schema is None:
+            from . import daemon
+
+            try:
+                return daemon.fetch(ctx)
+            except (OSError, daemon.DaemonError):
+                pass  # The document is decoded here instead
+        return decode(_read_document(ctx), ctx)
+
+    if ctx.document_cache is not None:
+        return document_cache.load(ctx, _load_uncached, schema)
+    return _load_uncached()
+
+
 def _make_or_set_ctx(
     file_path: str | Path | None, ctx: Context | None, **kwargs
 ) -> Context:
@@ -62,40 +206,348 @@ def _make_or_set_ctx(
     return ctx
 
 
-def _to_jsonable(obj: Any, ctx: Context) -> Any:
+def _decoder(schema: Any, ctx: Context) -> Callable[[Any, Context], Any]:
     """
-    Transforms an object (dict, list, primitive) that possibly contains types
-    that TurboBroccoli's custom encoders support, and returns an object that is
-    readily vanilla JSON-serializable.
+    Returns the function that decodes a document fresh from `json.load` or
+    `json.loads`, either generically or according to a schema
+    """
+    if schema is None:
+        return _from_jsonable
+    decode = compile_schema(schema)
+    if ctx.stats is not None:  # Otherwise every part is recorded separately
+        return partial(ctx.stats.operation, decode, encoding=False)
+    return decode
+
+
+def _document_io(ctx: Context, write: bool) -> ContextManager:
+    """
+    Context manager around the reading (or writing) of `ctx.file_path`, which
+    records it if the context has a `turbo_broccoli.stats.Stats` collector
+    """
+    if ctx.stats is None:
+        return nullcontext()
+    assert isinstance(ctx.file_path, Path)  # for typechecking
+    return ctx.stats.document_io(ctx.file_path, write)
+
+
+def _embed_large_children(
+    source: dict | list, obj: Any, sizes: Any, ctx: Context
+) -> None:
+    """
+    Called after a plain dict or list `source` has been encoded to `obj`, the
+    lengths of the JSON representations of whose children are in `sizes` (a
+    dict or a list like `obj`). Replaces the encoded plain dicts and lists in
+    `obj` whose JSON representation is larger than `ctx.min_embedding_size`
+    by embedded artifacts (see `turbo_broccoli.custom.embedded.embed`), and
+    updates `sizes` accordingly.
+    """
+    if not isinstance(obj, (dict, list)) or (
+        isinstance(obj, dict) and "__type__" in obj
+    ):  # source was encoded to something else, e.g. a dict with int keys
+        return
+    assert ctx.min_embedding_size is not None  # for typechecking
+    items = source.items() if isinstance(source, dict) else enumerate(source)
+    for k, v in items:
+        x = obj[k]
+        if type(v) not in (dict, list) or not isinstance(x, (dict, list)):
+            continue
+        if isinstance(x, dict) and "__type__" in x:
+            continue
+        if sizes[k] >= ctx.min_embedding_size:
+            obj[k] = embed(x, ctx)
+            sizes[k] = len(json.dumps(obj[k]))
+
+
+def _journal_path(path: Path) -> Path:
+    """
+    Path of the journal of a JSON file, i.e. the file where
+    `turbo_broccoli.turbo_broccoli.append_json` appends records.
+    """
+    return path.with_name(path.name + ".log")
+
+
+def _read_document(ctx: Context) -> Any:
+    """
+    Reads the JSON file at `ctx.file_path` and returns its raw content, i.e.
+    without loading the types it contains. If the file has a journal (see
+    `turbo_broccoli.turbo_broccoli.append_json`), its records are replayed
+    onto the content.
+    """
+    assert isinstance(ctx.file_path, Path)  # for typechecking
+    journal, document = _journal_path(ctx.file_path), None
+    with _document_io(ctx, write=False):
+        if ctx.file_path.exists() or not journal.exists():
+            if ctx.compress:
+                with ctx.file_path.open(mode="rb") as fp:
+                    document = json.loads(zlib.decompress(fp.read()).decode())
+            else:
+                with ctx.file_path.open(mode="r", encoding="utf-8") as fp:
+                    document = json.load(fp)
+        if journal.exists():
+            document = _replay_journal(document, journal)
+    return document
+
+
+def _replay_journal(document: Any, path: Path) -> Any:
+    """
+    Applies the records of a journal to a raw JSON document. Records with a
+    key set this key in the document (which must be a dict), the others are
+    appended to it (it must then be a list). If the document is `None`, it is
+    created from the type of the first record. A last incomplete record (e.g.
+    because of a crash while appending) is ignored.
+    """
+    with path.open(mode="r", encoding="utf-8") as fp:
+        lines = fp.read().split("\n")
+    for line in lines[:-1]:
+        record = json.loads(line)
+        if document is None:
+            document = {} if "key" in record else []
+        if "key" in record and isinstance(document, dict):
+            document[record["key"]] = record["value"]
+        elif "key" not in record and isinstance(document, list):
+            document.append(record["value"])
+        else:
+            raise ValueError(
+                f"Journal '{path}' does not match the type of its document"
+            )
+    return document
+
+
+def _write_document(data: str, ctx: Context, atomic: bool = False) -> None:
+    """
+    Writes a JSON string to `ctx.file_path`, creating its parent directory if
+    needed. If `atomic` is `True`, the string is first written to a temporary
+    file which then replaces the target file, so that the target file is
+    never left partially written.
+    """
+    assert isinstance(ctx.file_path, Path)  # for typechecking
+    if not ctx.file_path.parent.exists():
+        ctx.file_path.parent.mkdir(parents=True, exist_ok=True)
+    path = (
+        ctx.file_path.with_name(f".{ctx.file_path.name}.{uuid4().hex}.tmp")
+        if atomic
+        else ctx.file_path
+    )
+    with _document_io(ctx, write=True):
+        if ctx.compress:
+            with path.open(mode="wb") as fp:
+                fp.write(zlib.compress(data.encode("utf-8")))
+        else:
+            with path.open(mode="w", encoding="utf-8") as fp:
+                fp.write(data)
+        if atomic:
+            os.replace(path, ctx.file_path)
+    _journal_path(ctx.file_path).unlink(missing_ok=True)
+    document_cache.invalidate(ctx.file_path)
+
+
+def _json_size(obj: Any, sizes: Any) -> int:
+    """
+    Length of the JSON representation of `obj` (as written by `json.dumps`).
+    If `obj` is a dict, a list or a tuple, the lengths of the representations
+    of its children are given in `sizes`, which is a dict or a list like
+    `obj`.
+    """
+    if isinstance(obj, dict):
+        keys = sum(
+            len(json.dumps(k))
+            if isinstance(k, str)
+            else len(json.dumps({k: 0})) - 5
+            for k in obj
+        )
+        return 2 + keys + sum(sizes.values()) + 4 * len(obj) - 2 * bool(obj)
+    if isinstance(obj, (list, tuple)):
+        return 2 + sum(sizes) + 2 * max(len(obj) - 1, 0)
+    return len(json.dumps(obj))
+
+
+def _encode(obj: Any, ctx: Context) -> Any:
+    """
+    Applies the user encoder of `obj` (if any), and then the first custom
+    encoder that supports the result (if any). Doesn't recurse.
     """
     name = obj.__class__.__name__
     if name in user.encoders:
         obj = user.encoders[name](obj, ctx)
-    for encoder in get_encoders():
+    for encoder in get_encoders(type(obj)):
         try:
-            obj = encoder(obj, ctx)
-            break
+            return encoder(obj, ctx)
         except TypeNotSupported:
             pass
+    return obj
+
+
+def _to_jsonable(obj: Any, ctx: Context) -> Any:
+    """
+    Transforms an object (dict, list, primitive) that possibly contains types
+    that TurboBroccoli's custom encoders support, and returns an object that is
+    readily vanilla JSON-serializable.
+    """
+    if ctx.stats is not None and not ctx.stats.active:
+        return ctx.stats.operation(_to_jsonable, obj, ctx, encoding=True)
+    if (
+        ctx.stats is None
+        and ctx.min_embedding_size is None
+        and not provenance.active(ctx, encoding=True)
+    ):
+        return _to_jsonable_plain(obj, ctx)
+    with provenance.session(ctx):
+        return _to_jsonable_hooked(obj, ctx)[0]
+
+
+def _to_jsonable_hooked(obj: Any, ctx: Context) -> tuple[Any, int]:
+    """
+    `turbo_broccoli.turbo_broccoli._to_jsonable` when the context records
+    statistics or provenance, or embeds large children. Also returns the
+    length of the JSON representation of the result if the context has a
+    `min_embedding_size` (computed from that of its children), or 0.
+    """
+    sized = ctx.min_embedding_size is not None
+    if (provenance.REGISTRY or ctx.incremental) and (
+        doc := provenance.reuse(obj, ctx)
+    ):
+        return doc, len(json.dumps(doc)) if sized else 0
+    source, marker = obj, provenance.begin(ctx, encoding=True)
+    if ctx.stats is not None:
+        obj = ctx.stats.encode(_encode, obj, ctx)
+    else:
+        obj = _encode(obj, ctx)
+    sizes: Any = None
+    if isinstance(obj, dict):
+        encoded = {k: _to_jsonable_hooked(v, ctx / k) for k, v in obj.items()}
+        obj = {k: x for k, (x, _) in encoded.items()}
+        sizes = {k: n for k, (_, n) in encoded.items()}
+    elif isinstance(obj, (list, tuple)):
+        items = [
+            _to_jsonable_hooked(v, ctx / str(i)) for i, v in enumerate(obj)
+        ]
+        obj = (
+            [x for x, _ in items]
+            if isinstance(obj, list)
+            else tuple(x for x, _ in items)
+        )
+        sizes = [n for _, n in items]
+    if sized and type(source) in (dict, list):
+        _embed_large_children(source, obj, sizes, ctx)
+    if marker is not None and isinstance(obj, dict):
+        provenance.register(source, obj, ctx, marker, encoding=True)
+    return obj, _json_size(obj, sizes) if sized else 0
+
+
+def _to_jsonable_plain(obj: Any, ctx: Context) -> Any:
+    """
+    `turbo_broccoli.turbo_broccoli._to_jsonable` when no per-node hook is
+    active
+    """
+    obj = _encode(obj, ctx)
     if isinstance(obj, dict):
-        return {k: _to_jsonable(v, ctx / k) for k, v in obj.items()}
+        return {k: _to_jsonable_plain(v, ctx / k) for k, v in obj.items()}
     if isinstance(obj, list):
-        return [_to_jsonable(v, ctx / str(i)) for i, v in enumerate(obj)]
+        return [_to_jsonable_plain(v, ctx / str(i)) for i, v in enumerate(obj)]
     if isinstance(obj, tuple):
-        return tuple(_to_jsonable(v, ctx / str(i)) for i, v in enumerate(obj))
+        return tuple(
+            _to_jsonable_plain(v, ctx / str(i)) for i, v in enumerate(obj)
+        )
     return obj
 
 
-def from_json(doc: str, ctx: Context | None = None) -> Any:
+def append_json(
+    file_path: str | Path | None,
+    key: str | None,
+    value: Any,
+    ctx: Context | None = None,
+    max_journal_size: int | None = None,
+    **kwargs,
+) -> None:
+    """
+    Adds an entry to a JSON file whose root is a dict (if `key` is a string)
+    or a list (if `key` is `None`), without reading or rewriting the file:
+
+    ```py
+    for i in range(1000):
+        result = ...
+        tb.append_json("foo/bar.json", f"run_{i}", result)
+    results = tb.load_json("foo/bar.json")  # A dict with 1000 entries
+    ```
+
+    `value` is encoded and appended as a record to the file's journal, which
+    is a sidecar file whose name is the file's name followed by `.log`. The
+    cost of an append only depends on the size of `value`. The records are
+    replayed by `turbo_broccoli.load_json` and the like, later keys
+    overwriting earlier ones. The document doesn't need to exist beforehand.
+
+    The journal is merged into the document (see
+    `turbo_broccoli.turbo_broccoli.compact_json`) when it gets larger than
+    `max_journal_size` bytes, and whenever the document is saved again.
+
+    Args:
+        file_path (str | Path | None): If left to `None`, a context with a file
+            path must be provided
+        key (str | None): Key of the entry if the document is a dict, or
+            `None` if the document is a list
+        value (Any):
+        ctx (Context | None): The context to use. If `None`, a new context will
+            be created with the kwargs.
+        max_journal_size (int | None): If not `None`, the journal is compacted
+            after this append if it is larger than this (in bytes)
+        **kwargs: Forwarded to the `turbo_broccoli.context.Context`
+            constructor. If `ctx` is provided, the kwargs are ignored.
+    """
+    ctx = _make_or_set_ctx(file_path, ctx, **kwargs)
+    assert isinstance(ctx.file_path, Path)  # for typechecking
+    if key is None:
+        record = {"value": _to_jsonable(value, ctx)}
+    else:
+        record = {"key": key, "value": _to_jsonable(value, ctx / key)}
+    ctx.storage.flush()
+    journal = _journal_path(ctx.file_path)
+    if not journal.parent.exists():
+        journal.parent.mkdir(parents=True, exist_ok=True)
+    with journal.open(mode="a", encoding="utf-8") as fp:
+        fp.write(json.dumps(record) + "\n")
+        size = fp.tell()
+    document_cache.invalidate(ctx.file_path)
+    if max_journal_size is not None and size > max_journal_size:
+        compact_json(ctx=ctx)
+
+
+def compact_json(
+    file_path: str | Path | None = None, ctx: Context | None = None, **kwargs
+) -> None:
+    """
+    Merges the journal of a JSON file (see
+    `turbo_broccoli.turbo_broccoli.append_json`) into the file, and deletes
+    the journal. Nothing is decoded. The file is written atomically.
+
+    Args:
+        file_path (str | Path | None): If left to `None`, a context with a file
+            path must be provided
+        ctx (Context | None): The context to use. If `None`, a new context will
+            be created with the kwargs.
+        **kwargs: Forwarded to the `turbo_broccoli.context.Context`
+            constructor. If `ctx` is provided, the kwargs are ignored.
+    """
+    ctx = _make_or_set_ctx(file_path, ctx, **kwargs)
+    assert isinstance(ctx.file_path, Path)  # for typechecking
+    if _journal_path(ctx.file_path).exists():
+        _write_document(json.dumps(_read_document(ctx)), ctx, atomic=True)
+
+
+def from_json(doc: str, ctx: Context | None = None, schema: Any = None) -> Any:
     """
     Deserializes a JSON string. The context's file path and compression setting
-    will be ignored.
+    will be ignored. If a `schema` is provided, the document is decoded and
+    validated according to it, see `turbo_broccoli.schema`.
     """
-    return _from_jsonable(json.loads(doc), Context() if ctx is None else ctx)
+    ctx = Context() if ctx is None else ctx
+    return _decoder(schema, ctx)(json.loads(doc), ctx)
 
 
 def load_json(
-    file_path: str | Path | None = None, ctx: Context | None = None, **kwargs
+    file_path: str | Path | None = None,
+    ctx: Context | None = None,
+    schema: Any = None,
+    **kwargs,
 ) -> Any:
     """
     Loads a JSON file.
@@ -105,17 +557,14 @@ def load_json(
             path must be provided
         ctx (Context | None): The context to use. If `None`, a new context will
             be created with the kwargs.
+        schema (Any): Expected type of the document, e.g. a dataclass or
+            `list[int]`. If provided, the document is decoded and validated
+            according to it, see `turbo_broccoli.schema`.
         **kwargs: Forwarded to the `turbo_broccoli.context.Context`
             constructor. If `ctx` is provided, the kwargs are ignored.
     """
     ctx = _make_or_set_ctx(file_path, ctx, **kwargs)
-    assert isinstance(ctx.file_path, Path)  # for typechecking
-    if ctx.compress:
-        with ctx.file_path.open(mode="rb") as fp:
-            s = zlib.decompress(fp.read()).decode("utf-8")
-        return _from_jsonable(json.loads(s), ctx)
-    with ctx.file_path.open(mode="r", encoding="utf-8") as fp:
-        return _from_jsonable(json.load(fp), ctx)
+    return _load(ctx, schema)
 
 
 def save_json(
@@ -125,8 +574,9 @@ def save_json(
     **kwargs,
 ) -> None:
     """
-    Serializes an object and writes the result to a file. The artifact path and
-    the output file's parent folder will be created if they don't exist.
+    Serializes an object and writes the result to a file. The output file's
+    parent folder will be created if it doesn't exist, and so will the artifact
+    path if an artifact is written.
 
     Args:
         obj (Any):
@@ -138,24 +588,100 @@ def save_json(
     """
     ctx = _make_or_set_ctx(file_path, ctx, **kwargs)
     data = json.dumps(_to_jsonable(obj, ctx))
-    assert isinstance(ctx.file_path, Path)  # for typechecking
-    if not ctx.file_path.parent.exists():
-        ctx.file_path.parent.mkdir(parents=True)
-    if ctx.compress:
-        with ctx.file_path.open(mode="wb") as fp:
-            fp.write(zlib.compress(data.encode("utf-8")))
-    else:
-        with ctx.file_path.open(mode="w", encoding="utf-8") as fp:
-            fp.write(data)
+    ctx.storage.flush()
+    _write_document(data, ctx)
 
 
 def to_json(obj: Any, ctx: Context | None = None) -> str:
     """
     Converts an object to a JSON string. The context's artifact folder will be
-    created if it doesn't exist. The context's file path and compression
-    setting will be ignored.
+    created if an artifact is written and if it doesn't exist. The context's
+    file path and compression setting will be ignored.
     """
     ctx = Context() if ctx is None else ctx
-    if not ctx.artifact_path.exists():
-        ctx.artifact_path.mkdir(parents=True)
-    return json.dumps(_to_jsonable(obj, ctx))
+    data = json.dumps(_to_jsonable(obj, ctx))
+    ctx.storage.flush()
+    return data
+
+
+def update_json(
+    file_path: str | Path | None,
+    json_path: str,
+    value: Any = None,
+    ctx: Context | None = None,
+    delete: bool = False,
+    **kwargs,
+) -> None:
+    """
+    Replaces, inserts, or deletes the value at a JSONpath in an existing JSON
+    file, without loading the rest of the document:
+
+    ```py
+    tb.update_json("foo/bar.json", "$.results.3.comment", "Looks good")
+    tb.update_json("foo/bar.json", "$.results.4", delete=True)
+    ```
+
+    Only `value` is encoded (and only its artifacts are written). The other
+    parts of the document are copied through as is, without being decoded.
+    The output file is written atomically. The artifacts of the replaced or
+    deleted value, if any, are not removed.
+
+    Args:
+        file_path (str | Path | None): If left to `None`, a context with a file
+            path must be provided
+        json_path (str): A JSONpath of the form `$.key.key...`, where the keys
+            are dict keys or list indices, as in `Context.json_path`. The
+            parent of the target must be a plain dict or list (i.e. not e.g.
+            an embedded dict). If the target is a missing dict key, it is
+            inserted. If it is the index equal to the length of a list, the
+            value is appended.
+        value (Any): The new value. Ignored if `delete` is `True`.
+        ctx (Context | None): The context to use. If `None`, a new context will
+            be created with the kwargs.
+        delete (bool): Deletes the target instead of replacing it
+        **kwargs: Forwarded to the `turbo_broccoli.context.Context`
+            constructor. If `ctx` is provided, the kwargs are ignored.
+    """
+    ctx = _make_or_set_ctx(file_path, ctx, **kwargs)
+    keys = json_path.split(".")
+    if keys[0] != "$":
+        raise ValueError(f"Invalid JSONpath '{json_path}'")
+    if len(keys) == 1:
+        if delete:
+            raise ValueError("The root of a document cannot be deleted")
+        save_json(value, ctx=ctx)
+        return
+    document = parent = _read_document(ctx)
+    for i, key in enumerate(keys[1:]):
+        if isinstance(parent, dict) and "__type__" in parent:
+            raise ValueError(
+                f"Cannot update inside an object of type "
+                f"'{parent['__type__']}' at '{'.'.join(keys[: i + 1])}'"
+            )
+        k: str | int = key
+        if isinstance(parent, list):
+            try:
+                k = int(key)
+            except ValueError as exc:
+                raise KeyError(f"Invalid list index '{key}'") from exc
+            n = len(parent)
+            # Setting the index right after the last element appends
+            if not -n <= k < n + (i == len(keys) - 2 and not delete):
+                raise KeyError(f"List index out of range: '{key}'")
+        elif not isinstance(parent, dict):
+            raise KeyError(f"'{'.'.join(keys[: i + 1])}' is not a container")
+        if i == len(keys) - 2:
+            break
+        parent = parent[k]  # type: ignore
+    if delete:
+        del parent[k]  # type: ignore
+    else:
+        tmp = Context(**{**ctx.__dict__, "json_path": json_path})
+        v = _to_jsonable(value, tmp)
+        if isinstance(parent, list) and k == len(parent):
+            parent.append(v)
+        else:
+            parent[k] = v  # type: ignore
+    data = json.dumps(document)
+    ctx.storage.flush()
+    _write_document(data, ctx, atomic=True)